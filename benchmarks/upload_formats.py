@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Benchmark server-side parsing throughput of uploads, by RDF format.
+
+A sample N-Triples file is converted (with rdflib) to each RDF format, then
+each converted file is uploaded to a fresh in-memory dataset, as is and
+transcoded client-side to N-Triples before upload. Throughput is reported in
+triples per second, transcoding time included.
+
+Usage:
+    python benchmarks/upload_formats.py sample.nt --host localhost
+
+Requires a running Fuseki server and the 'transcode' extra (rdflib).
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import rdflib
+
+from fuseki_manager import FusekiAdminClient, FusekiDataClient
+from fuseki_manager.formats import N_TRIPLES, mime_type_from_path
+
+
+FORMATS = (
+    ('.nt', 'nt'),
+    ('.ttl', 'turtle'),
+    ('.rdf', 'xml'),
+    ('.jsonld', 'json-ld'),
+)
+
+
+def convert(sample, tmp_dir):
+    """Convert sample to all benchmarked formats."""
+    graph = rdflib.Graph()
+    graph.parse(str(sample), format='nt')
+    paths = []
+    for extension, rdflib_format in FORMATS:
+        path = Path(tmp_dir) / 'sample{}'.format(extension)
+        graph.serialize(destination=str(path), format=rdflib_format)
+        paths.append(path)
+    return len(graph), paths
+
+
+def upload(admin_client, data_client, path, transcode):
+    """Upload a file to a fresh dataset, and get upload duration."""
+    ds_name = 'benchmark_upload'
+    admin_client.create_dataset(ds_name, confirm=False)
+    try:
+        started = time.monotonic()
+        data_client.upload_files(ds_name, [path], transcode=transcode)
+        return time.monotonic() - started
+    finally:
+        admin_client.delete_dataset(ds_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('sample', help='Sample N-Triples file')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=3030)
+    parser.add_argument('--user')
+    parser.add_argument('--pwd')
+    parser.add_argument(
+        '--runs', type=int, default=3, help='Uploads per format (best kept)')
+    args = parser.parse_args()
+
+    kwargs = dict(host=args.host, port=args.port, user=args.user, pwd=args.pwd)
+    admin_client = FusekiAdminClient(**kwargs)
+    data_client = FusekiDataClient(**kwargs)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        nb_triples, paths = convert(args.sample, tmp_dir)
+        print('{} triples'.format(nb_triples))
+        print('{:<32} {:>12} {:>10} {:>14}'.format(
+            'format', 'size (bytes)', 'time (s)', 'triples/s'))
+        for path in paths:
+            mime_type = mime_type_from_path(path)
+            for transcode in (False, True):
+                if transcode and mime_type == N_TRIPLES:
+                    continue
+                duration = min(
+                    upload(admin_client, data_client, path, transcode)
+                    for _ in range(args.runs))
+                label = mime_type + (' (transcoded)' if transcode else '')
+                print('{:<32} {:>12} {:>10.3f} {:>14.0f}'.format(
+                    label, path.stat().st_size, duration,
+                    nb_triples / duration))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,5 @@
 """Fuseki admin initialization."""
 
-from .api_client import FusekiAdminClient, FusekiDataClient, FusekiSPARQLClient  # noqa
+from .api_client import (  # noqa
+    FusekiAdminClient, FusekiDataClient, FusekiSPARQLClient,
+    FusekiGraphStoreClient, FusekiFleet, FusekiServer)
@@ -7,4 +7,7 @@ https://jena.apache.org/documentation/fuseki2/fuseki-server-protocol.html
 from .admin import FusekiAdminClient    # noqa
 from .data import FusekiDataClient      # noqa
 from .base import FusekiBaseClient      # noqa
+from .fleet import FusekiFleet          # noqa
+from .graph_store import FusekiGraphStoreClient  # noqa
+from .server import FusekiServer        # noqa
 from .sparql import FusekiSPARQLClient  # noqa
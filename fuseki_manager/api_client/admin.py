@@ -1,13 +1,22 @@
 """Jena/Fuseki admin API client to manage server and datasets throught HTTP"""
 
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from dateutil import parser as dt_parser
 
+from .backup import BackupOrchestrator
 from .base import FusekiBaseClient
 from .data import FusekiDataClient
+from .maintenance import CompactionScheduler
+from .stats import StatsSampler
+from .tasks import TaskWaiter
 
-from ..utils import build_http_file_obj
+from ..multipart import MultipartEncoder
+from ..utils import TTLCache
 from ..exceptions import (
-    DatasetAlreadyExistsError,
+    DatasetAlreadyExistsError, DatasetNotFoundError,
     TaskNotFoundError)
 
 
@@ -15,7 +24,8 @@ class FusekiAdminClient(FusekiBaseClient):
     """Fuseki 'administration' API client (administration service)."""
 
     def __init__(self, *, host='localhost', port=3030, is_secured=False,
-                 user=None, pwd=None):
+                 user=None, pwd=None, json_decoder=None, timeout=None,
+                 concurrency_limiter=None, session=None, cache_ttl=0):
         """
         :param str host: Fuseki host name. (default 'localhost')
         :param int port: Port used by Fuseki instance. (default 3030)
@@ -23,12 +33,31 @@ class FusekiAdminClient(FusekiBaseClient):
             Should secured channel be used (https)? (default False)
         :param str user: User name used in BASIC authentication.
         :param str pwd: Password for BASIC authentication.
+        :param str|callable|JSONDecoder json_decoder:
+            Decoder of JSON responses. See `FusekiBaseClient`.
+        :param float timeout: Default connect and read timeout of requests
+            (seconds), None to wait forever. (default None)
+        :param ConcurrencyLimiter concurrency_limiter: Adaptive limit of
+            in-flight requests. See `FusekiBaseClient`.
+        :param requests.Session session: Session sending requests, to share
+            a connection pool between clients.
+        :param float cache_ttl:
+            Time-to-live (seconds) of cached metadata (datasets list, datasets
+            descriptions, server info), 0 disables caching. (default 0)
         """
         super().__init__(
-            host=host, port=port, is_secured=is_secured, user=user, pwd=pwd)
+            host=host, port=port, is_secured=is_secured, user=user, pwd=pwd,
+            json_decoder=json_decoder, timeout=timeout,
+            concurrency_limiter=concurrency_limiter, session=session)
+
+        self._cache = TTLCache(cache_ttl)
+        self._server_start = None
 
         self._service_data = FusekiDataClient(
-            host=host, port=port, is_secured=is_secured, user=user, pwd=pwd)
+            host=host, port=port, is_secured=is_secured, user=user, pwd=pwd,
+            json_decoder=self.json_decoder, timeout=timeout,
+            concurrency_limiter=concurrency_limiter, session=session)
+        self._task_waiter = None
 
     def _build_uri(self, service_name):
         """Build service URI.
@@ -51,32 +80,114 @@ class FusekiAdminClient(FusekiBaseClient):
         # in UTC offsets (https://stackoverflow.com/a/48539157)
         return dt_parser.parse(response.text)
 
-    def server_info(self):
+    def _cached(self, key, fetch, use_cache):
+        """Get metadata from cache, or fetch and cache it.
+
+        :param tuple key: Cache key.
+        :param callable fetch: Function getting metadata from server.
+        :param bool use_cache: If False, always fetch metadata.
+        :returns dict: Metadata (a copy of the cached value), JSON format.
+        """
+        value = self._cache.get(key) if use_cache else None
+        if value is None:
+            value = fetch()
+            self._cache.set(key, value)
+        return copy.deepcopy(value)
+
+    def _invalidate_cache(self, ds_name=None):
+        """Remove server and datasets metadata from cache.
+
+        :param str ds_name: Name of a dataset whose description is removed.
+        """
+        self._cache.pop(('server',), ('datasets',), ('dataset', ds_name,))
+
+    def _update_cache(self, ds_name, description):
+        """Update a dataset's metadata in cache after a change made by this
+        client.
+
+        :param str ds_name: Dataset's name.
+        :param dict description:
+            Dataset's details (JSON format), None if dataset was deleted.
+        """
+        self._cache.pop(('server',), ('dataset', ds_name,))
+        if description is not None:
+            self._cache.set(('dataset', ds_name,), description)
+        datasets = self._cache.get(('datasets',))
+        if datasets is not None:
+            ds_key = '/{}'.format(ds_name)
+            datasets = [
+                dataset for dataset in datasets['datasets']
+                if dataset['ds.name'] != ds_key]
+            if description is not None:
+                datasets.append(description)
+            self._cache.set(('datasets',), {'datasets': datasets})
+
+    def clear_cache(self):
+        """Remove all cached metadata."""
+        self._cache.clear()
+
+    def server_start_time(self, *, refresh=False):
+        """Get server start time, requested once for client's lifetime.
+
+        :param bool refresh: Request it again (e.g. after a server restart).
+            (default False)
+        :returns str: Start date time, JSON format.
+        """
+        if self._server_start is None or refresh:
+            self._server_start = self.server_info(use_cache=False).get(
+                'startDateTime', '')
+        return self._server_start
+
+    def server_info(self, *, use_cache=True):
         """Get details about the server and it's current status.
 
+        :param bool use_cache: Use cached info, if any. (default True)
         :returns dict: JSON format.
         """
-        uri = self._build_uri('server')
-        response = self._get(uri)
-        return response.json()
+        def fetch():
+            uri = self._build_uri('server')
+            response = self._get(uri)
+            return self._json(response)
 
-    def get_all_datasets(self):
+        return self._cached(('server',), fetch, use_cache)
+
+    def get_all_datasets(self, *, use_cache=True):
         """Get a container representing all datasets present in the server.
 
+        :param bool use_cache: Use cached datasets list, if any.
+            (default True)
         :returns dict: JSON format.
         """
-        uri = self._build_uri('datasets')
-        response = self._get(uri)
-        return response.json()
+        def fetch():
+            uri = self._build_uri('datasets')
+            response = self._get(uri)
+            return self._json(response)
+
+        return self._cached(('datasets',), fetch, use_cache)
 
-    def create_dataset(self, ds_name, *, ds_type='mem'):
+    def dataset_exists(self, ds_name, *, use_cache=True):
+        """Check whether a dataset exists on the server.
+
+        :param str ds_name: Dataset's name.
+        :param bool use_cache: Use cached datasets list, if any.
+            (default True)
+        :returns bool:
+        """
+        datasets = self.get_all_datasets(use_cache=use_cache)['datasets']
+        ds_key = '/{}'.format(ds_name)
+        return any(dataset['ds.name'] == ds_key for dataset in datasets)
+
+    def create_dataset(self, ds_name, *, ds_type='mem', confirm=True):
         """Add a dataset to a running server.
 
         :param str ds_name: Dataset's name.
-        :param str ds_type: Dataset's type (either 'mem' or 'tdb').
-        :returns dict: Details on dataset container created, JSON format.
+        :param str ds_type: Dataset's type ('mem', 'tdb' or 'tdb2').
+        :param bool confirm:
+            Get the created dataset's details from the server. (default True)
+        :returns dict: Details on dataset container created, JSON format,
+            None if 'confirm' is False.
         """
-        if ds_type not in ('mem', 'tdb',):
+        if ds_type not in ('mem', 'tdb', 'tdb2',):
             raise ValueError('Invalid dbType: {}'.format(ds_type))
         uri = self._build_uri('datasets')
         query_params = {'dbType': ds_type, 'dbName': ds_name}
@@ -84,7 +195,12 @@ class FusekiAdminClient(FusekiBaseClient):
             uri, params=query_params, expected_status=(200, 409,))
         if response.status_code == 409:
             raise DatasetAlreadyExistsError(response.reason)
-        return self.get_dataset(ds_name)
+        if not confirm:
+            self._invalidate_cache(ds_name)
+            return None
+        description = self.get_dataset(ds_name, use_cache=False)
+        self._update_cache(ds_name, description)
+        return description
 
     def create_dataset_from_config_file(self, config_path):
         """Sets up a dataset from a configuration file on a running server.
@@ -93,26 +209,35 @@ class FusekiAdminClient(FusekiBaseClient):
         :returns bool: True if no errors raised.
         """
         uri = self._build_uri('datasets')
-        # build files parameter
-        config_path = ('file', build_http_file_obj(config_path, 'text/turtle'))
-        response = self._post(
-            uri, expected_status=(200, 409,), files=[config_path])
+        # build streamed multipart body
+        encoder = MultipartEncoder([('file', config_path, 'text/turtle')])
+        with encoder:
+            response = self._post(
+                uri, expected_status=(200, 409,),
+                data=encoder, headers=encoder.headers)
         if response.status_code == 409:
             raise DatasetAlreadyExistsError(response.reason)
+        self._invalidate_cache()
         return True
 
-    def get_dataset(self, ds_name):
+    def get_dataset(self, ds_name, *, use_cache=True):
         """Get a dataset can from a running server.
 
         :param str ds_name: Dataset's name.
+        :param bool use_cache: Use cached dataset's details, if any.
+            (default True)
         :returns dict: Details on dataset container, JSON format.
         """
-        service_name = 'datasets/{}'.format(ds_name)
-        uri = self._build_uri(service_name)
-        response = self._get(uri)
-        return response.json()
+        def fetch():
+            service_name = 'datasets/{}'.format(ds_name)
+            uri = self._build_uri(service_name)
+            response = self._get(uri)
+            return self._json(response)
 
-    def delete_dataset(self, ds_name, *, force_drop_data=False):
+        return self._cached(('dataset', ds_name,), fetch, use_cache)
+
+    def delete_dataset(self, ds_name, *, force_drop_data=False,
+                       drop_chunk_size=None):
         """The dataset name and the details of its configuration are completely
         deleted and can not be recovered.
 
@@ -125,17 +250,24 @@ class FusekiAdminClient(FusekiBaseClient):
         :param str ds_name: The name of the dataset to remove.
         :param bool force_drop_data:
             Execute a 'DROP ALL' query before removing dataset. (default False)
+        :param int drop_chunk_size: Drop data by batches of triples instead
+            of a single 'DROP ALL'. See `FusekiDataClient.drop_all`.
         :returns bool: True if deleted without errors.
         """
         # data of a 'TDB' dataset is not removed, so execute a 'DROP ALL' query
         # https://jena.apache.org/documentation/fuseki2/fuseki-server-protocol.html#removing-a-dataset
         if force_drop_data:
-            self._service_data.drop_all(ds_name)
+            self._service_data.drop_all(ds_name, chunk_size=drop_chunk_size)
 
         # remove dataset
         service_name = 'datasets/{}'.format(ds_name)
         uri = self._build_uri(service_name)
-        self._delete(uri)
+        try:
+            self._delete(uri)
+        except Exception:
+            self._invalidate_cache(ds_name)
+            raise
+        self._update_cache(ds_name, None)
 
         return True
 
@@ -153,9 +285,107 @@ class FusekiAdminClient(FusekiBaseClient):
         service_name = 'datasets/{}'.format(ds_name)
         uri = self._build_uri(service_name)
         query_params = {'state': state}
-        self._post(uri, params=query_params)
+        try:
+            self._post(uri, params=query_params)
+        except Exception:
+            self._invalidate_cache(ds_name)
+            raise
+        description = self._cache.get(('dataset', ds_name,))
+        if description is not None:
+            self._update_cache(
+                ds_name, dict(description, **{'ds.state': state == 'active'}))
+        else:
+            self._invalidate_cache(ds_name)
         return True if state == 'active' else False
 
+    def _run_bulk(self, func, items, workers):
+        """Run an operation on many items with bounded concurrency.
+
+        :param callable func:
+            Operation, called with an item and returning its report.
+        :param list items: Items to process.
+        :param int workers: Maximum number of concurrent operations.
+        :returns list[dict]: Reports, in items order.
+        """
+        if workers < 1:
+            raise ValueError('Invalid workers value: {}'.format(workers))
+
+        def run(item):
+            started = time.monotonic()
+            try:
+                report = func(item)
+            except Exception as exc:
+                report = {'status': 'failed', 'error': exc}
+            report['duration'] = time.monotonic() - started
+            return report
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(run, items))
+
+    def _provision_dataset(self, spec):
+        status = 'created'
+        try:
+            if 'config_path' in spec:
+                self.create_dataset_from_config_file(spec['config_path'])
+            else:
+                self.create_dataset(
+                    spec['ds_name'], ds_type=spec.get('ds_type', 'mem'),
+                    confirm=False)
+        except DatasetAlreadyExistsError:
+            status = 'exists'
+        if spec.get('state') is not None:
+            self.set_dataset_state(spec['ds_name'], state=spec['state'])
+        return {'status': status, 'error': None}
+
+    def provision_datasets(self, specs, *, workers=8):
+        """Create many datasets concurrently.
+
+        An already existing dataset is considered as successfully created.
+
+        :param list[dict] specs: Datasets specifications, with either
+            'ds_name' and optional 'ds_type' (see `create_dataset`), or
+            'config_path' (see `create_dataset_from_config_file`, 'ds_name'
+            is then only used in report). An optional 'state' is set after
+            creation (see `set_dataset_state`).
+        :param int workers: Maximum number of concurrent provisionings.
+            (default 8)
+        :returns list[dict]: Reports in specs order, with 'ds_name',
+            'status' ('created', 'exists' or 'failed'), 'error' (exception
+            raised, if any) and 'duration' (seconds).
+        """
+        reports = self._run_bulk(self._provision_dataset, specs, workers)
+        for spec, report in zip(specs, reports):
+            report['ds_name'] = spec.get('ds_name')
+        return reports
+
+    def teardown_datasets(self, ds_names, *, force_drop_data=False,
+                          workers=8):
+        """Delete many datasets concurrently.
+
+        Each dataset's data is dropped (if 'force_drop_data' is True) before
+        the dataset is deleted. A missing dataset is considered as
+        successfully deleted.
+
+        :param list[str] ds_names: Names of the datasets to remove.
+        :param bool force_drop_data: See `delete_dataset`. (default False)
+        :param int workers: Maximum number of concurrent teardowns.
+            (default 8)
+        :returns list[dict]: Reports in names order, with 'ds_name',
+            'status' ('deleted', 'missing' or 'failed'), 'error' (exception
+            raised, if any) and 'duration' (seconds).
+        """
+        def teardown(ds_name):
+            try:
+                self.delete_dataset(ds_name, force_drop_data=force_drop_data)
+            except DatasetNotFoundError:
+                return {'status': 'missing', 'error': None}
+            return {'status': 'deleted', 'error': None}
+
+        reports = self._run_bulk(teardown, ds_names, workers)
+        for ds_name, report in zip(ds_names, reports):
+            report['ds_name'] = ds_name
+        return reports
+
     def get_all_stats(self):
         """Get statistics all datasets in a single response.
 
@@ -163,7 +393,7 @@ class FusekiAdminClient(FusekiBaseClient):
         """
         uri = self._build_uri('stats')
         response = self._get(uri)
-        return response.json()
+        return self._json(response)
 
     def get_stats(self, ds_name):
         """Get statistics for a defined dataset in a single response.
@@ -174,7 +404,27 @@ class FusekiAdminClient(FusekiBaseClient):
         service_name = 'stats/{}'.format(ds_name)
         uri = self._build_uri(service_name)
         response = self._get(uri)
-        return response.json()
+        return self._json(response)
+
+    def get_metrics(self):
+        """Get server metrics (Fuseki 3.14+, Prometheus text format).
+
+        :returns str: Metrics, Prometheus text format.
+        :raises DatasetNotFoundError: When metrics endpoint is not available.
+        """
+        uri = self._build_uri('metrics')
+        response = self._get(uri)
+        return response.text
+
+    def stats_sampler(self, *, interval=10., **kwargs):
+        """Get a sampler collecting statistics at a fixed interval, to compute
+        requests rates and error ratios per dataset and endpoint.
+
+        :param float interval: Sampling interval (seconds). (default 10)
+        :param kwargs: StatsSampler parameters ('capacity', 'use_metrics').
+        :returns StatsSampler: Sampler, to be started.
+        """
+        return StatsSampler(self, interval=interval, **kwargs)
 
     def get_all_backups(self):
         """Returns a list of all the files in the backup area of the server.
@@ -184,7 +434,7 @@ class FusekiAdminClient(FusekiBaseClient):
         """
         uri = self._build_uri('backups-list')
         response = self._get(uri)
-        return response.json()
+        return self._json(response)
 
     def create_backup(self, ds_name):
         """This operation initiates a backup and returns a JSON object with
@@ -198,7 +448,48 @@ class FusekiAdminClient(FusekiBaseClient):
         service_name = 'backup/{}'.format(ds_name)
         uri = self._build_uri(service_name)
         response = self._post(uri)
-        return response.json()
+        return self._json(response)
+
+    def compact_dataset(self, ds_name, *, delete_old=True):
+        """Initiate the compaction of a TDB2 dataset, and return a JSON
+        object with the task Id in it (Fuseki 3.16+).
+
+        :param str ds_name: Dataset's name.
+        :param bool delete_old:
+            Delete old database storage after compaction. (default True)
+        :returns dict: Details on compaction task created, JSON format.
+        """
+        service_name = 'compact/{}'.format(ds_name)
+        uri = self._build_uri(service_name)
+        params = {'deleteOld': 'true'} if delete_old else None
+        response = self._post(uri, params=params, expected_status=(200, 202,))
+        return self._json(response)
+
+    def compaction_scheduler(self, **kwargs):
+        """Get a scheduler compacting TDB2 datasets on size or updates
+        thresholds, one at a time.
+
+        :param kwargs: CompactionScheduler parameters ('max_size',
+            'max_updates', 'databases_dir', 'delete_old', 'timeout').
+        :returns CompactionScheduler:
+        """
+        return CompactionScheduler(self, **kwargs)
+
+    def backup_datasets(self, ds_names=None, *, priorities=None, **kwargs):
+        """Back up many datasets (all server's datasets by default) with a
+        concurrency limit, wait for backups to finish and verify them.
+
+        :param list[str] ds_names:
+            Names of datasets to back up, None for all server's datasets.
+        :param dict priorities:
+            Priority by dataset name (higher first, default 0).
+        :param kwargs: BackupOrchestrator parameters ('max_concurrent',
+            'offline', 'backup_dir', 'timeout').
+        :returns list[dict]: Reports per dataset, see
+            `BackupOrchestrator.run`.
+        """
+        orchestrator = BackupOrchestrator(self, **kwargs)
+        return orchestrator.run(ds_names, priorities=priorities)
 
     def get_all_tasks(self):
         """Returns a description of all running and recently tasks. A finished
@@ -218,7 +509,7 @@ class FusekiAdminClient(FusekiBaseClient):
         """
         uri = self._build_uri('tasks')
         response = self._get(uri)
-        return response.json()
+        return self._json(response)
 
     def get_task(self, task_id):
         """Get a description about one single task.
@@ -230,7 +521,33 @@ class FusekiAdminClient(FusekiBaseClient):
         service_name = 'tasks/{}'.format(task_id)
         uri = self._build_uri(service_name)
         response = self._get(uri, not_found_raise_exc=TaskNotFoundError)
-        return response.json()
+        return self._json(response)
+
+    @property
+    def task_waiter(self):
+        """Waiter tracking asynchronous tasks with a single polling loop.
+
+        :returns TaskWaiter:
+        """
+        if self._task_waiter is None:
+            self._task_waiter = TaskWaiter(self)
+        return self._task_waiter
+
+    def wait_for_task(self, task_id, *, callback=None):
+        """Wait for an asynchronous task (e.g. backup) to finish.
+
+        All waited tasks are checked together by one periodic request.
+
+        :param int|str task_id: ID of an asynchronous task.
+        :param callable callback:
+            Called with the future once the task is finished.
+        :returns concurrent.futures.Future:
+            Resolved with task's details when the task has finished.
+            The future raises TaskFailedError if the task failed, or
+            TaskNotFoundError if the task record was removed from server's
+            history before being seen finished.
+        """
+        return self.task_waiter.wait(task_id, callback=callback)
 
     def restore_data(self, ds_name, file_paths, src_mime_type=None):
         """Upload and insert datas by sending a list of files to a dataset.
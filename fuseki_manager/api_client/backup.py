@@ -0,0 +1,138 @@
+"""Jena/Fuseki fleet-wide backups orchestration."""
+
+import re
+import time
+from concurrent.futures import (
+    ThreadPoolExecutor, TimeoutError as FutureTimeoutError)
+from pathlib import Path
+
+
+def backup_file_regex(ds_name):
+    """Build a regex matching the backup files names of a dataset.
+
+    Fuseki names backups '<dataset>_<yyyy-MM-dd_HH-mm-ss>.nq.gz'.
+
+    :param str ds_name: Dataset's name.
+    :returns re.Pattern:
+    """
+    return re.compile(
+        r'^{}_\d{{4}}-\d{{2}}-\d{{2}}_\d{{2}}-\d{{2}}-\d{{2}}'.format(
+            re.escape(ds_name)))
+
+
+class BackupOrchestrator():
+    """Back up many datasets with a concurrency limit.
+
+    Datasets are backed up by decreasing priority, at most 'max_concurrent'
+    at a time to limit server disk I/O. Backup tasks completion is tracked
+    by the admin client's task waiter, then each backup is verified by
+    looking for its new file in the server's backups list.
+    """
+
+    def __init__(self, admin_client, *, max_concurrent=2, offline=False,
+                 backup_dir=None, timeout=None):
+        """
+        :param FusekiAdminClient admin_client: Client used for backups.
+        :param int max_concurrent:
+            Maximum number of simultaneous backups. (default 2)
+        :param bool offline:
+            Set each dataset 'offline' during its backup, then 'active'
+            again. (default False)
+        :param str|Path backup_dir: Server's backups directory, when locally
+            reachable, to get backup files sizes. (default None)
+        :param float timeout:
+            Maximum duration of a dataset backup (seconds). (default None)
+        """
+        if max_concurrent < 1:
+            raise ValueError(
+                'Invalid max_concurrent value: {}'.format(max_concurrent))
+        self._client = admin_client
+        self.max_concurrent = max_concurrent
+        self.offline = offline
+        self.backup_dir = Path(backup_dir) if backup_dir is not None else None
+        self.timeout = timeout
+
+    def _list_backups(self):
+        return set(self._client.get_all_backups().get('backups', []))
+
+    def _backup(self, ds_name, known_backups):
+        report = {
+            'ds_name': ds_name, 'status': 'failed', 'task_id': None,
+            'duration': None, 'backup_file': None, 'size': None,
+            'verified': False, 'error': None}
+        started = time.monotonic()
+        try:
+            if self.offline:
+                self._client.set_dataset_state(ds_name, state='offline')
+            try:
+                task = self._client.create_backup(ds_name)
+                report['task_id'] = task['taskId']
+                future = self._client.wait_for_task(task['taskId'])
+                try:
+                    future.result(self.timeout)
+                except FutureTimeoutError:
+                    # stop polling the server for this task
+                    future.cancel()
+                    raise
+            finally:
+                if self.offline:
+                    self._client.set_dataset_state(ds_name, state='active')
+            report['duration'] = time.monotonic() - started
+            report['status'] = 'done'
+
+            # verify backup file was created
+            regex = backup_file_regex(ds_name)
+            new_files = sorted(
+                name for name in self._list_backups() - known_backups
+                if regex.match(name))
+            if new_files:
+                report['backup_file'] = new_files[-1]
+                report['verified'] = True
+                if self.backup_dir is not None:
+                    backup_path = self.backup_dir / report['backup_file']
+                    if backup_path.is_file():
+                        report['size'] = backup_path.stat().st_size
+        except Exception as exc:
+            report['duration'] = time.monotonic() - started
+            report['error'] = exc
+        return report
+
+    def run(self, ds_names=None, *, priorities=None):
+        """Back up datasets.
+
+        :param list[str] ds_names:
+            Names of datasets to back up, None for all server's datasets.
+        :param dict priorities:
+            Priority by dataset name (higher first, default 0).
+        :returns list[dict]: Reports in backup start order, with 'ds_name',
+            'status' ('done' or 'failed'), 'task_id', 'duration' (seconds),
+            'backup_file', 'size' (bytes, if 'backup_dir' is known),
+            'verified' (backup file found in backups list) and 'error'.
+        """
+        if ds_names is None:
+            ds_names = [
+                dataset['ds.name'].lstrip('/')
+                for dataset in self._client.get_all_datasets()['datasets']]
+        priorities = priorities or {}
+        ds_names = sorted(
+            ds_names, key=lambda name: priorities.get(name, 0), reverse=True)
+        known_backups = self._list_backups()
+        with ThreadPoolExecutor(max_workers=self.max_concurrent) as executor:
+            return list(executor.map(
+                lambda name: self._backup(name, known_backups), ds_names))
+
+
+def summarize_backups(reports):
+    """Summarize backup reports.
+
+    :param list[dict] reports: See `BackupOrchestrator.run`.
+    :returns dict: Counts of done, failed and verified backups, total
+        duration and total size of known backup files.
+    """
+    return {
+        'done': sum(1 for r in reports if r['status'] == 'done'),
+        'failed': sum(1 for r in reports if r['status'] == 'failed'),
+        'verified': sum(1 for r in reports if r['verified']),
+        'duration': sum(r['duration'] or 0. for r in reports),
+        'size': sum(r['size'] or 0 for r in reports),
+    }
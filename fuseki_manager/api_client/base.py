@@ -1,16 +1,54 @@
 """Jena/Fuseki base API client to handle HTTP requests."""
 
+import threading
+from concurrent.futures import Future
+
 import requests
+from ..concurrency import OVERLOAD_STATUS_CODES
+from ..json_decoder import JSONDecoder
 from ..exceptions import (
     FusekiClientError, FusekiClientResponseError,
     DatasetNotFoundError)
 
 
+def _release_on_close(response, limiter, started):
+    """Free a streamed request's limiter slot once its body is read (the
+    connection is then released) or its response is closed."""
+    lock = threading.Lock()
+    released = []
+
+    def release():
+        with lock:
+            if released:
+                return
+            released.append(True)
+        limiter.release(started)
+
+    release_conn = getattr(response.raw, 'release_conn', None)
+    if release_conn is not None:
+        def release_conn_and_slot():
+            try:
+                release_conn()
+            finally:
+                release()
+        response.raw.release_conn = release_conn_and_slot
+
+    close = response.close
+
+    def close_and_release():
+        try:
+            close()
+        finally:
+            release()
+    response.close = close_and_release
+
+
 class FusekiBaseClient():
     """Fuseki base API client, for both 'administration' and 'data' APIs."""
 
     def __init__(self, *, host='localhost', port=3030, is_secured=False,
-                 user=None, pwd=None):
+                 user=None, pwd=None, json_decoder=None, timeout=None,
+                 concurrency_limiter=None, session=None):
         """
         :param str host: Fuseki server host name. (default 'localhost')
         :param int port: Port used by Fuseki instance. (default 3030)
@@ -18,12 +56,30 @@ class FusekiBaseClient():
             Should secured channel be used (https)? (default False)
         :param str user: User name used in BASIC authentication.
         :param str pwd: Password for BASIC authentication.
+        :param str|callable|JSONDecoder json_decoder: Decoder of JSON
+            responses: backend name ('orjson', 'ujson', 'json'), loads
+            function or decoder. (default 'orjson' if installed, else 'json')
+        :param float timeout: Default connect and read timeout of requests
+            (seconds), None to wait forever. (default None)
+        :param ConcurrencyLimiter concurrency_limiter: Adaptive limit of
+            in-flight requests, shared by the clients of a server. (default
+            None, no limit)
+        :param requests.Session session: Session sending requests, to share
+            a connection pool between clients. (default None, a new
+            connection per request)
         """
         self.host = host
         self.port = port
         self.is_secured = is_secured
         self.auth_user = user
         self.auth_pwd = pwd
+        if not isinstance(json_decoder, JSONDecoder):
+            json_decoder = JSONDecoder(
+                'auto' if json_decoder is None else json_decoder)
+        self.json_decoder = json_decoder
+        self.timeout = timeout
+        self.concurrency_limiter = concurrency_limiter
+        self.session = session
 
         self._auth_data = None
         if self.auth_user is not None and self.auth_pwd is not None:
@@ -45,10 +101,11 @@ class FusekiBaseClient():
             ', auth_user={self.auth_user}'
             ')'.format(self=self))
 
-    def _get(self, uri, *, use_auth=True, expected_status=(200,),
-             not_found_raise_exc=DatasetNotFoundError, **kwargs):
-        """Execute a GET request.
+    def _request(self, method, uri, *, use_auth=True, expected_status=(200,),
+                 not_found_raise_exc=DatasetNotFoundError, **kwargs):
+        """Execute a request.
 
+        :param str method: HTTP method of the request.
         :param str uri: Request's URI to send.
         :param bool use_auth: If True, use BASIC authentication (default True).
         :param tuple(int) expected_status:
@@ -60,68 +117,105 @@ class FusekiBaseClient():
         :raises FusekiClientError:
         :raises FusekiClientResponseError:
         :raises DatasetNotFoundError:
+        :raises ServerOverloadedError:
+            When request is shed by concurrency limiter.
+
+        With a concurrency limiter, the slot of a streamed request
+        ('stream=True') is only freed once its response is consumed or
+        closed.
         """
         # prepare request authentication params
         auth_data = self._auth_data if use_auth else None
+        limiter = self.concurrency_limiter
+        started = limiter.acquire() if limiter is not None else None
+        overloaded = False
+        is_released = False
         try:
             # send request
-            raw_response = requests.get(uri, auth=auth_data, **kwargs)
+            kwargs.setdefault('timeout', self.timeout)
+            sender = requests if self.session is None else self.session
+            raw_response = sender.request(
+                method, uri, auth=auth_data, **kwargs)
+            overloaded = raw_response.status_code in OVERLOAD_STATUS_CODES
             if raw_response.status_code == 404:
                 raise not_found_raise_exc(raw_response.reason)
             if raw_response.status_code not in expected_status:
-                raise FusekiClientResponseError(raw_response.reason)
-        except requests.exceptions.ConnectionError as exc:
+                raise FusekiClientResponseError(
+                    raw_response.reason, status_code=raw_response.status_code)
+            if limiter is not None and kwargs.get('stream'):
+                _release_on_close(raw_response, limiter, started)
+                is_released = True
+        except (requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout) as exc:
+            overloaded = True
             raise FusekiClientError(str(exc))
+        finally:
+            if limiter is not None and not is_released:
+                limiter.release(started, overloaded=overloaded)
         return raw_response
 
-    def _post(self, uri, *, use_auth=True, expected_status=(200,), **kwargs):
+    def _decode_async(self, content):
+        """Decode a JSON body, in decoder's executor if large enough.
+
+        :param bytes content: JSON body.
+        :returns Future: Future of decoded JSON content, failing with
+            `FusekiClientResponseError` when content is not valid JSON.
+        """
+        result = Future()
+
+        def done(future):
+            try:
+                result.set_result(future.result())
+            except ValueError as exc:
+                result.set_exception(FusekiClientResponseError(
+                    'Invalid JSON response: {}'.format(exc)))
+            except Exception as exc:
+                result.set_exception(exc)
+
+        self.json_decoder.decode_async(content).add_done_callback(done)
+        return result
+
+    def _json_async(self, response):
+        """Decode a JSON response, in decoder's executor if large enough.
+
+        :param requests.Response response: The HTTP response.
+        :returns Future: Future of decoded JSON content, see `_decode_async`.
+        """
+        return self._decode_async(response.content)
+
+    def _json(self, response):
+        """Decode a JSON response.
+
+        :param requests.Response response: The HTTP response.
+        :returns: Decoded JSON content.
+        :raises FusekiClientResponseError: When content is not valid JSON.
+        """
+        return self._json_async(response).result()
+
+    def _get(self, uri, **kwargs):
+        """Execute a GET request.
+
+        See `_request` for parameters.
+        """
+        return self._request('GET', uri, **kwargs)
+
+    def _post(self, uri, **kwargs):
         """Execute a POST request.
 
-        :param str uri: Request's URI to send.
-        :param bool use_auth: If True, use BASIC authentication (default True).
-        :param tuple(int) expected_status:
-            Expected response status codes (default 200).
-        :returns requests.Response:
-            The HTTP response received after sending request.
-        :raises FusekiClientError:
-        :raises FusekiClientResponseError:
-        :raises DatasetNotFoundError:
+        See `_request` for parameters.
         """
-        # prepare request authentication params
-        auth_data = self._auth_data if use_auth else None
-        try:
-            # send request
-            raw_response = requests.post(uri, auth=auth_data, **kwargs)
-            if raw_response.status_code == 404:
-                raise DatasetNotFoundError(raw_response.reason)
-            if raw_response.status_code not in expected_status:
-                raise FusekiClientResponseError(raw_response.reason)
-        except requests.exceptions.ConnectionError as exc:
-            raise FusekiClientError(str(exc))
-        return raw_response
+        return self._request('POST', uri, **kwargs)
 
-    def _delete(self, uri, *, use_auth=True, expected_status=(200,), **kwargs):
-        """Execute a delete request.
+    def _put(self, uri, **kwargs):
+        """Execute a PUT request.
 
-        :param str uri: Request's URI to send.
-        :param bool use_auth: If True, use BASIC authentication (default True).
-        :param tuple(int) expected_status:
-            Expected response status codes (default 200).
-        :returns requests.Response:
-            The HTTP response received after sending request.
-        :raises FusekiClientError:
-        :raises FusekiClientResponseError:
-        :raises DatasetNotFoundError:
+        See `_request` for parameters.
         """
-        # prepare request authentication params
-        auth_data = self._auth_data if use_auth else None
-        try:
-            # send request
-            raw_response = requests.delete(uri, auth=auth_data, **kwargs)
-            if raw_response.status_code == 404:
-                raise DatasetNotFoundError(raw_response.reason)
-            if raw_response.status_code not in expected_status:
-                raise FusekiClientResponseError(raw_response.reason)
-        except requests.exceptions.ConnectionError as exc:
-            raise FusekiClientError(str(exc))
-        return raw_response
+        return self._request('PUT', uri, **kwargs)
+
+    def _delete(self, uri, **kwargs):
+        """Execute a DELETE request.
+
+        See `_request` for parameters.
+        """
+        return self._request('DELETE', uri, **kwargs)
@@ -1,7 +1,13 @@
 """Jena/Fuseki data API client to manage data."""
 
 from .base import FusekiBaseClient
-from ..utils import build_http_file_obj
+from ..chunked_delete import (
+    build_pattern, delete_in_chunks, DEFAULT_DELETE_CHUNK_SIZE)
+from ..formats import (
+    detect_mime_type, decompress_source, transcode as transcode_source,
+    LINE_BASED_MIME_TYPES)
+from ..ingest import BulkLoader
+from ..multipart import MultipartEncoder
 
 
 class FusekiDataClient(FusekiBaseClient):
@@ -18,32 +24,144 @@ class FusekiDataClient(FusekiBaseClient):
             uri = '{}/{}'.format(uri, service_name)
         return uri
 
-    def drop_all(self, ds_name):
+    def _select(self, ds_name, query, *, query_service='sparql'):
+        uri = self._build_uri(ds_name, service_name=query_service)
+        response = self._get(uri, params={'query': query})
+        return self._json(response)['results']['bindings']
+
+    def _update(self, ds_name, query, *, update_service='update'):
+        uri = self._build_uri(ds_name, service_name=update_service)
+        self._post(uri, data={'update': query}, expected_status=(200, 204,))
+
+    def get_graph_names(self, ds_name, *, query_service='sparql'):
+        """Get the names of a dataset's named graphs.
+
+        :param str ds_name: Dataset's name.
+        :param str query_service: Query service name. (default 'sparql')
+        :returns list[str]: Named graphs IRIs.
+        """
+        uri = self._build_uri(ds_name, service_name=query_service)
+        response = self._get(uri, params={
+            'query': 'SELECT DISTINCT ?g WHERE { GRAPH ?g { } }'})
+        return [
+            binding['g']['value']
+            for binding in self._json(response)['results']['bindings']]
+
+    def delete_matching(self, ds_name, sbj=None, pred=None, obj=None, *,
+                        graph=None, chunk_size=DEFAULT_DELETE_CHUNK_SIZE,
+                        pause=0., query_service='sparql',
+                        update_service='update'):
+        """Delete triples matching a pattern by batches, each batch being
+        deleted by its own update (and write transaction).
+
+        :param str ds_name: Dataset's name.
+        :param str sbj: Subject (formatted for SPARQL: '<IRI>', literal...),
+            None for any.
+        :param str pred: Predicate, None for any.
+        :param str obj: Object, None for any.
+        :param str graph: Named graph's IRI, None for the default graph.
+        :param int chunk_size: Maximum number of triples deleted per update.
+        :param float pause: Pause (seconds) between updates. (default 0)
+        :param str query_service: Query service name. (default 'sparql')
+        :param str update_service: Update service name. (default 'update')
+        :returns int: Number of update requests sent.
+        """
+        return delete_in_chunks(
+            lambda query: self._select(
+                ds_name, query, query_service=query_service),
+            lambda query: self._update(
+                ds_name, query, update_service=update_service),
+            build_pattern(sbj, pred, obj), graph=graph,
+            chunk_size=chunk_size, pause=pause)
+
+    def drop_all(self, ds_name, *, chunk_size=None, pause=0.,
+                 query_service='sparql', update_service='update'):
         """Remove all data on dataset by sending a 'DROP ALL' update query.
 
+        With a 'chunk_size', named graphs then the default graph are emptied
+        by batches of triples instead (see `delete_matching`), so readers are
+        not blocked by a single large write transaction.
+
         :param str ds_name: Dataset's name.
+        :param int chunk_size: Maximum number of triples deleted per update,
+            None to send a single 'DROP ALL'. (default None)
+        :param float pause: Pause (seconds) between chunked updates.
+        :param str query_service: Query service name. (default 'sparql')
+        :param str update_service: Update service name. (default 'update')
         :returns bool: True if all data is removed without errors.
         """
-        uri = self._build_uri(ds_name, service_name='update')
-        query_params = {'update': 'DROP ALL'}
-        self._post(uri, data=query_params, expected_status=(200, 204,))
+        if chunk_size is None:
+            self._update(ds_name, 'DROP ALL', update_service=update_service)
+            return True
+        graphs = self.get_graph_names(ds_name, query_service=query_service)
+        for graph in graphs + [None]:
+            self.delete_matching(
+                ds_name, graph=graph, chunk_size=chunk_size, pause=pause,
+                query_service=query_service, update_service=update_service)
         return True
 
-    def upload_files(self, ds_name, sources, src_mime_type=None):
+    def upload_files(self, ds_name, sources, src_mime_type=None, *,
+                     transcode=False):
         """Restore a list of data files to a dataset.
 
+        The request body is streamed: sources are read chunk by chunk while
+        being sent, so memory usage does not depend on upload size.
+
         :param str ds_name: Dataset's name.
-        :param list[Path] sources: List of file's path to send.
+        :param list sources:
+            List of sources to send: file paths, binary file-like objects,
+            bytes-like objects (bytes, memoryview, mmap...) or iterables of
+            bytes chunks. Gzip-compressed bytes-like objects and streams are
+            decompressed while being sent.
+        :param str src_mime_type: MIME type of all sources, None to detect
+            each source's format from its file extension or content
+            (defaults to 'application/rdf+xml').
+        :param bool transcode: Transcode sources which are not N-Triples or
+            N-Quads to these formats before upload, which are faster to parse
+            by the server (requires rdflib). (default False)
         :returns dict: Details on data inserted, JSON format.
         :raises InvalidFileError:
         """
         uri = self._build_uri(ds_name, service_name='data')
-        src_mime_type = 'application/rdf+xml' \
-            if src_mime_type is None else src_mime_type
-
-        # build files parameter
-        files = [
-            ('file', build_http_file_obj(src, src_mime_type))
-            for src in sources]
-        response = self._post(uri, files=files)
-        return response.json()
+        fields = []
+        for src in sources:
+            mime_type = src_mime_type or detect_mime_type(src)
+            fields.append(('file', decompress_source(src), mime_type))
+
+        transcoded = []
+        try:
+            if transcode:
+                for idx, (name, src, mime_type) in enumerate(fields):
+                    if mime_type not in LINE_BASED_MIME_TYPES:
+                        path, mime_type = transcode_source(src, mime_type)
+                        transcoded.append(path)
+                        fields[idx] = (name, path, mime_type)
+
+            # build streamed multipart body
+            encoder = MultipartEncoder(fields)
+            with encoder:
+                response = self._post(
+                    uri, data=encoder, headers=encoder.headers)
+        finally:
+            for path in transcoded:
+                path.unlink()
+        return self._json(response)
+
+    def bulk_load(self, ds_name, sources, src_mime_type=None, **kwargs):
+        """Upload large line-based RDF files (N-Triples, N-Quads, optionally
+        gzip-compressed) in chunks of whole statements, sent concurrently.
+
+        :param str ds_name: Dataset's name.
+        :param list sources: List of file paths or binary streams.
+        :param str src_mime_type:
+            MIME type of data, guessed from file extension if None.
+        :param kwargs: BulkLoader parameters ('chunk_size', 'workers',
+            'progress_callback', 'checkpoint_path' to make load resumable,
+            'blank_nodes' to skolemize or keep blank nodes, refused by
+            default as they can not span chunks).
+        :returns IngestProgress: Final progress of the ingestion.
+        :raises InvalidFileError:
+        :raises IngestError:
+        """
+        loader = BulkLoader(self, ds_name, **kwargs)
+        return loader.load(sources, src_mime_type)
@@ -0,0 +1,174 @@
+"""Jena/Fuseki fleet management: run admin operations on many servers."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from .admin import FusekiAdminClient
+
+
+class FusekiFleet():
+    """Admin clients of many Fuseki servers, queried concurrently.
+
+    Each operation is run on all servers at once, so a fleet-wide sweep takes
+    about the time of the slowest server, bounded by 'timeout'.
+    """
+
+    def __init__(self, servers, *, timeout=10., workers=None,
+                 **client_kwargs):
+        """
+        :param list servers: Servers, as `FusekiAdminClient` instances or as
+            dicts of `FusekiAdminClient` parameters ('host', 'port'...),
+            optionally with a 'name' key.
+        :param float timeout: Maximum duration (seconds) of an operation on a
+            server, also used as requests timeout of clients built from dicts.
+            (default 10)
+        :param int workers: Maximum number of concurrent operations.
+            (default one per server)
+        :param client_kwargs: Parameters shared by clients built from dicts
+            ('user', 'pwd'...).
+        """
+        self.timeout = timeout
+        self.clients = {}
+        for server in servers:
+            if isinstance(server, FusekiAdminClient):
+                name, client = None, server
+            else:
+                server = dict(server)
+                name = server.pop('name', None)
+                kwargs = dict(client_kwargs, timeout=timeout)
+                kwargs.update(server)
+                client = FusekiAdminClient(**kwargs)
+            if name is None:
+                name = '{}:{}'.format(client.host, client.port)
+            if name in self.clients:
+                raise ValueError('Duplicate server name: {}'.format(name))
+            self.clients[name] = client
+        self.workers = workers or max(len(self.clients), 1)
+
+    def __repr__(self):
+        return (
+            '<{self.__class__.__name__}>('
+            'servers={servers}'
+            ', timeout={self.timeout}'
+            ')'.format(self=self, servers=list(self.clients)))
+
+    def run(self, operation, *args, **kwargs):
+        """Run an operation on all servers concurrently.
+
+        :param str|callable operation: `FusekiAdminClient` method name, or
+            function called with a client as first argument.
+        :param args: Operation's positional arguments.
+        :param kwargs: Operation's keyword arguments.
+        :returns dict: Reports by server name, with 'status' ('done',
+            'failed' or 'timeout'), 'result', 'error' and 'duration'
+            (seconds).
+        """
+        def call(client):
+            func = (
+                getattr(client, operation) if isinstance(operation, str)
+                else lambda *a, **kw: operation(client, *a, **kw))
+            started = time.monotonic()
+            try:
+                report = {
+                    'status': 'done', 'result': func(*args, **kwargs),
+                    'error': None}
+            except Exception as exc:
+                report = {'status': 'failed', 'result': None, 'error': exc}
+            report['duration'] = time.monotonic() - started
+            return report
+
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            futures = {
+                name: executor.submit(call, client)
+                for name, client in self.clients.items()}
+            wait(futures.values(), timeout=self.timeout)
+        finally:
+            # do not wait for servers over timeout
+            executor.shutdown(wait=False)
+
+        reports = {}
+        for name, future in futures.items():
+            if future.done():
+                reports[name] = future.result()
+            else:
+                future.cancel()
+                reports[name] = {
+                    'status': 'timeout', 'result': None,
+                    'error': TimeoutError(
+                        'Operation timed out after {}s'.format(
+                            self.timeout)),
+                    'duration': self.timeout}
+        return reports
+
+    @staticmethod
+    def results(reports):
+        """Get results of successful operations.
+
+        :param dict reports: Reports by server name, see `run`.
+        :returns dict: Results by server name.
+        """
+        return {
+            name: report['result'] for name, report in reports.items()
+            if report['status'] == 'done'}
+
+    @staticmethod
+    def errors(reports):
+        """Get errors of failed (or timed out) operations.
+
+        :param dict reports: Reports by server name, see `run`.
+        :returns dict: Errors by server name.
+        """
+        return {
+            name: report['error'] for name, report in reports.items()
+            if report['status'] != 'done'}
+
+    def ping(self):
+        """Ping all servers. See `run` for returned reports."""
+        return self.run('ping')
+
+    def server_info(self):
+        """Get all servers details. See `run` for returned reports."""
+        return self.run('server_info')
+
+    def get_all_stats(self):
+        """Get all servers statistics. See `run` for returned reports."""
+        return self.run('get_all_stats')
+
+    def get_all_tasks(self):
+        """Get all servers tasks. See `run` for returned reports."""
+        return self.run('get_all_tasks')
+
+    def health(self):
+        """Check all servers health, with a single ping sweep.
+
+        :returns dict: 'up' and 'down' servers names lists, and ping
+            'latency' (seconds) by up server name.
+        """
+        reports = self.ping()
+        up = sorted(self.results(reports))
+        return {
+            'up': up,
+            'down': sorted(self.errors(reports)),
+            'latency': {name: reports[name]['duration'] for name in up},
+        }
+
+    def aggregate_stats(self):
+        """Sum requests counters of all servers' datasets.
+
+        :returns dict: Summed 'Requests', 'RequestsGood' and 'RequestsBad'
+            counters, number of 'datasets' and of reporting 'servers', and
+            'errors' by server name.
+        """
+        reports = self.get_all_stats()
+        totals = {
+            'Requests': 0, 'RequestsGood': 0, 'RequestsBad': 0,
+            'datasets': 0, 'servers': 0}
+        for stats in self.results(reports).values():
+            totals['servers'] += 1
+            for ds_stats in stats.get('datasets', {}).values():
+                totals['datasets'] += 1
+                for counter in ('Requests', 'RequestsGood', 'RequestsBad'):
+                    totals[counter] += ds_stats.get(counter, 0)
+        totals['errors'] = self.errors(reports)
+        return totals
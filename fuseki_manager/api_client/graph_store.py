@@ -0,0 +1,151 @@
+"""Jena/Fuseki Graph Store Protocol API client to manage graphs."""
+
+import zlib
+
+from .base import FusekiBaseClient
+from ..utils import open_source, open_sink, DEFAULT_CHUNK_SIZE
+from ..exceptions import GraphNotFoundError
+
+
+class FusekiGraphStoreClient(FusekiBaseClient):
+    """Fuseki 'Graph Store Protocol' API client (graph store service).
+
+    Graphs are streamed in chunks in both directions, so whole graphs are
+    never loaded in memory.
+    """
+
+    def _build_uri(self, ds_name, *, service_name='data'):
+        """Build service URI.
+
+        :param str ds_name: Dataset's name used in URI.
+        :param str service_name: Graph store service name, None for the
+            dataset itself (quads service). (default 'data')
+        :returns str: Service's absolute URI.
+        """
+        uri = '{}{}'.format(self._base_uri, ds_name)
+        if service_name is not None:
+            uri = '{}/{}'.format(uri, service_name)
+        return uri
+
+    @staticmethod
+    def _graph_params(graph):
+        """Build query parameters targeting a graph.
+
+        :param str graph: Named graph's IRI, None for the default graph.
+        :returns dict: Query parameters.
+        """
+        if graph is None:
+            return {'default': ''}
+        return {'graph': graph}
+
+    def _download(self, uri, params, dest, mime_type, compress, chunk_size):
+        response = self._get(
+            uri, params=params, headers={'Accept': mime_type}, stream=True,
+            not_found_raise_exc=GraphNotFoundError)
+        # 31: gzip container, maximum window size
+        compressor = zlib.compressobj(wbits=31) if compress else None
+        size = 0
+        try:
+            with open_sink(dest) as fobj:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if compressor is not None:
+                        chunk = compressor.compress(chunk)
+                    fobj.write(chunk)
+                    size += len(chunk)
+                if compressor is not None:
+                    chunk = compressor.flush()
+                    fobj.write(chunk)
+                    size += len(chunk)
+        finally:
+            response.close()
+        return size
+
+    def get_graph(self, ds_name, dest, *, graph=None,
+                  mime_type='application/n-triples', compress=False,
+                  chunk_size=DEFAULT_CHUNK_SIZE):
+        """Download a graph and write it, chunk by chunk, to a file.
+
+        :param str ds_name: Dataset's name.
+        :param str|Path|file-like dest: Destination path or binary stream.
+        :param str graph: Named graph's IRI, None for the default graph.
+        :param str mime_type: RDF format requested to the server.
+        :param bool compress:
+            Gzip-compress data on the fly while writing. (default False)
+        :param int chunk_size: Size of chunks read from response (bytes).
+        :returns int: Number of bytes written.
+        :raises GraphNotFoundError:
+        """
+        return self._download(
+            self._build_uri(ds_name), self._graph_params(graph), dest,
+            mime_type, compress, chunk_size)
+
+    def get_dataset(self, ds_name, dest, *, mime_type='application/n-quads',
+                    compress=False, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Download all graphs of a dataset and write them, chunk by chunk, to
+        a file.
+
+        Parameters are the same as `get_graph`, except 'graph'.
+
+        :returns int: Number of bytes written.
+        """
+        return self._download(
+            self._build_uri(ds_name, service_name=None), None, dest,
+            mime_type, compress, chunk_size)
+
+    def _send_graph(self, method, ds_name, source, graph, mime_type,
+                    content_encoding):
+        uri = self._build_uri(ds_name)
+        headers = {'Content-Type': mime_type}
+        if content_encoding is not None:
+            headers['Content-Encoding'] = content_encoding
+        with open_source(source) as data:
+            response = self._request(
+                method, uri, params=self._graph_params(graph),
+                headers=headers, data=data,
+                expected_status=(200, 201, 204,))
+        return self._json(response) if response.content else {}
+
+    def put_graph(self, ds_name, source, *, graph=None,
+                  mime_type='application/n-triples', content_encoding=None):
+        """Replace a graph's content by streaming data from a source.
+
+        :param str ds_name: Dataset's name.
+        :param str|Path|file-like|bytes|iterable source:
+            Data source: file path, binary stream, bytes or iterable of bytes
+            chunks.
+        :param str graph: Named graph's IRI, None for the default graph.
+        :param str mime_type: RDF format of the data sent.
+        :param str content_encoding:
+            Encoding of the data sent, e.g. 'gzip'. (default None)
+        :returns dict: Details on data inserted, JSON format.
+        :raises InvalidFileError:
+        """
+        return self._send_graph(
+            'PUT', ds_name, source, graph, mime_type, content_encoding)
+
+    def post_graph(self, ds_name, source, *, graph=None,
+                   mime_type='application/n-triples', content_encoding=None):
+        """Append data to a graph by streaming it from a source.
+
+        Parameters are the same as `put_graph`.
+
+        :returns dict: Details on data inserted, JSON format.
+        :raises InvalidFileError:
+        """
+        return self._send_graph(
+            'POST', ds_name, source, graph, mime_type, content_encoding)
+
+    def delete_graph(self, ds_name, *, graph=None):
+        """Delete a graph (or clear the default graph).
+
+        :param str ds_name: Dataset's name.
+        :param str graph: Named graph's IRI, None for the default graph.
+        :returns bool: True if deleted without errors.
+        :raises GraphNotFoundError:
+        """
+        uri = self._build_uri(ds_name)
+        self._delete(
+            uri, params=self._graph_params(graph),
+            expected_status=(200, 204,),
+            not_found_raise_exc=GraphNotFoundError)
+        return True
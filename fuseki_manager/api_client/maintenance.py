@@ -0,0 +1,209 @@
+"""Jena/Fuseki TDB2 datasets maintenance: scheduled compaction."""
+
+import threading
+import time
+from pathlib import Path
+
+from ..query_cache import count_write_requests
+from ..exceptions import FusekiClientError, FusekiClientResponseError
+
+
+class CompactionScheduler():
+    """Compact TDB2 datasets when they reach size or updates thresholds.
+
+    Datasets are checked against thresholds:
+
+    - 'max_size': dataset's files total size, read from the server's
+      databases directory when locally reachable ('databases_dir'),
+    - 'max_updates': number of write requests since last compaction (or
+      since server start), taken from server's statistics.
+
+    Candidates are compacted one at a time, to limit server disk I/O, each
+    compaction task being tracked by the admin client's task waiter.
+
+    Only TDB2 datasets can be compacted. As the server does not report
+    datasets types, they are told from their storage layout ('Data-NNNN'
+    directories) when 'databases_dir' is known; otherwise datasets whose
+    compaction is rejected by the server are no longer candidates.
+    """
+
+    def __init__(self, admin_client, *, max_size=None, max_updates=None,
+                 databases_dir=None, delete_old=True, timeout=None):
+        """
+        :param FusekiAdminClient admin_client: Client used for compactions.
+        :param int max_size: Size (bytes) triggering a compaction, None to
+            ignore size. Requires 'databases_dir'.
+        :param int max_updates: Number of write requests triggering a
+            compaction, None to ignore updates.
+        :param str|Path databases_dir: Server's databases directory, when
+            locally reachable. (default None)
+        :param bool delete_old: Delete old database storage after
+            compaction. (default True)
+        :param float timeout:
+            Maximum duration of a dataset compaction (seconds).
+            (default None)
+        """
+        if max_size is not None and databases_dir is None:
+            raise ValueError('max_size requires databases_dir')
+        self._client = admin_client
+        self.max_size = max_size
+        self.max_updates = max_updates
+        self.databases_dir = (
+            Path(databases_dir) if databases_dir is not None else None)
+        self.delete_old = delete_old
+        self.timeout = timeout
+        # write requests counters at last compaction, by dataset name
+        self._baselines = {}
+        # datasets whose compaction was rejected by the server
+        self._not_tdb2 = set()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __repr__(self):
+        return (
+            '<{self.__class__.__name__}>('
+            'max_size={self.max_size}'
+            ', max_updates={self.max_updates}'
+            ')'.format(self=self))
+
+    def dataset_size(self, ds_name):
+        """Get dataset's files total size.
+
+        :param str ds_name: Dataset's name.
+        :returns int: Size (bytes), None if databases directory is unknown.
+        """
+        if self.databases_dir is None:
+            return None
+        ds_dir = self.databases_dir / ds_name
+        if not ds_dir.is_dir():
+            return None
+        return sum(
+            path.stat().st_size for path in ds_dir.glob('**/*')
+            if path.is_file())
+
+    def is_tdb2(self, ds_name):
+        """Check whether a dataset is a TDB2 dataset.
+
+        :param str ds_name: Dataset's name.
+        :returns bool: None if unknown (databases directory is unknown and
+            dataset's compaction was never rejected).
+        """
+        if ds_name in self._not_tdb2:
+            return False
+        if self.databases_dir is None:
+            return None
+        ds_dir = self.databases_dir / ds_name
+        return ds_dir.is_dir() and any(
+            path.is_dir() for path in ds_dir.glob('Data-*'))
+
+    def _updates(self, ds_name, ds_stats):
+        writes = count_write_requests(ds_stats)
+        baseline = self._baselines.get(ds_name, 0)
+        # counters are reset on server restart
+        if writes < baseline:
+            self._baselines[ds_name] = baseline = 0
+        return writes - baseline
+
+    def check(self, ds_names=None):
+        """Find TDB2 datasets to compact.
+
+        :param list[str] ds_names:
+            Names of datasets to check, None for all server's datasets.
+        :returns list[dict]: Candidates, largest first, with 'ds_name',
+            'size' (bytes, if known), 'updates' (since last compaction) and
+            'reasons' ('size', 'updates').
+        """
+        all_stats = self._client.get_all_stats().get('datasets', {})
+        if ds_names is None:
+            ds_names = [name.lstrip('/') for name in all_stats]
+        candidates = []
+        for ds_name in ds_names:
+            if self.is_tdb2(ds_name) is False:
+                continue
+            ds_stats = all_stats.get('/{}'.format(ds_name), {})
+            updates = self._updates(ds_name, ds_stats)
+            size = self.dataset_size(ds_name)
+            reasons = []
+            if self.max_size is not None and (size or 0) >= self.max_size:
+                reasons.append('size')
+            if self.max_updates is not None and updates >= self.max_updates:
+                reasons.append('updates')
+            if reasons:
+                candidates.append({
+                    'ds_name': ds_name, 'size': size, 'updates': updates,
+                    'reasons': reasons})
+        return sorted(
+            candidates, key=lambda c: (c['size'] or 0, c['updates']),
+            reverse=True)
+
+    def _compact(self, candidate):
+        ds_name = candidate['ds_name']
+        report = {
+            'ds_name': ds_name, 'status': 'failed', 'task_id': None,
+            'reasons': candidate['reasons'], 'duration': None,
+            'size_before': candidate['size'], 'size_after': None,
+            'error': None}
+        started = time.monotonic()
+        try:
+            task = self._client.compact_dataset(
+                ds_name, delete_old=self.delete_old)
+            report['task_id'] = task['taskId']
+            self._client.wait_for_task(task['taskId']).result(self.timeout)
+            report['status'] = 'done'
+            report['size_after'] = self.dataset_size(ds_name)
+            ds_stats = self._client.get_stats(ds_name)
+            ds_stats = ds_stats.get('datasets', ds_stats).get(
+                '/{}'.format(ds_name), {})
+            self._baselines[ds_name] = count_write_requests(ds_stats)
+        except FusekiClientResponseError as exc:
+            # compaction request rejected: not a TDB2 dataset
+            if report['task_id'] is None and exc.status_code == 400:
+                self._not_tdb2.add(ds_name)
+            report['error'] = exc
+        except Exception as exc:
+            report['error'] = exc
+        report['duration'] = time.monotonic() - started
+        return report
+
+    def run(self, ds_names=None):
+        """Check datasets and compact candidates, one at a time.
+
+        :param list[str] ds_names:
+            Names of datasets to check, None for all server's datasets.
+        :returns list[dict]: Reports of compacted datasets, with 'ds_name',
+            'status' ('done' or 'failed'), 'task_id', 'reasons', 'duration'
+            (seconds), 'size_before', 'size_after' (bytes, if known) and
+            'error'.
+        """
+        return [
+            self._compact(candidate) for candidate in self.check(ds_names)]
+
+    def _run(self, interval, ds_names):
+        while not self._stop.wait(interval):
+            try:
+                self.run(ds_names)
+            except FusekiClientError:
+                pass
+
+    def start(self, interval=3600., ds_names=None):
+        """Check and compact datasets periodically, in a background thread.
+
+        :param float interval: Time between checks (seconds). (default 3600)
+        :param list[str] ds_names:
+            Names of datasets to check, None for all server's datasets.
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(interval, ds_names),
+            name='fuseki-compaction-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop periodic compactions (after the current one, if any)."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
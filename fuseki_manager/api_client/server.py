@@ -0,0 +1,129 @@
+"""Jena/Fuseki server-bound factory of lightweight per-dataset clients."""
+
+import copy
+
+import requests
+
+from .admin import FusekiAdminClient
+from .sparql import FusekiSPARQLClient
+
+
+# View options, by 'dataset' parameter name: SPARQL client attribute name.
+_VIEW_OPTIONS = {
+    'query_service': '_query_service',
+    'update_service': '_update_service',
+    'namespaces': '_namespaces',
+    'converters': 'converters',
+    'query_cache': 'query_cache',
+    'recorder': 'recorder',
+}
+
+
+# `FusekiSPARQLClient` parameters not given to the admin client.
+_SPARQL_OPTIONS = (
+    'query_service', 'update_service', 'namespaces', 'converters',
+    'query_cache', 'recorder',)
+
+
+class FusekiServer():
+    """Clients factory bound to a Fuseki server.
+
+    Connection pool, authentication, configuration and internal clients
+    (admin, data, graph store) are built once and shared by all dataset
+    clients. A dataset client is a shallow copy of a template client: getting
+    one is cheap, and neither memory nor sockets grow with the number of
+    datasets used (e.g. one dataset per tenant).
+
+    Dataset clients also share server's converters registry: give a dataset
+    client its own registry ('converters' option) before registering
+    converters specific to it.
+
+    Options specific to the admin client (e.g. 'cache_ttl', caching server
+    and datasets metadata) are given apart, in 'admin_options'.
+    """
+
+    def __init__(self, *, pool_size=10, admin_options=None, **kwargs):
+        """
+        :param int pool_size: Maximum number of connections kept open to the
+            server. (default 10)
+        :param dict admin_options: `FusekiAdminClient` specific parameters
+            ('cache_ttl'), only given to the shared admin client.
+        :param kwargs: `FusekiSPARQLClient` parameters ('host', 'port',
+            'user', 'pwd', 'timeout', 'namespaces'...), shared by all
+            dataset clients.
+        """
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        kwargs.setdefault('session', self.session)
+        admin_kwargs = {
+            name: value for name, value in kwargs.items()
+            if name not in _SPARQL_OPTIONS}
+        admin_kwargs.update(admin_options or {})
+        self._admin = FusekiAdminClient(**admin_kwargs)
+        kwargs.pop('cache_ttl', None)
+        kwargs['json_decoder'] = self._admin.json_decoder
+        self._template = FusekiSPARQLClient(
+            None, admin_client=self._admin, **kwargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return (
+            '<{self.__class__.__name__}>('
+            'host="{self.host}"'
+            ', port={self.port}'
+            ', pool_size={self.pool_size}'
+            ')'.format(self=self))
+
+    @property
+    def host(self):
+        return self._template.host
+
+    @property
+    def port(self):
+        return self._template.port
+
+    @property
+    def admin(self):
+        """Shared admin client (`FusekiAdminClient`)."""
+        return self._admin
+
+    @property
+    def data(self):
+        """Shared data client (`FusekiDataClient`)."""
+        return self._template._service_data
+
+    @property
+    def graph_store(self):
+        """Shared graph store client (`FusekiGraphStoreClient`)."""
+        return self._template._service_graph_store
+
+    def dataset(self, ds_name, **options):
+        """Get a SPARQL client of a dataset, sharing server's connections.
+
+        :param str ds_name: Dataset's name.
+        :param options: Options overriding server's ones for this client:
+            'query_service', 'update_service', 'namespaces', 'converters',
+            'query_cache' and 'recorder'.
+        :returns FusekiSPARQLClient: Dataset client.
+        :raises TypeError: When an option is not a per-dataset option.
+        """
+        client = copy.copy(self._template)
+        client._ds_name = ds_name
+        for name, value in options.items():
+            if name not in _VIEW_OPTIONS:
+                raise TypeError('Invalid dataset option: {}'.format(name))
+            setattr(client, _VIEW_OPTIONS[name], value)
+        return client
+
+    def close(self):
+        """Close pooled connections."""
+        self.session.close()
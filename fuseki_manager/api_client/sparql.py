@@ -1,8 +1,21 @@
-from ..utils import is_url, parse_url
+from ..rdf import iter_statements
+from ..utils import is_url, parse_url, open_sink, DEFAULT_CHUNK_SIZE
 from ..exceptions import EmptyDBError, UniquenessDBError, ArgumentError
 
+from ..chunked_delete import (
+    build_pattern, delete_in_chunks, DEFAULT_DELETE_CHUNK_SIZE)
+from ..converters import TypedResults, ConverterRegistry
+from ..loader import ValueLoader
+from ..query_cache import data_version
+from ..columnar import tsv_to_arrow, TSV_MIME_TYPE
+from ..sync import GraphDiff, DEFAULT_RUN_SIZE
+from ..traversal import traverse
+from ..write_buffer import WriteBuffer
+
+from .admin import FusekiAdminClient
 from .base import FusekiBaseClient
 from .data import FusekiDataClient
+from .graph_store import FusekiGraphStoreClient
 
 
 class FusekiSPARQLClient(FusekiBaseClient):
@@ -14,20 +27,46 @@ class FusekiSPARQLClient(FusekiBaseClient):
     :param update_service: string - name of service to use for updating data
     :param namespaces: dict - namespaces used as PREFIX for queries.
     Ex PREFIX key: <value>
+    :param converters: ConverterRegistry - converters used by typed queries
+    (default None, a registry of built-in converters owned by the client)
+    :param query_cache: QueryCache - persistent cache of query results,
+    invalidated by dataset's writes (default None)
+    :param recorder: QueryRecorder - log of sent queries and updates, to be
+    replayed for load testing (default None)
+    :param cache_ttl: float - time-to-live (seconds) of admin metadata
+    cached by the internal admin client (default 0)
+    :param admin_client: FusekiAdminClient - admin client used by the query
+    cache, e.g. shared by many clients (default None, an internal admin
+    client built on first use; 'cache_ttl' is ignored when given)
     """
 
     def __init__(self, ds_name, *,
                  query_service='sparql', update_service='update',
-                 namespaces={},
-                 **kwargs):
+                 namespaces={}, converters=None,
+                 query_cache=None, recorder=None, cache_ttl=0,
+                 admin_client=None, **kwargs):
 
         super().__init__(**kwargs)
         self._service_data = FusekiDataClient(**kwargs)
+        self._service_graph_store = FusekiGraphStoreClient(**kwargs)
+        # admin client is only needed by query cache: built on first use
+        self._admin_kwargs = dict(kwargs, cache_ttl=cache_ttl)
+        self._admin = admin_client
 
         self._ds_name = ds_name
         self._namespaces = namespaces
         self._query_service = query_service
         self._update_service = update_service
+        self.converters = (
+            ConverterRegistry() if converters is None else converters)
+        self.query_cache = query_cache
+        self.recorder = recorder
+
+    @property
+    def _service_admin(self):
+        if self._admin is None:
+            self._admin = FusekiAdminClient(**self._admin_kwargs)
+        return self._admin
 
     def _build_uri(self, service):
         """Build service URI.
@@ -61,39 +100,113 @@ class FusekiSPARQLClient(FusekiBaseClient):
 
         return '{}{}{}'.format(ns_str, query, bind_str)
 
+    def _record(self, kind, prepared_query, **kwargs):
+        if self.recorder is not None:
+            self.recorder.record(
+                kind, self._ds_name, prepared_query, **kwargs)
+
     def update_query(self, query, **kwargs):
         """
         Execute query with 'update_service' endpoint.  Return raw HTTP response
         from Fuseki instance. This method is to use with INSERT queries.
         """
         prepared_query = self._prepare_query(query, **kwargs)
+        self._record('update', prepared_query, method='POST')
         params = {'update': prepared_query}
         uri = self._build_uri(self._update_service)
         return self._post(uri, data=params)
 
-    def _exec_query(self, prepared_query):
+    def write_buffer(self, **kwargs):
+        """Get a write-behind buffer, collecting triple inserts and deletes
+        to send them as grouped updates.
+
+        :param kwargs: WriteBuffer parameters ('max_size', 'max_age',
+            'graph').
+        :returns WriteBuffer: Buffer, to be closed (or used as a context
+            manager) to flush pending operations.
+        """
+        return WriteBuffer(self, **kwargs)
+
+    def _exec_query_async(self, prepared_query, *, use_cache=True,
+                          method='GET'):
+        """Send a query, and decode its JSON results in decoder's executor
+        if large enough.
+
+        :returns Future: Future of decoded JSON results.
+        """
+        self._record('query', prepared_query, method=method)
+        cache = self.query_cache if use_cache else None
+        if cache is not None:
+            version = data_version(self._service_admin, self._ds_name)
+            if version is None:
+                # a write is in progress
+                cache = None
+        if cache is not None:
+            content = cache.get(self._ds_name, prepared_query, version)
+            if content is not None:
+                return self._decode_async(content)
         params = {'query': prepared_query}
         uri = self._build_uri(self._query_service)
-        response = self._get(uri, params=params)
-        return response.json()
+        if method == 'POST':
+            # no URL length limit
+            response = self._post(uri, data=params)
+        else:
+            response = self._get(uri, params=params)
+        results = self._json_async(response)
+        # results may predate a write started while query ran
+        if cache is not None and version == data_version(
+                self._service_admin, self._ds_name):
+
+            def cache_results(future):
+                if future.exception() is None:
+                    cache.set(
+                        self._ds_name, prepared_query, version,
+                        response.content)
+
+            results.add_done_callback(cache_results)
+        return results
 
-    def raw_query(self, query, **kwargs):
+    def _exec_query(self, prepared_query, *, use_cache=True, method='GET'):
+        return self._exec_query_async(
+            prepared_query, use_cache=use_cache, method=method).result()
+
+    def raw_query(self, query, *, use_cache=True, **kwargs):
         """
         Execute query with 'query_service' endpoint. Return raw JSON
         response from Fuseki instance. This method is to use with ASK queries.
+
+        When client has a query cache, results are cached unless 'use_cache'
+        is False.
+        """
+        query = self._prepare_query(query, **kwargs)
+        return self._exec_query(query, use_cache=use_cache)
+
+    def raw_query_async(self, query, *, use_cache=True, **kwargs):
+        """
+        Same as `raw_query`, but decode JSON response in the executor of
+        client's JSON decoder (for large enough responses) instead of
+        blocking calling thread. The request itself is sent in calling
+        thread.
+
+        Return a future of raw JSON response, failing with
+        `FusekiClientResponseError` when response is not valid JSON.
         """
         query = self._prepare_query(query, **kwargs)
-        return self._exec_query(query)
+        return self._exec_query_async(query, use_cache=use_cache)
 
     def query(self, query, *,
-              raise_if_empty=False, raise_if_many=False, **kwargs):
+              raise_if_empty=False, raise_if_many=False, use_cache=True,
+              **kwargs):
         """
         Execute query with 'query_service' endpoint. Apply post-treatment to
         Fuseki JSON response. Check result number and return only results
         bindings. This method is to use with SELECT queries.
+
+        When client has a query cache, results are cached unless 'use_cache'
+        is False.
         """
         query = self._prepare_query(query, **kwargs)
-        jsonres = self._exec_query(query)
+        jsonres = self._exec_query(query, use_cache=use_cache)
 
         results = jsonres['results']['bindings']
         nb_results = len(results)
@@ -111,6 +224,126 @@ class FusekiSPARQLClient(FusekiBaseClient):
                 raise UniquenessDBError
             return results
 
+    def _exec_graph_query(self, prepared_query, mime_type):
+        self._record('query', prepared_query, accept=mime_type)
+        params = {'query': prepared_query}
+        uri = self._build_uri(self._query_service)
+        headers = {'Accept': mime_type}
+        return self._get(uri, params=params, headers=headers, stream=True)
+
+    def _iter_graph_query(self, query, chunk_size, **kwargs):
+        query = self._prepare_query(query, **kwargs)
+        response = self._exec_graph_query(query, 'application/n-triples')
+        try:
+            yield from iter_statements(
+                response.iter_lines(chunk_size=chunk_size))
+        finally:
+            response.close()
+
+    def construct(self, query, *, chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+        """
+        Execute a CONSTRUCT query with 'query_service' endpoint. Results are
+        requested as N-Triples and yielded one triple at a time while the
+        response is read, so memory usage does not depend on result size.
+
+        Terms are returned in N-Triples lexical form (IRIs enclosed in '<>',
+        literals quoted with their language tag or datatype).
+
+        :param str query: CONSTRUCT query.
+        :param int chunk_size: Size of chunks read from response (bytes).
+        :returns generator: Tuples of terms (subject, predicate, object).
+        """
+        return self._iter_graph_query(query, chunk_size, **kwargs)
+
+    def describe(self, query, *, chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+        """
+        Execute a DESCRIBE query with 'query_service' endpoint. Behaves like
+        `construct`.
+
+        :param str query: DESCRIBE query.
+        :param int chunk_size: Size of chunks read from response (bytes).
+        :returns generator: Tuples of terms (subject, predicate, object).
+        """
+        return self._iter_graph_query(query, chunk_size, **kwargs)
+
+    def export_query(self, query, dest, *,
+                     mime_type='application/n-triples',
+                     chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+        """
+        Execute a CONSTRUCT or DESCRIBE query and copy the serialized
+        response, chunk by chunk, to a file.
+
+        :param str query: CONSTRUCT or DESCRIBE query.
+        :param str|Path|file-like dest: Destination path or binary stream.
+        :param str mime_type: RDF format requested to the server.
+        :param int chunk_size: Size of chunks read from response (bytes).
+        :returns int: Number of bytes written.
+        """
+        query = self._prepare_query(query, **kwargs)
+        response = self._exec_graph_query(query, mime_type)
+        size = 0
+        try:
+            with open_sink(dest) as fobj:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    fobj.write(chunk)
+                    size += len(chunk)
+        finally:
+            response.close()
+        return size
+
+    def typed_query(self, query, *, use_cache=True, **kwargs):
+        """
+        Execute query with 'query_service' endpoint. Return a typed,
+        column-oriented view on results: values are converted according to
+        their datatype ('xsd:integer', 'xsd:dateTime'...), column by column,
+        when a column is first accessed. This method is to use with SELECT
+        queries.
+
+        :returns TypedResults:
+        """
+        query = self._prepare_query(query, **kwargs)
+        return TypedResults(
+            self._exec_query(query, use_cache=use_cache), self.converters)
+
+    def query_to_arrow(self, query, *, chunk_size=DEFAULT_CHUNK_SIZE,
+                       **kwargs):
+        """
+        Execute query with 'query_service' endpoint and decode results into
+        an Arrow table. Results are requested as TSV and read line by line
+        into columns: IRI columns are dictionary-encoded, numeric, boolean
+        and date columns are typed, other columns are strings. This method is
+        to use with SELECT queries.
+
+        Requires pyarrow ('arrow' extra).
+
+        :param str query: SELECT query.
+        :param int chunk_size: Size of chunks read from response (bytes).
+        :returns pyarrow.Table: One column per variable.
+        """
+        query = self._prepare_query(query, **kwargs)
+        self._record('query', query, accept=TSV_MIME_TYPE)
+        params = {'query': query}
+        uri = self._build_uri(self._query_service)
+        headers = {'Accept': TSV_MIME_TYPE}
+        response = self._get(uri, params=params, headers=headers, stream=True)
+        try:
+            return tsv_to_arrow(response.iter_lines(chunk_size=chunk_size))
+        finally:
+            response.close()
+
+    def query_to_dataframe(self, query, **kwargs):
+        """
+        Execute query with 'query_service' endpoint and decode results into a
+        pandas data frame (IRI columns are categorical). See
+        `query_to_arrow`.
+
+        Requires pyarrow and pandas ('pandas' extra).
+
+        :param str query: SELECT query.
+        :returns pandas.DataFrame:
+        """
+        return self.query_to_arrow(query, **kwargs).to_pandas()
+
     def _get_values(self, results):
         return [
             {key: val['value'] for key, val in result.items()}
@@ -154,11 +387,89 @@ class FusekiSPARQLClient(FusekiBaseClient):
         msg = "Invalid arguments ({}, {}, {})"
         raise ArgumentError(msg.format(sbj, pred, obj))
 
-    def upload_data(self, files, src_mime_type=None):
+    def traverse(self, start, *, max_depth=1, direction='out',
+                 predicates=None, graph=None, batch_size=500,
+                 page_size=10000, **kwargs):
+        """Explore the neighborhood of nodes, breadth first, a whole
+        frontier at a time: each hop's nodes are bound by batches with a
+        multi-row 'VALUES' block (queries are sent with POST requests).
+
+        Nodes are visited once, and only IRIs are followed.
+
+        :param str|list[str] start: Start node URL(s).
+        :param int max_depth: Maximum number of hops. (default 1)
+        :param str direction: Follow triples from subject to object ('out'),
+            from object to subject ('in') or both. (default 'out')
+        :param list[str] predicates:
+            Predicates (URLs or prefixed names) to follow, None for all.
+        :param str graph: Named graph's IRI, None for the default graph.
+        :param int batch_size: Maximum number of nodes per query.
+            (default 500)
+        :param int page_size: Maximum number of triples per query, results
+            of larger batches being paged. (default 10000)
+        :param kwargs: Query preparation parameters ('namespaces').
+        :returns dict: Subgraph: 'triples' (list of (subject, predicate,
+            object) values), 'depths' (depth of each visited node by URL)
+            and number of 'requests' sent.
+        """
+        if predicates is not None:
+            predicates = [_parse_uri(pred, False) for pred in predicates]
+
+        def select(query):
+            jsonres = self._exec_query(
+                self._prepare_query(query, **kwargs), method='POST')
+            return jsonres['results']['bindings']
+
+        return traverse(
+            select, start, max_depth=max_depth, direction=direction,
+            predicates=predicates, graph=graph, batch_size=batch_size,
+            page_size=page_size)
+
+    def delete_matching(self, sbj=None, pred=None, obj=None, *, graph=None,
+                        chunk_size=DEFAULT_DELETE_CHUNK_SIZE, pause=0.,
+                        **kwargs):
+        """Delete triples matching a pattern by batches, each batch being
+        deleted by its own update, so readers keep being served during large
+        deletes.
+
+        :param str sbj: Subject (URL or prefixed name), None for any.
+        :param str pred: Predicate (URL or prefixed name), None for any.
+        :param str obj: Object (URL, prefixed name or literal), None for any.
+        :param str graph: Named graph's IRI, None for the default graph.
+        :param int chunk_size: Maximum number of triples deleted per update.
+        :param float pause: Pause (seconds) between updates. (default 0)
+        :param kwargs: Query preparation parameters ('namespaces').
+        :returns int: Number of update requests sent.
+        """
+        pattern = build_pattern(*(
+            None if term is None else _parse_uri(term, False)
+            for term in (sbj, pred, obj)))
+
+        def select(query):
+            return self._exec_query(
+                self._prepare_query(query, **kwargs),
+                use_cache=False)['results']['bindings']
+
+        return delete_in_chunks(
+            select, lambda query: self.update_query(query, **kwargs), pattern,
+            graph=graph, chunk_size=chunk_size, pause=pause)
+
+    def value_loader(self, **kwargs):
+        """Get a loader batching `value` and `triples` lookups issued
+        within a short time window into single queries.
+
+        :param kwargs: ValueLoader parameters ('window', 'max_batch_size').
+        :returns ValueLoader: Loader, memoizing lookups (use one loader per
+            unit of work).
+        """
+        return ValueLoader(self, **kwargs)
+
+    def upload_data(self, files, src_mime_type=None, **kwargs):
         """Upload and insert datas by sending a list of files to a dataset.
         (Fuseki data service is involved.)
 
         :param list[] files: List of file's to send.
+        :param kwargs: See `FusekiDataClient.upload_files` ('transcode').
         :returns dict: Details on data inserted, JSON format.
 
         Note: files could be a list of:
@@ -166,9 +477,55 @@ class FusekiSPARQLClient(FusekiBaseClient):
         - file-like object
         """
         return self._service_data.upload_files(
-            self._ds_name, files, src_mime_type
+            self._ds_name, files, src_mime_type, **kwargs
         )
 
+    def bulk_load_data(self, files, src_mime_type=None, **kwargs):
+        """Upload large line-based RDF files in concurrent chunks.
+        (Fuseki data service is involved.)
+
+        See `FusekiDataClient.bulk_load`.
+        """
+        return self._service_data.bulk_load(
+            self._ds_name, files, src_mime_type, **kwargs)
+
+    def diff_graph(self, source, *, graph=None, quads=False,
+                   run_size=DEFAULT_RUN_SIZE):
+        """Compare a local N-Triples (or N-Quads) source with a remote graph
+        (or with the whole dataset).
+
+        The remote side is exported as a stream, and both sides are sorted
+        with bounded memory, so diff size can be checked before deciding
+        between a delta update and a full reload.
+
+        :param str|Path|file-like source: Local N-Triples (or N-Quads) file
+            path (optionally '.gz') or binary stream.
+        :param str graph: Named graph's IRI, None for the default graph.
+        :param bool quads:
+            Compare all dataset's graphs using N-Quads. (default False)
+        :param int run_size: Maximum number of statements sorted in memory.
+        :returns GraphDiff: Differences, to apply (or close) once checked.
+        """
+        diff = GraphDiff(self, graph=graph, quads=quads)
+        try:
+            return diff.compute(source, run_size=run_size)
+        except Exception:
+            diff.close()
+            raise
+
+    def sync_graph(self, source, *, batch_size=1000, **kwargs):
+        """Update a remote graph to match a local source, by sending only the
+        differences as batched 'DELETE DATA' and 'INSERT DATA' updates.
+
+        :param str|Path|file-like source: See `diff_graph`.
+        :param int batch_size: Maximum number of statements per update.
+        :param kwargs: `diff_graph` parameters.
+        :returns GraphDiff: Differences applied.
+        """
+        with self.diff_graph(source, **kwargs) as diff:
+            diff.apply(batch_size=batch_size)
+        return diff
+
 
 def _parse_uri(value, raise_if_not_uri=True):
     if isinstance(value, str):
@@ -0,0 +1,360 @@
+"""Jena/Fuseki server statistics sampling and rates computation."""
+
+import re
+import time
+import threading
+from collections import deque
+
+from ..exceptions import FusekiClientError, DatasetNotFoundError
+
+
+STATS_COUNTERS = ('Requests', 'RequestsGood', 'RequestsBad',)
+
+_METRIC_LINE_REGEX = re.compile(
+    r'^([a-zA-Z_:][a-zA-Z0-9_:]*(?:\{[^}]*\})?)\s+(\S+)')
+
+
+def parse_metrics(text):
+    """Parse a Prometheus text exposition (server metrics endpoint).
+
+    :param str text: Metrics in Prometheus text format.
+    :returns dict: Values by series name (name and labels, e.g.
+        'http_requests_total{method="get"}').
+    """
+    metrics = {}
+    for line in text.splitlines():
+        match = _METRIC_LINE_REGEX.match(line)
+        if match is None:
+            continue
+        try:
+            metrics[match.group(1)] = float(match.group(2))
+        except ValueError:
+            continue
+    return metrics
+
+
+_METRIC_TYPE_REGEX = re.compile(r'^#\s*TYPE\s+(\S+)\s+(\S+)')
+
+# Suffixes of cumulative series of summaries and histograms.
+_CUMULATIVE_SUFFIXES = ('_total', '_count', '_sum', '_bucket', '_created',)
+
+
+def parse_metric_types(text):
+    """Parse metric families types of a Prometheus text exposition.
+
+    :param str text: Metrics in Prometheus text format.
+    :returns dict: Types ('counter', 'gauge', 'summary', 'histogram',
+        'untyped') by metric family name.
+    """
+    types = {}
+    for line in text.splitlines():
+        match = _METRIC_TYPE_REGEX.match(line)
+        if match is not None:
+            types[match.group(1)] = match.group(2)
+    return types
+
+
+def is_counter(series, types):
+    """Check whether a series is a counter (monotonic, cumulative value).
+
+    Counters and cumulative series of summaries and histograms ('_count',
+    '_sum', '_bucket') are counters. Series of unknown type are not.
+
+    :param str series: Series name (name and labels).
+    :param dict types: Metric families types, see `parse_metric_types`.
+    :returns bool:
+    """
+    name = series.split('{')[0]
+    if name in types:
+        return types[name] == 'counter'
+    for suffix in _CUMULATIVE_SUFFIXES:
+        if name.endswith(suffix):
+            family_type = types.get(name[:-len(suffix)])
+            if family_type in ('counter', 'summary', 'histogram',):
+                return True
+    return False
+
+
+def _delta(current, previous):
+    """Delta between two counter values, handling counter resets."""
+    delta = current - previous
+    # counters are reset on server restart
+    return current if delta < 0 else delta
+
+
+class Sample():
+    """Server statistics (and metrics) collected at a point in time."""
+
+    def __init__(self, timestamp, stats, metrics=None, metric_types=None):
+        """
+        :param float timestamp: Collect time (monotonic clock, seconds).
+        :param dict stats: All datasets' statistics, JSON format.
+        :param dict metrics: Server metrics, see `parse_metrics`.
+        :param dict metric_types: Server metric families types, see
+            `parse_metric_types`.
+        """
+        self.timestamp = timestamp
+        self.stats = stats
+        self.metrics = metrics
+        self.metric_types = metric_types or {}
+
+    def __repr__(self):
+        return (
+            '<{self.__class__.__name__}>('
+            'timestamp={self.timestamp}'
+            ', datasets={nb_datasets}'
+            ')'.format(
+                self=self, nb_datasets=len(self.stats.get('datasets', {}))))
+
+
+def compute_deltas(previous, current):
+    """Compute counters deltas between two samples.
+
+    :param Sample previous: Oldest sample.
+    :param Sample current: Newest sample.
+    :returns dict: Deltas by dataset name, with per endpoint deltas::
+
+        {'/ds': {'Requests': 12, 'RequestsGood': 11, 'RequestsBad': 1,
+                 'endpoints': {'query': {'Requests': 10, ...}, ...}}}
+    """
+    deltas = {}
+    previous_datasets = previous.stats.get('datasets', {})
+    for ds_name, ds_stats in current.stats.get('datasets', {}).items():
+        ds_previous = previous_datasets.get(ds_name, {})
+        ds_deltas = {
+            counter: _delta(
+                ds_stats.get(counter, 0), ds_previous.get(counter, 0))
+            for counter in STATS_COUNTERS}
+        ds_deltas['endpoints'] = {}
+        previous_endpoints = ds_previous.get('endpoints', {})
+        for ep_name, ep_stats in ds_stats.get('endpoints', {}).items():
+            ep_previous = previous_endpoints.get(ep_name, {})
+            ds_deltas['endpoints'][ep_name] = {
+                counter: _delta(
+                    ep_stats.get(counter, 0), ep_previous.get(counter, 0))
+                for counter in STATS_COUNTERS}
+        deltas[ds_name] = ds_deltas
+    return deltas
+
+
+def compute_rates(previous, current):
+    """Compute counters rates (per second) between two samples.
+
+    :param Sample previous: Oldest sample.
+    :param Sample current: Newest sample.
+    :returns dict: Rates by dataset name, same layout as `compute_deltas`,
+        plus an 'ErrorRatio' (bad requests / requests) per dataset.
+    """
+    elapsed = current.timestamp - previous.timestamp
+    if elapsed <= 0:
+        raise ValueError('Samples must be taken at different times')
+    rates = {}
+    for ds_name, ds_deltas in compute_deltas(previous, current).items():
+        ds_rates = {
+            counter: ds_deltas[counter] / elapsed
+            for counter in STATS_COUNTERS}
+        ds_rates['ErrorRatio'] = (
+            ds_deltas['RequestsBad'] / ds_deltas['Requests']
+            if ds_deltas['Requests'] else 0.)
+        ds_rates['endpoints'] = {
+            ep_name: {
+                counter: ep_deltas[counter] / elapsed
+                for counter in STATS_COUNTERS}
+            for ep_name, ep_deltas in ds_deltas['endpoints'].items()}
+        rates[ds_name] = ds_rates
+    return rates
+
+
+class StatsSampler():
+    """Sample server statistics at a fixed interval to compute rates.
+
+    Each sample costs one `get_all_stats` request for all datasets (plus one
+    metrics request if 'use_metrics' is True and the server exposes its
+    metrics endpoint). Samples are kept in a bounded ring buffer.
+    """
+
+    def __init__(self, admin_client, *, interval=10., capacity=360,
+                 use_metrics=False):
+        """
+        :param FusekiAdminClient admin_client: Client used to get stats.
+        :param float interval: Sampling interval (seconds). (default 10)
+        :param int capacity: Maximum number of samples kept. (default 360)
+        :param bool use_metrics:
+            Also collect server metrics, when available. (default False)
+        """
+        if capacity < 2:
+            raise ValueError('Invalid capacity value: {}'.format(capacity))
+        self._client = admin_client
+        self.interval = interval
+        self.use_metrics = use_metrics
+        self._samples = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def samples(self):
+        """Samples collected, oldest first."""
+        with self._lock:
+            return list(self._samples)
+
+    def sample(self):
+        """Collect a sample now.
+
+        :returns Sample:
+        """
+        stats = self._client.get_all_stats()
+        metrics, metric_types = None, None
+        if self.use_metrics:
+            try:
+                text = self._client.get_metrics()
+            except DatasetNotFoundError:
+                # metrics endpoint not available on this server
+                self.use_metrics = False
+            else:
+                metrics = parse_metrics(text)
+                metric_types = parse_metric_types(text)
+        sample = Sample(time.monotonic(), stats, metrics, metric_types)
+        with self._lock:
+            self._samples.append(sample)
+        return sample
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except FusekiClientError:
+                pass
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Start sampling in a background thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='fuseki-stats-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop background sampling."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _window(self, window):
+        """Get oldest and newest samples of a time window."""
+        samples = self.samples
+        if len(samples) < 2:
+            return None, None
+        current = samples[-1]
+        previous = samples[-2]
+        if window is not None:
+            for sample in samples[:-1]:
+                if current.timestamp - sample.timestamp <= window:
+                    previous = sample
+                    break
+        return previous, current
+
+    def deltas(self, window=None):
+        """Get counters deltas by dataset and endpoint.
+
+        :param float window: Time window (seconds), None for the last
+            sampling interval.
+        :returns dict: See `compute_deltas`, empty if not enough samples.
+        """
+        previous, current = self._window(window)
+        if current is None:
+            return {}
+        return compute_deltas(previous, current)
+
+    def rates(self, window=None):
+        """Get counters rates (per second) by dataset and endpoint.
+
+        :param float window: Time window (seconds), None for the last
+            sampling interval.
+        :returns dict: See `compute_rates`, empty if not enough samples.
+        """
+        previous, current = self._window(window)
+        if current is None:
+            return {}
+        return compute_rates(previous, current)
+
+    def metric_rates(self, window=None):
+        """Get server counter metrics rates (per second).
+
+        Only counters have rates: see `metric_gauges` for other metrics.
+
+        :param float window: Time window (seconds), None for the last
+            sampling interval.
+        :returns dict: Rates by series name, empty if not enough samples.
+        """
+        previous, current = self._window(window)
+        if current is None or previous.metrics is None or \
+                current.metrics is None:
+            return {}
+        elapsed = current.timestamp - previous.timestamp
+        return {
+            name: _delta(value, previous.metrics.get(name, 0.)) / elapsed
+            for name, value in current.metrics.items()
+            if is_counter(name, current.metric_types)}
+
+    def metric_gauges(self):
+        """Get server non-counter metrics (memory, threads...) values, as
+        last sampled.
+
+        :returns dict: Values by series name, empty if no metrics sampled.
+        """
+        samples = self.samples
+        current = samples[-1] if samples else None
+        if current is None or current.metrics is None:
+            return {}
+        return {
+            name: value for name, value in current.metrics.items()
+            if not is_counter(name, current.metric_types)}
+
+    def export_prometheus(self, window=None):
+        """Export rates in Prometheus text format.
+
+        :param float window: Time window (seconds), None for the last
+            sampling interval.
+        :returns str: Gauges 'fuseki_dataset_requests_per_second',
+            'fuseki_dataset_error_ratio' and
+            'fuseki_endpoint_requests_per_second'.
+        """
+        names = {
+            'Requests': 'requests', 'RequestsGood': 'requests_good',
+            'RequestsBad': 'requests_bad'}
+        rates = sorted(self.rates(window).items())
+        # each metric family is a contiguous block after its TYPE line
+        lines = ['# TYPE fuseki_dataset_requests_per_second gauge']
+        for ds_name, ds_rates in rates:
+            for counter in STATS_COUNTERS:
+                lines.append(
+                    'fuseki_dataset_requests_per_second'
+                    '{{dataset="{}",kind="{}"}} {}'.format(
+                        ds_name, names[counter], ds_rates[counter]))
+        lines.append('# TYPE fuseki_dataset_error_ratio gauge')
+        for ds_name, ds_rates in rates:
+            lines.append(
+                'fuseki_dataset_error_ratio{{dataset="{}"}} {}'.format(
+                    ds_name, ds_rates['ErrorRatio']))
+        lines.append('# TYPE fuseki_endpoint_requests_per_second gauge')
+        for ds_name, ds_rates in rates:
+            for ep_name, ep_rates in sorted(ds_rates['endpoints'].items()):
+                for counter in STATS_COUNTERS:
+                    lines.append(
+                        'fuseki_endpoint_requests_per_second'
+                        '{{dataset="{}",endpoint="{}",kind="{}"}} {}'.format(
+                            ds_name, ep_name, names[counter],
+                            ep_rates[counter]))
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,142 @@
+"""Jena/Fuseki asynchronous server tasks tracking."""
+
+import threading
+from concurrent.futures import Future
+
+from ..exceptions import (
+    FusekiClientError, TaskNotFoundError, TaskFailedError)
+
+
+def is_task_finished(task):
+    """Check whether a task description is the one of a finished task.
+
+    :param dict task: Task details, JSON format.
+    :returns bool:
+    """
+    # 'finished' was used by Fuseki versions before 'finishPoint'
+    return 'finishPoint' in task or 'finished' in task
+
+
+class TaskWaiter():
+    """Wait for many asynchronous server tasks (backups...) at once.
+
+    Every tracked task is checked by a single periodic `get_all_tasks`
+    request, made by a background thread that runs while there are tasks to
+    wait for. Polling interval starts at 'min_interval' and grows up to
+    'max_interval' while tracked tasks do not change, then goes back to
+    'min_interval' on changes or when new tasks are tracked.
+
+    Each waited task gets a future, resolved with the task details once it
+    has a 'finishPoint'. The future raises TaskFailedError if the task
+    failed, and TaskNotFoundError if the task disappeared from the server's
+    retained history before being seen finished.
+    """
+
+    def __init__(self, admin_client, *,
+                 min_interval=0.5, max_interval=10., backoff=2.):
+        """
+        :param FusekiAdminClient admin_client: Client used to poll tasks.
+        :param float min_interval: Minimum polling interval (seconds).
+        :param float max_interval: Maximum polling interval (seconds).
+        :param float backoff: Polling interval growth factor.
+        """
+        self._client = admin_client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    @property
+    def pending(self):
+        """IDs of the tasks being waited for."""
+        with self._lock:
+            return set(self._futures)
+
+    def wait(self, task_id, callback=None):
+        """Track a task.
+
+        :param int|str task_id: ID of an asynchronous task.
+        :param callable callback:
+            Called with the future once the task is finished.
+        :returns concurrent.futures.Future: Resolved with task's details.
+        """
+        task_id = str(task_id)
+        with self._lock:
+            future = self._futures.get(task_id)
+            if future is None:
+                future = Future()
+                self._futures[task_id] = future
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='fuseki-task-waiter', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        if callback is not None:
+            future.add_done_callback(callback)
+        return future
+
+    def _run(self):
+        interval = self.min_interval
+        while True:
+            with self._lock:
+                for task_id, future in list(self._futures.items()):
+                    if future.cancelled():
+                        del self._futures[task_id]
+                if not self._futures:
+                    self._thread = None
+                    return
+                pending = list(self._futures)
+            self._wakeup.clear()
+            try:
+                tasks = {
+                    str(task['taskId']): task
+                    for task in self._client.get_all_tasks()}
+            except FusekiClientError:
+                # server unreachable (restarting?): retry later
+                changed = False
+            else:
+                changed = self._update(pending, tasks)
+            if changed:
+                interval = self.min_interval
+            else:
+                interval = min(interval * self.backoff, self.max_interval)
+            if self._wakeup.wait(interval):
+                interval = self.min_interval
+
+    def _update(self, pending, tasks):
+        """Resolve the futures of the finished or vanished tasks.
+
+        :returns bool: True if a task was resolved.
+        """
+        changed = False
+        for task_id in pending:
+            task = tasks.get(task_id)
+            exc = None
+            if task is None:
+                # maybe no longer listed: ask for it specifically
+                try:
+                    task = self._client.get_task(task_id)
+                except TaskNotFoundError:
+                    exc = TaskNotFoundError(
+                        'Task {} disappeared from server history'.format(
+                            task_id))
+                except FusekiClientError:
+                    continue
+            if exc is None:
+                if not is_task_finished(task):
+                    continue
+                if task.get('success', True) is False:
+                    exc = TaskFailedError(task)
+            with self._lock:
+                future = self._futures.pop(task_id, None)
+            if future is None or not future.set_running_or_notify_cancel():
+                continue
+            changed = True
+            if exc is None:
+                future.set_result(task)
+            else:
+                future.set_exception(exc)
+        return changed
@@ -0,0 +1,87 @@
+"""Chunked deletion of triples, in many small update transactions.
+
+A single 'DROP ALL' (or large 'DELETE WHERE') on a big TDB dataset is one
+write transaction, blocking readers until it commits. Here matching triples
+are deleted by bounded batches, each in its own update request, with an
+optional pause between batches so readers keep being served.
+"""
+
+import time
+
+
+# Default maximum number of triples deleted per update.
+DEFAULT_DELETE_CHUNK_SIZE = 10000
+
+
+def build_pattern(sbj=None, pred=None, obj=None):
+    """Build a triple pattern, unbound terms being variables.
+
+    :param str sbj: Subject (formatted for SPARQL), None for any.
+    :param str pred: Predicate (formatted for SPARQL), None for any.
+    :param str obj: Object (formatted for SPARQL), None for any.
+    :returns str: Triple pattern.
+    """
+    return '{} {} {}'.format(
+        '?s' if sbj is None else sbj,
+        '?p' if pred is None else pred,
+        '?o' if obj is None else obj)
+
+
+def _graph_block(pattern, graph):
+    if graph is None:
+        return pattern
+    return 'GRAPH <{}> {{ {} }}'.format(graph, pattern)
+
+
+def _batch_key(bindings):
+    return frozenset(
+        frozenset(
+            (var, value['type'], value['value'])
+            for var, value in binding.items())
+        for binding in bindings)
+
+
+def delete_in_chunks(select, update, pattern, *, graph=None,
+                     chunk_size=DEFAULT_DELETE_CHUNK_SIZE, pause=0.):
+    """Delete triples matching a pattern, by batches.
+
+    Each batch is selected ('LIMIT' SELECT query) then deleted by an update
+    selecting the same triples. Deletion ends when a batch is not full, or
+    when a batch is selected again unchanged: the update deleted nothing,
+    e.g. when the query service sees triples the update does not (union
+    default graph).
+
+    :param callable select: Function executing a SELECT query, returning
+        results bindings.
+    :param callable update: Function executing an update query.
+    :param str pattern: Triple pattern (see `build_pattern`).
+    :param str graph: Named graph's IRI, None for the default graph.
+    :param int chunk_size: Maximum number of triples deleted per update.
+    :param float pause: Pause (seconds) between updates. (default 0)
+    :returns int: Number of update requests sent.
+    """
+    if chunk_size < 1:
+        raise ValueError('Invalid chunk_size value: {}'.format(chunk_size))
+    block = _graph_block(pattern, graph)
+    select_query = 'SELECT * WHERE {{ {} }} LIMIT {}'.format(
+        block, chunk_size)
+    update_query = 'DELETE {{ {} }} WHERE {{ {} }}'.format(
+        block, select_query)
+    nb_updates = 0
+    previous = None
+    while True:
+        bindings = select(select_query)
+        if not bindings:
+            break
+        batch = _batch_key(bindings)
+        if batch == previous:
+            # previous update made no progress
+            break
+        if nb_updates and pause:
+            time.sleep(pause)
+        update(update_query)
+        nb_updates += 1
+        if len(bindings) < chunk_size:
+            break
+        previous = batch
+    return nb_updates
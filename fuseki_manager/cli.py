@@ -0,0 +1,107 @@
+"""Command-line tools.
+
+fuseki-replay: replay a queries log (recorded with `QueryRecorder`) against
+a server, and report latencies, error rates and throughput per query
+fingerprint.
+
+Usage:
+    fuseki-replay queries.log --host localhost --concurrency 8 \\
+        --duration 60 --write-ratio 0.1
+"""
+
+import argparse
+import json
+import sys
+
+from .api_client import FusekiSPARQLClient
+from .replay import Replayer, read_log
+
+
+def _format_latency(value):
+    return '{:>9}'.format('-') if value is None else '{:>9.1f}'.format(
+        value * 1000)
+
+
+def format_report(report):
+    """Format a replay report as a text table.
+
+    :param dict report: Report, see `Replayer.report`.
+    :returns str: Table, one line per query fingerprint and a total line.
+    """
+    header = '{:<12} {:<6} {:>8} {:>7} {:>9} {:>9} {:>9} {:>9}'.format(
+        'fingerprint', 'kind', 'count', 'errors', 'req/s', 'p50 (ms)',
+        'p90 (ms)', 'p99 (ms)')
+    line = '{:<12} {:<6} {:>8} {:>6.1%} {:>9.1f} {} {} {}'
+    lines = [header]
+    rows = sorted(
+        report['fingerprints'].items(), key=lambda item: -item[1]['count'])
+    for key, stats in rows + [('total', dict(report['total'], kind=''))]:
+        lines.append(line.format(
+            key, stats['kind'], stats['count'], stats['error_rate'],
+            stats['throughput'], _format_latency(stats['p50']),
+            _format_latency(stats['p90']), _format_latency(stats['p99'])))
+    return '\n'.join(lines)
+
+
+def build_replay_parser():
+    parser = argparse.ArgumentParser(
+        prog='fuseki-replay',
+        description='Replay a queries log against a Fuseki server.')
+    parser.add_argument('log', help='Queries log file')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=3030)
+    parser.add_argument('--secured', action='store_true', help='Use HTTPS')
+    parser.add_argument('--user')
+    parser.add_argument('--pwd')
+    parser.add_argument(
+        '--dataset', help="Target dataset (default logged requests' one)")
+    parser.add_argument(
+        '--concurrency', type=int, default=4,
+        help='Number of concurrent requests (default 4)')
+    parser.add_argument(
+        '--qps', type=float, help='Target requests per second')
+    parser.add_argument(
+        '--duration', type=float,
+        help='Replay duration in seconds, cycling through the log '
+             '(default replay the log once)')
+    parser.add_argument(
+        '--write-ratio', type=float,
+        help="Ratio of updates among requests (default log's mix)")
+    parser.add_argument('--seed', type=int, help='Random seed of the mix')
+    parser.add_argument(
+        '--timeout', type=float, help='Request timeout in seconds')
+    parser.add_argument(
+        '--json', action='store_true', help='Output report as JSON')
+    return parser
+
+
+def replay_main(argv=None):
+    """Entry point of 'fuseki-replay' command."""
+    args = build_replay_parser().parse_args(argv)
+
+    def client_factory(ds_name):
+        return FusekiSPARQLClient(
+            args.dataset or ds_name, host=args.host, port=args.port,
+            is_secured=args.secured, user=args.user, pwd=args.pwd,
+            timeout=args.timeout)
+
+    try:
+        replayer = Replayer(
+            client_factory, read_log(args.log),
+            concurrency=args.concurrency, qps=args.qps,
+            duration=args.duration, write_ratio=args.write_ratio,
+            seed=args.seed)
+        report = replayer.run()
+    except (OSError, ValueError) as exc:
+        print('fuseki-replay: error: {}'.format(exc), file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_report(report))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(replay_main())
@@ -0,0 +1,276 @@
+"""Columnar decoding of SPARQL TSV results into Apache Arrow tables.
+
+Results are read line by line from a streamed 'text/tab-separated-values'
+response and each value is appended to its column: no per-row structure is
+ever built. Columns are then typed from their values' datatypes and packed
+into Arrow buffers:
+
+- IRI columns are dictionary-encoded,
+- integer columns are int64, other numeric columns are float64,
+- boolean, 'xsd:dateTime' and 'xsd:date' columns are typed accordingly,
+- any other column (mixed types, literals, blank nodes) is a string column.
+
+`pyarrow` (and `pandas` for data frames) are optional dependencies, installed
+with the 'arrow' (or 'pandas') extra.
+"""
+
+import array
+import datetime as dt
+import re
+
+from dateutil import parser as dt_parser
+
+from .converters import XSD, _INTEGER_TYPES
+
+
+TSV_MIME_TYPE = 'text/tab-separated-values'
+
+_INTEGER_DATATYPES = frozenset(XSD + name for name in _INTEGER_TYPES)
+_NUMERIC_DATATYPES = _INTEGER_DATATYPES | frozenset(
+    XSD + name for name in ('decimal', 'double', 'float'))
+_DATETIME_DATATYPES = frozenset(
+    XSD + name for name in ('dateTime', 'dateTimeStamp'))
+
+_LITERAL_REGEX = re.compile(
+    r'^"((?:[^"\\]|\\.)*)"(?:@([a-zA-Z]+(?:-[a-zA-Z0-9]+)*)|\^\^<([^>]*)>)?$')
+# Turtle abbreviated numbers
+_INTEGER_REGEX = re.compile(r'^[+-]?\d+$')
+_DECIMAL_REGEX = re.compile(r'^[+-]?\d*\.\d+$')
+_DOUBLE_REGEX = re.compile(r'^[+-]?(?:\d+\.?\d*|\.\d+)[eE][+-]?\d+$')
+
+_ESCAPE_REGEX = re.compile(r'\\(?:u([0-9a-fA-F]{4})|U([0-9a-fA-F]{8})|(.))')
+_ECHARS = {
+    't': '\t', 'b': '\b', 'n': '\n', 'r': '\r', 'f': '\f',
+    '"': '"', "'": "'", '\\': '\\'}
+
+_EPOCH = dt.datetime(1970, 1, 1, tzinfo=dt.timezone.utc)
+_EPOCH_DATE = _EPOCH.date()
+
+
+def _unescape(match):
+    short, long_, char = match.groups()
+    if char is not None:
+        return _ECHARS.get(char, char)
+    return chr(int(short or long_, 16))
+
+
+def parse_tsv_term(token):
+    """Parse a SPARQL TSV results term.
+
+    :param str token: Term, in Turtle lexical form.
+    :returns tuple|None: ('uri', IRI), ('bnode', label) or
+        ('literal', lexical value, datatype IRI), None for an unbound value.
+        Language-tagged literals have the 'rdf:langString' datatype.
+    :raises ValueError: When term is not valid.
+    """
+    if not token:
+        return None
+    if token.startswith('<') and token.endswith('>'):
+        return ('uri', token[1:-1])
+    if token.startswith('_:'):
+        return ('bnode', token)
+    if token.startswith('"'):
+        match = _LITERAL_REGEX.match(token)
+        if match is None:
+            raise ValueError('Invalid TSV term: {}'.format(token))
+        value, lang, datatype = match.groups()
+        value = _ESCAPE_REGEX.sub(_unescape, value)
+        if lang is not None:
+            datatype = (
+                'http://www.w3.org/1999/02/22-rdf-syntax-ns#langString')
+        return ('literal', value, datatype or XSD + 'string')
+    if token in ('true', 'false'):
+        return ('literal', token, XSD + 'boolean')
+    for regex, datatype in (
+            (_INTEGER_REGEX, 'integer'),
+            (_DECIMAL_REGEX, 'decimal'),
+            (_DOUBLE_REGEX, 'double'),):
+        if regex.match(token):
+            return ('literal', token, XSD + datatype)
+    raise ValueError('Invalid TSV term: {}'.format(token))
+
+
+def read_tsv_columns(lines):
+    """Read SPARQL TSV results into columns of raw terms.
+
+    :param iterable lines: Results lines (str or bytes), header first.
+    :returns tuple: (variables, columns): variables names and, for each
+        variable, the list of its raw terms ('' when unbound).
+    """
+    lines = iter(lines)
+    header = next(lines, '')
+    if isinstance(header, bytes):
+        header = header.decode('utf-8')
+    header = header.rstrip('\r\n')
+    variables = [
+        name.lstrip('?$') for name in header.split('\t')] if header else []
+    columns = [[] for _ in variables]
+    nb_columns = len(columns)
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.rstrip('\r\n')
+        if not line and nb_columns > 1:
+            continue
+        tokens = line.split('\t')
+        if len(tokens) != nb_columns:
+            raise ValueError('Invalid TSV results line: {}'.format(line))
+        for column, token in zip(columns, tokens):
+            column.append(token)
+    return variables, columns
+
+
+def _timestamp(value):
+    value = dt_parser.parse(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=dt.timezone.utc)
+    delta = value - _EPOCH
+    return (
+        (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds)
+
+
+def _date(value):
+    value = dt.datetime.strptime(value[:10], '%Y-%m-%d').date()
+    return (value - _EPOCH_DATE).days
+
+
+def _column_kind(terms):
+    kinds = set()
+    datatypes = set()
+    for term in terms:
+        if term is None:
+            continue
+        kinds.add(term[0])
+        if term[0] == 'literal':
+            datatypes.add(term[2])
+    if kinds == {'uri'}:
+        return 'dictionary'
+    if kinds != {'literal'}:
+        return 'string'
+    if datatypes <= _INTEGER_DATATYPES:
+        return 'int64'
+    if datatypes <= _NUMERIC_DATATYPES:
+        return 'float64'
+    if datatypes == {XSD + 'boolean'}:
+        return 'bool'
+    if datatypes <= _DATETIME_DATATYPES:
+        return 'timestamp'
+    if datatypes == {XSD + 'date'}:
+        return 'date32'
+    return 'string'
+
+
+def decode_column(tokens):
+    """Decode a column of raw TSV terms.
+
+    :param list[str] tokens: Raw terms ('' when unbound).
+    :returns tuple: (kind, values, validity), where kind is 'dictionary',
+        'int64', 'float64', 'bool', 'timestamp' (microseconds since epoch,
+        UTC), 'date32' (days since epoch) or 'string', values an
+        `array.array` for fixed width kinds (0 where unbound) or a list, and
+        validity a list of booleans (False where unbound). 'dictionary'
+        values are (indices, dictionary).
+    """
+    terms = [parse_tsv_term(token) for token in tokens]
+    validity = [term is not None for term in terms]
+    kind = _column_kind(terms)
+
+    if kind == 'dictionary':
+        positions = {}
+        indices = array.array('i')
+        for term in terms:
+            if term is None:
+                indices.append(0)
+            else:
+                indices.append(positions.setdefault(term[1], len(positions)))
+        return kind, (indices, list(positions)), validity
+
+    if kind in ('int64', 'float64', 'timestamp', 'date32'):
+        typecode, parse = {
+            'int64': ('q', int),
+            'float64': ('d', float),
+            'timestamp': ('q', _timestamp),
+            'date32': ('i', _date),
+        }[kind]
+        values = array.array(typecode)
+        try:
+            for term in terms:
+                values.append(0 if term is None else parse(term[1]))
+        except (OverflowError, ValueError):
+            # out of range or malformed lexical value
+            kind = 'string'
+        else:
+            return kind, values, validity
+
+    if kind == 'bool':
+        return kind, [
+            None if term is None else term[1] in ('true', '1')
+            for term in terms], validity
+
+    return kind, [
+        None if term is None else term[1] for term in terms], validity
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError(
+            'pyarrow is required for Arrow export, install it with '
+            '"pip install fuseki-manager[arrow]"')
+    return pyarrow
+
+
+def _validity_buffer(pa, validity):
+    """Build an Arrow validity bitmap, None if all values are valid."""
+    if all(validity):
+        return None
+    bitmap = bytearray((len(validity) + 7) // 8)
+    for index, valid in enumerate(validity):
+        if valid:
+            bitmap[index >> 3] |= 1 << (index & 7)
+    return pa.py_buffer(bitmap)
+
+
+def _to_arrow_array(pa, kind, values, validity):
+    nb_values = len(validity)
+    null_count = validity.count(False)
+    if kind == 'dictionary':
+        indices, dictionary = values
+        indices = pa.Array.from_buffers(
+            pa.int32(), nb_values,
+            [_validity_buffer(pa, validity), pa.py_buffer(indices)],
+            null_count=null_count)
+        return pa.DictionaryArray.from_arrays(
+            indices, pa.array(dictionary, type=pa.string()))
+    arrow_type = {
+        'int64': pa.int64(),
+        'float64': pa.float64(),
+        'timestamp': pa.timestamp('us', tz='UTC'),
+        'date32': pa.date32(),
+    }.get(kind)
+    if arrow_type is not None:
+        return pa.Array.from_buffers(
+            arrow_type, nb_values,
+            [_validity_buffer(pa, validity), pa.py_buffer(values)],
+            null_count=null_count)
+    if kind == 'bool':
+        return pa.array(values, type=pa.bool_())
+    return pa.array(values, type=pa.string())
+
+
+def tsv_to_arrow(lines):
+    """Decode SPARQL TSV results into an Arrow table.
+
+    :param iterable lines: Results lines (str or bytes), header first.
+    :returns pyarrow.Table: One column per variable.
+    :raises ImportError: When pyarrow is not installed.
+    """
+    pa = _import_pyarrow()
+    variables, columns = read_tsv_columns(lines)
+    arrays = []
+    for index, tokens in enumerate(columns):
+        arrays.append(_to_arrow_array(pa, *decode_column(tokens)))
+        # release raw terms as soon as a column is decoded
+        columns[index] = None
+    return pa.Table.from_arrays(arrays, names=variables)
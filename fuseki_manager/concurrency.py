@@ -0,0 +1,154 @@
+"""Adaptive limiting of concurrent requests to a server.
+
+The number of requests allowed in flight follows an AIMD (additive increase,
+multiplicative decrease) rule: it grows by one for each window of successful
+requests sent while at least half of the limit was used, and is cut (by
+'backoff') when the server shows overload: 503 (Service Unavailable) or 429
+(Too Many Requests) responses, timeouts and connection errors, or latencies
+above a threshold.
+The limit then stays close to the server's capacity: excess requests queue
+client-side instead of piling up on the server, where latencies would grow
+until everything times out.
+
+Requests beyond the queue size, or waiting longer than the queue timeout, are
+shed with `ServerOverloadedError`.
+"""
+
+import threading
+import time
+
+from .exceptions import ServerOverloadedError
+
+
+# Response status codes signaling an overloaded server.
+OVERLOAD_STATUS_CODES = (429, 503,)
+
+
+class ConcurrencyLimiter():
+    """Adaptive limit of in-flight requests to one server.
+
+    A limiter is shared by all clients of a server (pass it to each client as
+    'concurrency_limiter'); use one limiter per server.
+    """
+
+    def __init__(self, *, initial_limit=8, min_limit=1, max_limit=64,
+                 backoff=0.5, latency_threshold=None, max_queue=None,
+                 queue_timeout=None):
+        """
+        :param int initial_limit: Initial number of in-flight requests
+            allowed. (default 8)
+        :param int min_limit: Minimum limit. (default 1)
+        :param int max_limit: Maximum limit. (default 64)
+        :param float backoff: Factor applied to the limit on overload, in
+            ]0, 1[. (default 0.5)
+        :param float latency_threshold: Latency (seconds) above which a
+            response is an overload signal, None to only rely on errors.
+            Latencies are measured until response headers are received.
+        :param int max_queue: Maximum number of requests waiting for a slot,
+            None for no limit.
+        :param float queue_timeout: Maximum time (seconds) a request waits
+            for a slot, None to wait forever.
+        """
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError(
+                'Invalid limits: {} <= {} <= {}'.format(
+                    min_limit, initial_limit, max_limit))
+        if not 0 < backoff < 1:
+            raise ValueError('Invalid backoff value: {}'.format(backoff))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_threshold = latency_threshold
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._waiting = 0
+        self._nb_shed = 0
+        self._last_decrease = float('-inf')
+        self._cond = threading.Condition()
+
+    def __repr__(self):
+        return (
+            '<{self.__class__.__name__}>('
+            'limit={self.limit}'
+            ', min_limit={self.min_limit}'
+            ', max_limit={self.max_limit}'
+            ')'.format(self=self))
+
+    @property
+    def limit(self):
+        """Current number of in-flight requests allowed."""
+        return int(self._limit)
+
+    @property
+    def stats(self):
+        """Get limiter's state.
+
+        :returns dict: 'limit', 'in_flight', 'waiting' and 'shed' (number of
+            requests shed so far).
+        """
+        with self._cond:
+            return {
+                'limit': self.limit,
+                'in_flight': self._in_flight,
+                'waiting': self._waiting,
+                'shed': self._nb_shed,
+            }
+
+    def _shed(self, reason):
+        self._nb_shed += 1
+        raise ServerOverloadedError(
+            'Request shed, {} (limit {}, {} in flight)'.format(
+                reason, self.limit, self._in_flight))
+
+    def acquire(self):
+        """Wait for a slot to send a request.
+
+        :returns float: Request's start time, to pass to `release`.
+        :raises ServerOverloadedError: When queue is full or queue timeout
+            elapsed.
+        """
+        with self._cond:
+            if self._in_flight >= self.limit:
+                if (self.max_queue is not None and
+                        self._waiting >= self.max_queue):
+                    self._shed('queue is full')
+                self._waiting += 1
+                try:
+                    has_slot = self._cond.wait_for(
+                        lambda: self._in_flight < self.limit,
+                        timeout=self.queue_timeout)
+                finally:
+                    self._waiting -= 1
+                if not has_slot:
+                    self._shed('queue timeout elapsed')
+            self._in_flight += 1
+            return time.monotonic()
+
+    def release(self, started, *, overloaded=False):
+        """Free a request's slot and adapt limit from its outcome.
+
+        :param float started: Request's start time, returned by `acquire`.
+        :param bool overloaded: Whether request failed with an overload
+            signal (error status code, timeout, connection error).
+        """
+        now = time.monotonic()
+        if (self.latency_threshold is not None and
+                now - started > self.latency_threshold):
+            overloaded = True
+        with self._cond:
+            # only grow a limit which is actually used
+            is_used = self._in_flight * 2 >= self._limit
+            self._in_flight -= 1
+            if overloaded:
+                # requests sent before last decrease reflect the old limit:
+                # a burst of failures only cuts the limit once
+                if started > self._last_decrease:
+                    self._limit = max(
+                        self.min_limit, self._limit * self.backoff)
+                    self._last_decrease = now
+            elif is_used:
+                self._limit = min(
+                    self.max_limit, self._limit + 1 / self._limit)
+            self._cond.notify_all()
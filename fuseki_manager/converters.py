@@ -0,0 +1,208 @@
+"""Typed decoding of SPARQL JSON results values.
+
+Values are converted according to their binding's 'datatype', column by
+column and only when a column is first accessed.
+"""
+
+import array
+import datetime as dt
+from decimal import Decimal
+
+from dateutil import parser as dt_parser
+
+
+XSD = 'http://www.w3.org/2001/XMLSchema#'
+
+_INTEGER_TYPES = (
+    'integer', 'int', 'long', 'short', 'byte', 'nonNegativeInteger',
+    'nonPositiveInteger', 'positiveInteger', 'negativeInteger',
+    'unsignedLong', 'unsignedInt', 'unsignedShort', 'unsignedByte',)
+
+
+class LangString(str):
+    """A language-tagged literal: a string with a 'lang' attribute."""
+
+    def __new__(cls, value, lang):
+        obj = super().__new__(cls, value)
+        obj.lang = lang
+        return obj
+
+    def __repr__(self):
+        return '{}@{}'.format(super().__repr__(), self.lang)
+
+
+def _parse_boolean(value):
+    return value in ('true', '1')
+
+
+def _parse_datetime(value):
+    return dt_parser.parse(value)
+
+
+def _parse_date(value):
+    return dt.datetime.strptime(value[:10], '%Y-%m-%d').date()
+
+
+class ConverterRegistry():
+    """Converters from literal lexical values to Python values, by datatype.
+
+    Values whose datatype has no converter are left as strings.
+    """
+
+    def __init__(self, converters=None):
+        """
+        :param dict converters: Callables by datatype IRI, added to (or
+            replacing) default converters.
+        """
+        self._converters = {XSD + name: int for name in _INTEGER_TYPES}
+        self._converters.update({
+            XSD + 'decimal': Decimal,
+            XSD + 'double': float,
+            XSD + 'float': float,
+            XSD + 'boolean': _parse_boolean,
+            XSD + 'dateTime': _parse_datetime,
+            XSD + 'dateTimeStamp': _parse_datetime,
+            XSD + 'date': _parse_date,
+        })
+        self._converters.update(converters or {})
+
+    def register(self, datatype, converter):
+        """Register a converter.
+
+        :param str datatype: Datatype IRI.
+        :param callable converter:
+            Called with a lexical value, returns a Python value.
+        """
+        self._converters[datatype] = converter
+
+    def get(self, datatype):
+        """Get the converter of a datatype, None if not registered."""
+        return self._converters.get(datatype)
+
+    def convert(self, binding):
+        """Convert a single binding.
+
+        :param dict binding: SPARQL JSON binding ('type', 'value'...).
+        :returns: Python value, None for an unbound value.
+        """
+        return self.convert_column([binding])[0]
+
+    def convert_column(self, bindings):
+        """Convert a column of bindings.
+
+        :param list[dict] bindings: SPARQL JSON bindings, None if unbound.
+        :returns list: Python values. Malformed lexical values (e.g.
+            '"abc"^^xsd:integer') are left as strings.
+        """
+        converters = {}
+        values = []
+        for binding in bindings:
+            if binding is None:
+                values.append(None)
+                continue
+            value = binding['value']
+            if 'xml:lang' in binding:
+                values.append(LangString(value, binding['xml:lang']))
+                continue
+            datatype = binding.get('datatype')
+            if datatype is None:
+                values.append(value)
+                continue
+            if datatype not in converters:
+                converters[datatype] = self.get(datatype)
+            converter = converters[datatype]
+            if converter is not None:
+                try:
+                    value = converter(value)
+                except (ValueError, ArithmeticError):
+                    # malformed lexical value
+                    pass
+            values.append(value)
+        return values
+
+
+class TypedResults():
+    """Typed, column-oriented view on SPARQL JSON SELECT results.
+
+    Each column is converted on first access, then cached.
+    """
+
+    def __init__(self, jsonres, converters=None):
+        """
+        :param dict jsonres: SPARQL JSON results.
+        :param ConverterRegistry converters: Converters to use.
+        """
+        self.variables = list(jsonres['head']['vars'])
+        self._bindings = jsonres['results']['bindings']
+        self._converters = (
+            ConverterRegistry() if converters is None else converters)
+        self._columns = {}
+
+    def __len__(self):
+        return len(self._bindings)
+
+    def __repr__(self):
+        return (
+            '<{self.__class__.__name__}>('
+            'variables={self.variables}'
+            ', rows={nb_rows}'
+            ')'.format(self=self, nb_rows=len(self)))
+
+    def raw_column(self, name):
+        """Get a column's raw bindings.
+
+        :param str name: Variable name.
+        :returns list[dict]: Bindings, None where unbound.
+        """
+        if name not in self.variables:
+            raise KeyError(name)
+        return [row.get(name) for row in self._bindings]
+
+    def column(self, name):
+        """Get a column's converted values.
+
+        :param str name: Variable name.
+        :returns list: Python values, None where unbound.
+        """
+        if name not in self._columns:
+            self._columns[name] = self._converters.convert_column(
+                self.raw_column(name))
+        return self._columns[name]
+
+    def column_array(self, name, typecode='d'):
+        """Get a numeric column as a packed array.
+
+        Values are converted straight from their lexical form and packed,
+        so no Python object per value is kept.
+
+        :param str name: Variable name.
+        :param str typecode: `array` type code, 'd' (float, unbound values
+            are NaN) or an integer type code such as 'q'.
+        :returns array.array:
+        :raises ValueError:
+            When a value is not numeric, or unbound in an integer column.
+        """
+        parse = float if typecode in ('d', 'f') else int
+        values = array.array(typecode)
+        for binding in self.raw_column(name):
+            if binding is None:
+                if parse is int:
+                    raise ValueError(
+                        'Unbound value in integer column {}'.format(name))
+                values.append(float('nan'))
+            else:
+                values.append(parse(binding['value']))
+        return values
+
+    def __getitem__(self, index):
+        """Get a row as a dict of converted values."""
+        return {
+            name: self.column(name)[index] for name in self.variables
+            if name in self._bindings[index]}
+
+    def __iter__(self):
+        columns = [(name, self.column(name)) for name in self.variables]
+        for index, row in enumerate(self._bindings):
+            yield {
+                name: values[index] for name, values in columns
+                if name in row}
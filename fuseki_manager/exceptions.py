@@ -8,6 +8,14 @@ class FusekiClientError(Exception):
 class FusekiClientResponseError(FusekiClientError):
     """A response error from Fuseki server."""
 
+    def __init__(self, message, *, status_code=None):
+        """
+        :param str message: Error message.
+        :param int status_code: Response status code, if any.
+        """
+        super().__init__(message)
+        self.status_code = status_code
+
 
 class DatasetAlreadyExistsError(FusekiClientError):
     """Dataset already exists error."""
@@ -17,10 +25,25 @@ class DatasetNotFoundError(FusekiClientError):
     """Dataset not found error."""
 
 
+class GraphNotFoundError(FusekiClientError):
+    """Graph not found error."""
+
+
 class TaskNotFoundError(FusekiClientError):
     """Task not found error."""
 
 
+class TaskFailedError(FusekiClientError):
+    """Asynchronous task finished unsuccessfully error."""
+
+    def __init__(self, task):
+        """
+        :param dict task: Details on the failed task, JSON format.
+        """
+        super().__init__('Task {} failed'.format(task.get('taskId')))
+        self.task = task
+
+
 class InvalidFileError(FusekiClientError):
     """Not a file error while uploading data."""
 
@@ -35,3 +58,22 @@ class UniquenessDBError(FusekiClientError):
 
 class ArgumentError(FusekiClientError):
     """Bad argument error while quering data."""
+
+
+class IngestError(FusekiClientError):
+    """Some chunks failed to upload while ingesting data."""
+
+    def __init__(self, failures, progress):
+        """
+        :param list[tuple] failures:
+            (source, chunk index, chunk offset, exception) of failed chunks.
+        :param IngestProgress progress: Progress at the end of ingestion.
+        """
+        super().__init__(
+            '{} chunk(s) failed to upload'.format(len(failures)))
+        self.failures = failures
+        self.progress = progress
+
+
+class ServerOverloadedError(FusekiClientError):
+    """Request shed by client-side concurrency limiting error."""
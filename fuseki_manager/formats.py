@@ -0,0 +1,271 @@
+"""RDF formats detection and client-side transcoding.
+
+Formats are detected from file extensions (optionally followed by '.gz'),
+or by sniffing the first bytes of the content.
+
+Line-based formats (N-Triples, N-Quads) are the cheapest for the server to
+parse: sources in other formats can be transcoded to them before upload.
+Transcoding parses the whole source in memory and requires `rdflib`,
+installed with the 'transcode' extra.
+"""
+
+import gzip
+import io
+import re
+import tempfile
+import zlib
+from pathlib import Path
+
+from .rdf import parse_statement, serialize_statement, quote_literal
+
+
+RDF_XML = 'application/rdf+xml'
+TURTLE = 'text/turtle'
+N3 = 'text/n3'
+N_TRIPLES = 'application/n-triples'
+N_QUADS = 'application/n-quads'
+TRIG = 'application/trig'
+JSON_LD = 'application/ld+json'
+
+MIME_TYPES_BY_EXTENSION = {
+    '.rdf': RDF_XML,
+    '.owl': RDF_XML,
+    '.xml': RDF_XML,
+    '.ttl': TURTLE,
+    '.n3': N3,
+    '.nt': N_TRIPLES,
+    '.nq': N_QUADS,
+    '.trig': TRIG,
+    '.jsonld': JSON_LD,
+}
+
+# Formats which can hold named graphs.
+QUADS_MIME_TYPES = (N_QUADS, TRIG, JSON_LD,)
+# Formats parsed line by line by the server.
+LINE_BASED_MIME_TYPES = (N_TRIPLES, N_QUADS,)
+
+_RDFLIB_FORMATS = {
+    RDF_XML: 'xml',
+    TURTLE: 'turtle',
+    N3: 'n3',
+    N_TRIPLES: 'nt',
+    N_QUADS: 'nquads',
+    TRIG: 'trig',
+    JSON_LD: 'json-ld',
+}
+
+# Size of content read to sniff a format (bytes).
+SNIFF_SIZE = 4096
+
+_GZIP_MAGIC = b'\x1f\x8b'
+_TURTLE_DIRECTIVE_REGEX = re.compile(
+    r'^\s*(@prefix|@base|PREFIX|BASE)\b', re.MULTILINE | re.IGNORECASE)
+# a graph block: IRI, prefixed name or blank node label followed by '{'
+_TRIG_GRAPH_REGEX = re.compile(
+    r'^\s*(GRAPH\s+)?(<[^>]*>|[\w-]*:[\w-]*|_:\S+)?\s*\{', re.MULTILINE)
+
+
+def is_gzip_path(path):
+    """Check whether a file path ends with '.gz'."""
+    return Path(path).suffix.lower() == '.gz'
+
+
+def mime_type_from_path(path):
+    """Get the MIME type of a RDF file from its extension.
+
+    :param str|Path path: File path, optionally ending with '.gz'.
+    :returns str: MIME type, None if extension is unknown.
+    """
+    suffixes = [s.lower() for s in Path(path).suffixes]
+    if suffixes and suffixes[-1] == '.gz':
+        suffixes.pop()
+    if not suffixes:
+        return None
+    return MIME_TYPES_BY_EXTENSION.get(suffixes[-1])
+
+
+def _line_based_mime_type(lines):
+    """Get the MIME type of N-Triples or N-Quads lines, None if lines are
+    not all valid statements."""
+    arity = set()
+    for line in lines:
+        try:
+            terms = parse_statement(line)
+        except ValueError:
+            return None
+        if terms is not None:
+            arity.add(len(terms))
+    if not arity:
+        return None
+    return N_QUADS if 4 in arity else N_TRIPLES
+
+
+def sniff_mime_type(head):
+    """Guess the MIME type of RDF content from its first bytes.
+
+    :param bytes head: First bytes of content (possibly gzip-compressed).
+    :returns str: MIME type, None if format is not recognized.
+    """
+    is_partial = len(head) >= SNIFF_SIZE
+    if head.startswith(_GZIP_MAGIC):
+        # 31: gzip container, maximum window size
+        decompressor = zlib.decompressobj(wbits=31)
+        try:
+            head = decompressor.decompress(head, SNIFF_SIZE)
+        except zlib.error:
+            return None
+        is_partial = is_partial or len(head) >= SNIFF_SIZE
+    text = head.decode('utf-8', errors='ignore').lstrip('\ufeff')
+    stripped = text.lstrip()
+    if not stripped:
+        return None
+    if stripped.startswith(('<?xml', '<rdf:RDF')):
+        return RDF_XML
+    if stripped.startswith(('{', '[')):
+        return JSON_LD
+    if _TRIG_GRAPH_REGEX.search(text):
+        return TRIG
+    if not _TURTLE_DIRECTIVE_REGEX.search(text):
+        lines = text.splitlines()
+        if is_partial:
+            # last line may be truncated
+            lines = lines[:-1]
+        mime_type = _line_based_mime_type(lines)
+        if mime_type is not None:
+            return mime_type
+    return TURTLE
+
+
+def _read_head(source):
+    if isinstance(source, (str, Path)):
+        if not Path(source).is_file():
+            return None
+        with open(str(source), 'rb') as fobj:
+            return fobj.read(SNIFF_SIZE)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source[:SNIFF_SIZE])
+    if hasattr(source, 'read') and hasattr(source, 'seek'):
+        try:
+            position = source.tell()
+            head = source.read(SNIFF_SIZE)
+            source.seek(position)
+            return head
+        except (OSError, ValueError):
+            return None
+    return None
+
+
+def detect_mime_type(source, default=RDF_XML):
+    """Detect the RDF format of a source, from its file extension if any,
+    else by sniffing its content.
+
+    :param str|Path|file-like|bytes source: File path, seekable binary
+        stream or bytes-like object. Other sources can not be sniffed.
+    :param str default: MIME type returned when format can not be detected.
+        (default 'application/rdf+xml')
+    :returns str: MIME type.
+    """
+    mime_type = None
+    if isinstance(source, (str, Path)):
+        mime_type = mime_type_from_path(source)
+    elif getattr(source, 'name', None) and isinstance(source.name, str):
+        mime_type = mime_type_from_path(source.name)
+    if mime_type is None:
+        head = _read_head(source)
+        if head:
+            mime_type = sniff_mime_type(head)
+    return mime_type or default
+
+
+def decompress_source(source):
+    """Wrap a gzip-compressed source to decompress it on the fly.
+
+    File paths are left as is: the server decompresses files whose name ends
+    with '.gz'. Bytes-like objects and seekable streams, sent under no file
+    name, are decompressed while being read when their content is gzip.
+
+    :param str|Path|file-like|bytes source: Source to upload.
+    :returns: Source, or a `gzip.GzipFile` reading it.
+    """
+    if isinstance(source, (str, Path)):
+        return source
+    head = _read_head(source)
+    if head is None or not head.startswith(_GZIP_MAGIC):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(bytes(source))
+    return gzip.GzipFile(fileobj=source, mode='rb')
+
+
+def _import_rdflib():
+    try:
+        import rdflib
+    except ImportError:
+        raise ImportError(
+            'rdflib is required for transcoding, install it with '
+            '"pip install fuseki-manager[transcode]"')
+    return rdflib
+
+
+def _nt_term(term, rdflib):
+    """Format a rdflib term in N-Triples lexical form.
+
+    `Literal.n3` writes multi-line literals between triple quotes, which is
+    not valid N-Triples: literals are quoted with escaped line breaks.
+    """
+    if isinstance(term, rdflib.Literal):
+        return quote_literal(
+            str(term), language=term.language,
+            datatype=None if term.datatype is None else str(term.datatype))
+    return term.n3()
+
+
+def transcode(source, src_mime_type, dest_dir=None):
+    """Transcode a RDF source to N-Triples (or N-Quads for formats holding
+    named graphs) in a temporary file.
+
+    :param str|Path|file-like|bytes source: File path (decompressed on the
+        fly when ending with '.gz'), binary stream or bytes-like object
+        (decompressed when gzip-compressed).
+    :param str src_mime_type: Source's MIME type.
+    :param str|Path dest_dir: Directory of the temporary file.
+        (default system temporary directory)
+    :returns tuple: (path, mime_type) of transcoded file, to be removed by
+        caller.
+    :raises ImportError: When rdflib is not installed.
+    :raises ValueError: When source format is not supported.
+    """
+    if src_mime_type not in _RDFLIB_FORMATS:
+        raise ValueError('Unsupported RDF format: {}'.format(src_mime_type))
+    rdflib = _import_rdflib()
+    quads = src_mime_type in QUADS_MIME_TYPES
+    graph = rdflib.ConjunctiveGraph() if quads else rdflib.Graph()
+
+    if isinstance(source, (str, Path)):
+        opener = gzip.open if is_gzip_path(source) else open
+        with opener(str(source), 'rb') as fobj:
+            graph.parse(fobj, format=_RDFLIB_FORMATS[src_mime_type])
+    else:
+        source = decompress_source(source)
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(bytes(source))
+        graph.parse(source, format=_RDFLIB_FORMATS[src_mime_type])
+
+    fd, path = tempfile.mkstemp(
+        suffix='.nq' if quads else '.nt',
+        dir=None if dest_dir is None else str(dest_dir))
+    with open(fd, 'w', encoding='utf-8') as fobj:
+        if quads:
+            default = graph.default_context.identifier
+            for sbj, pred, obj, context in graph.quads((None, None, None)):
+                terms = tuple(
+                    _nt_term(term, rdflib) for term in (sbj, pred, obj,))
+                # triples of the default graph are written without graph
+                if context.identifier != default:
+                    terms += (context.identifier.n3(),)
+                fobj.write(serialize_statement(terms))
+        else:
+            for triple in graph:
+                fobj.write(serialize_statement(
+                    tuple(_nt_term(term, rdflib) for term in triple)))
+    return Path(path), N_QUADS if quads else N_TRIPLES
@@ -0,0 +1,582 @@
+"""Parallel chunked ingestion of line-based RDF files (N-Triples, N-Quads).
+
+Files (optionally gzip-compressed) are split on statement boundaries into
+byte-bounded chunks which are uploaded concurrently to a dataset.
+
+Loads can be checkpointed to a local manifest, so that a load interrupted
+by a client or server failure resumes after the last acknowledged chunks.
+
+..Note:
+    The server scopes blank node labels to a single upload: a label found
+    in two chunks of a source would become two different nodes. Sources
+    holding blank nodes are refused, unless their labels are skolemized
+    (replaced by IRIs unique to the source, see `skolemize`) or kept as is
+    (only safe for sources which fit in a single chunk).
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+
+from .exceptions import IngestError, InvalidFileError
+
+
+# Default size of uploaded chunks (bytes).
+DEFAULT_INGEST_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Blank nodes handling modes.
+BLANK_NODES_MODES = ('error', 'skolemize', 'keep',)
+# Prefix of IRIs replacing blank node labels.
+SKOLEM_PREFIX = 'urn:fuseki-manager:bnode:'
+
+# literals and IRIs are matched to skip them, blank node labels can not end
+# with a dot (statement terminator)
+_BNODE_REGEX = re.compile(
+    rb'"(?:[^"\\]|\\.)*"|<[^>]*>|_:((?:[^\s.<"]|\.(?=[^\s.<"]))+)')
+
+_LINE_BASED_MIME_TYPES = {
+    '.nt': 'application/n-triples',
+    '.nq': 'application/n-quads',
+}
+
+
+def line_based_mime_type(path):
+    """Get the MIME type of a line-based RDF file from its extension.
+
+    :param str|Path path: File path, optionally ending with '.gz'.
+    :returns str: MIME type, None if not a line-based RDF file.
+    """
+    suffixes = [s.lower() for s in Path(path).suffixes]
+    if suffixes and suffixes[-1] == '.gz':
+        suffixes.pop()
+    if not suffixes:
+        return None
+    return _LINE_BASED_MIME_TYPES.get(suffixes[-1])
+
+
+def open_line_based(source):
+    """Open a line-based RDF source as a binary stream.
+
+    :param str|Path|file-like source:
+        File path (decompressed on the fly when ending with '.gz') or binary
+        file-like object.
+    :returns file-like: Binary stream.
+    :raises InvalidFileError: When 'source' path is not a file.
+    """
+    if isinstance(source, (str, Path)):
+        source = Path(source)
+        if not source.is_file():
+            raise InvalidFileError(str(source))
+        if source.suffix.lower() == '.gz':
+            return gzip.open(str(source), 'rb')
+        return open(str(source), 'rb')
+    if hasattr(source, 'readline'):
+        return source
+    raise InvalidFileError(str(source))
+
+
+def has_blank_nodes(data):
+    """Check whether line-based RDF data holds blank nodes.
+
+    :param bytes data: N-Triples or N-Quads data.
+    :returns bool:
+    """
+    return any(
+        match.group(1) is not None for match in _BNODE_REGEX.finditer(data))
+
+
+def skolemize(data, source_id):
+    """Replace blank node labels by IRIs unique to a source.
+
+    :param bytes data: N-Triples or N-Quads data.
+    :param str source_id: Source identifier, the same for all chunks of a
+        source.
+    :returns bytes: Data, '_:label' being replaced by
+        '<urn:fuseki-manager:bnode:{source_id}:label>'.
+    """
+    prefix = '<{}{}:'.format(SKOLEM_PREFIX, source_id).encode('utf-8')
+
+    def replace(match):
+        if match.group(1) is None:
+            return match.group()
+        return prefix + match.group(1) + b'>'
+
+    return _BNODE_REGEX.sub(replace, data)
+
+
+def _source_id(source):
+    """Identify a source: stable across loads for file paths."""
+    if isinstance(source, (str, Path)):
+        key = str(Path(source).resolve())
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return uuid.uuid4().hex[:16]
+
+
+class Chunk():
+    """A chunk of whole statements read from a line-based RDF source."""
+
+    def __init__(self, index, offset, data, nb_statements):
+        """
+        :param int index: Chunk index in source.
+        :param int offset: Offset of chunk's first byte in (uncompressed)
+            source.
+        :param bytes data: Chunk's content.
+        :param int nb_statements: Number of statements in chunk.
+        """
+        self.index = index
+        self.offset = offset
+        self.data = data
+        self.nb_statements = nb_statements
+
+    @property
+    def size(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return (
+            '<{self.__class__.__name__}>('
+            'index={self.index}'
+            ', offset={self.offset}'
+            ', size={self.size}'
+            ', nb_statements={self.nb_statements}'
+            ')'.format(self=self))
+
+
+def iter_chunks(stream, chunk_size=DEFAULT_INGEST_CHUNK_SIZE, *, offset=0,
+                index=0):
+    """Split a line-based RDF stream into chunks of whole statements.
+
+    A chunk holds at least one line, so a single line bigger than
+    'chunk_size' makes a bigger chunk.
+
+    :param file-like stream: Binary stream, read line by line.
+    :param int chunk_size: Maximum chunk size (bytes).
+    :param int offset: Current position of stream (bytes).
+    :param int index: Index of the first chunk read.
+    :returns generator: Chunk instances.
+    """
+    lines = []
+    size = 0
+    nb_statements = 0
+    for line in stream:
+        if lines and size + len(line) > chunk_size:
+            yield Chunk(index, offset, b''.join(lines), nb_statements)
+            index += 1
+            offset += size
+            lines, size, nb_statements = [], 0, 0
+        lines.append(line)
+        size += len(line)
+        stripped = line.strip()
+        if stripped and not stripped.startswith(b'#'):
+            nb_statements += 1
+    if lines:
+        yield Chunk(index, offset, b''.join(lines), nb_statements)
+
+
+class IngestProgress():
+    """Progress of an ingestion, given to progress callbacks."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.bytes = 0
+        self.statements = 0
+        self.chunks = 0
+        self.failed_chunks = 0
+        self.skipped_chunks = 0
+
+    @property
+    def elapsed(self):
+        """Time elapsed since ingestion started (seconds)."""
+        return time.monotonic() - self.started
+
+    @property
+    def bytes_per_second(self):
+        elapsed = self.elapsed
+        return self.bytes / elapsed if elapsed > 0 else 0.
+
+    @property
+    def statements_per_second(self):
+        elapsed = self.elapsed
+        return self.statements / elapsed if elapsed > 0 else 0.
+
+    def __repr__(self):
+        return (
+            '<{self.__class__.__name__}>('
+            'bytes={self.bytes}'
+            ', statements={self.statements}'
+            ', chunks={self.chunks}'
+            ', failed_chunks={self.failed_chunks}'
+            ', skipped_chunks={self.skipped_chunks}'
+            ', elapsed={self.elapsed:.1f}'
+            ')'.format(self=self))
+
+
+class Checkpoint():
+    """Local manifest of the chunks acknowledged by the server during a load.
+
+    The manifest is an append-only JSON lines journal: one record per file
+    (identified by its resolved path, size and modification time) and per
+    acknowledged chunk (offset, size, SHA-256 of content and result returned
+    by the data endpoint). Each record is flushed to disk when written, and
+    an incomplete last line (process killed while writing) is ignored.
+    """
+
+    def __init__(self, path, *, ds_name, chunk_size):
+        """
+        :param str|Path path: Manifest file path, created if missing.
+        :param str ds_name: Dataset's name the load targets.
+        :param int chunk_size: Maximum chunk size (bytes) of the load.
+        :raises ValueError:
+            When the manifest was written for another dataset or chunk size.
+        """
+        self.path = Path(path)
+        self.ds_name = ds_name
+        self.chunk_size = chunk_size
+        self._files = {}
+        self._read()
+        self._fobj = open(str(self.path), 'a', encoding='utf-8')
+        if self.path.stat().st_size == 0:
+            self._append({'ds_name': ds_name, 'chunk_size': chunk_size})
+        else:
+            # terminate a record left incomplete by an interrupted write
+            with open(str(self.path), 'rb') as fobj:
+                fobj.seek(-1, os.SEEK_END)
+                if fobj.read(1) != b'\n':
+                    self._fobj.write('\n')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._fobj.close()
+
+    def _read(self):
+        if not self.path.is_file():
+            return
+        with open(str(self.path), encoding='utf-8') as fobj:
+            for line in fobj:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # interrupted while writing this record
+                    continue
+                if 'chunk_size' in record:
+                    if (record['ds_name'], record['chunk_size']) != (
+                            self.ds_name, self.chunk_size):
+                        raise ValueError(
+                            'Checkpoint {} was written for dataset {} with '
+                            'chunk size {}'.format(
+                                self.path, record['ds_name'],
+                                record['chunk_size']))
+                elif 'index' in record:
+                    self._files[record['file']]['chunks'][
+                        record['index']] = record
+                elif record.get('completed'):
+                    self._files[record['file']]['completed'] = True
+                else:
+                    self._files[record['file']] = {
+                        'size': record['size'], 'mtime': record['mtime'],
+                        'chunks': {}, 'completed': False}
+
+    def _append(self, record):
+        self._fobj.write(json.dumps(record) + '\n')
+        self._fobj.flush()
+        os.fsync(self._fobj.fileno())
+
+    @staticmethod
+    def file_key(path):
+        """Get the key identifying a file in the manifest."""
+        return str(Path(path).resolve())
+
+    def start_file(self, path):
+        """Register a file before loading it.
+
+        Previous records of the file are discarded if it has been modified.
+
+        :param str|Path path: File path.
+        :returns str: File key.
+        """
+        key = self.file_key(path)
+        stat = Path(path).stat()
+        state = self._files.get(key)
+        if state is None or (state['size'], state['mtime']) != (
+                stat.st_size, stat.st_mtime):
+            self._files[key] = {
+                'size': stat.st_size, 'mtime': stat.st_mtime,
+                'chunks': {}, 'completed': False}
+            self._append({
+                'file': key, 'size': stat.st_size, 'mtime': stat.st_mtime})
+        return key
+
+    def is_completed(self, key):
+        return self._files[key]['completed']
+
+    def resume_point(self, key):
+        """Get where to resume reading a file: end of the contiguous
+        sequence of acknowledged chunks from its beginning.
+
+        :param str key: File key.
+        :returns tuple: (offset, index) of the first chunk to read.
+        """
+        chunks = self._files[key]['chunks']
+        offset, index = 0, 0
+        while index in chunks:
+            offset = chunks[index]['offset'] + chunks[index]['size']
+            index += 1
+        return offset, index
+
+    def is_acknowledged(self, key, chunk, digest):
+        """Check whether a chunk was already acknowledged by the server.
+
+        :param str key: File key.
+        :param Chunk chunk: Chunk read from file.
+        :param str digest: SHA-256 hex digest of chunk's content.
+        :returns bool:
+        """
+        record = self._files[key]['chunks'].get(chunk.index)
+        return (
+            record is not None and record['offset'] == chunk.offset and
+            record['sha256'] == digest)
+
+    def record_chunk(self, key, chunk, digest, result):
+        """Record a chunk acknowledged by the server.
+
+        :param str key: File key.
+        :param Chunk chunk: Chunk uploaded.
+        :param str digest: SHA-256 hex digest of chunk's content.
+        :param dict result: Details on data inserted, JSON format.
+        """
+        record = {
+            'file': key, 'index': chunk.index, 'offset': chunk.offset,
+            'size': chunk.size, 'sha256': digest, 'result': result}
+        self._files[key]['chunks'][chunk.index] = record
+        self._append(record)
+
+    def record_completed(self, key):
+        """Record a file whose chunks have all been acknowledged."""
+        self._files[key]['completed'] = True
+        self._append({'file': key, 'completed': True})
+
+    def results(self, key):
+        """Get the results of the acknowledged chunks of a file.
+
+        :param str key: File key.
+        :returns list[dict]: Results in chunk order, JSON format.
+        """
+        chunks = self._files[key]['chunks']
+        return [chunks[index]['result'] for index in sorted(chunks)]
+
+
+class _Job():
+    """A chunk to upload, with its source file state."""
+
+    def __init__(self, source, mime_type, chunk, file_state):
+        self.source = source
+        self.source_id = file_state['source_id']
+        self.mime_type = mime_type
+        self.chunk = chunk
+        self.file_state = file_state
+        self.digest = None
+
+
+class BulkLoader():
+    """Upload line-based RDF files to a dataset in concurrent chunks.
+
+    Chunk size and number of workers can be tuned to find the server's
+    ingestion sweet spot. At most two chunks per worker are held in memory.
+
+    Blank nodes can not span chunks (see module's note): sources holding
+    blank nodes are refused, unless 'blank_nodes' is 'skolemize' or 'keep'.
+    Sources are checked before any of their chunks is uploaded (streams must
+    then be seekable).
+
+    When a load stops on an error, uploads in flight still end, and are
+    checkpointed, before the error is raised.
+
+    With a checkpoint manifest, sources must be file paths. A rerun with the
+    same manifest skips completed files, resumes reading each file after
+    its last contiguous acknowledged chunk and skips chunks acknowledged out
+    of order (same offset and content hash).
+    """
+
+    def __init__(self, data_client, ds_name, *,
+                 chunk_size=DEFAULT_INGEST_CHUNK_SIZE, workers=4,
+                 progress_callback=None, checkpoint_path=None,
+                 blank_nodes='error'):
+        """
+        :param FusekiDataClient data_client: Client used to upload chunks.
+        :param str ds_name: Dataset's name.
+        :param int chunk_size: Maximum chunk size (bytes).
+        :param int workers: Number of concurrent uploads. (default 4)
+        :param callable progress_callback:
+            Called with an IngestProgress instance after each chunk upload.
+        :param str|Path checkpoint_path:
+            Checkpoint manifest path, to make the load resumable.
+            (default None)
+        :param str blank_nodes: Blank nodes handling: 'error' to refuse
+            sources holding blank nodes, 'skolemize' to replace their labels
+            by IRIs unique to each source, 'keep' to upload them as is.
+            (default 'error')
+        """
+        if workers < 1:
+            raise ValueError('Invalid workers value: {}'.format(workers))
+        if blank_nodes not in BLANK_NODES_MODES:
+            raise ValueError(
+                'Invalid blank_nodes value: {}'.format(blank_nodes))
+        self._data_client = data_client
+        self.ds_name = ds_name
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.progress_callback = progress_callback
+        self.checkpoint_path = checkpoint_path
+        self.blank_nodes = blank_nodes
+
+    def _iter_jobs(self, sources, mime_type, checkpoint, progress):
+        """Generator over chunks to upload."""
+        for source in sources:
+            src_mime_type = mime_type
+            if src_mime_type is None:
+                src_mime_type = line_based_mime_type(
+                    source if isinstance(source, (str, Path)) else '')
+            if src_mime_type is None:
+                raise InvalidFileError(
+                    'Not a line-based RDF file: {}'.format(source))
+
+            file_state = {'key': None, 'pending': 0, 'read': False,
+                          'failed': False, 'source_id': _source_id(source)}
+            offset, index = 0, 0
+            if checkpoint is not None:
+                if not isinstance(source, (str, Path)):
+                    raise InvalidFileError(
+                        'Checkpointed loads require file paths: {}'.format(
+                            source))
+                key = checkpoint.start_file(source)
+                file_state['key'] = key
+                if checkpoint.is_completed(key):
+                    continue
+                offset, index = checkpoint.resume_point(key)
+
+            stream = open_line_based(source)
+            try:
+                if offset:
+                    stream.seek(offset)
+                if self.blank_nodes == 'error':
+                    self._check_blank_nodes(source, stream)
+                for chunk in iter_chunks(
+                        stream, self.chunk_size, offset=offset, index=index):
+                    job = _Job(source, src_mime_type, chunk, file_state)
+                    if checkpoint is not None:
+                        job.digest = hashlib.sha256(chunk.data).hexdigest()
+                        if checkpoint.is_acknowledged(
+                                file_state['key'], chunk, job.digest):
+                            progress.skipped_chunks += 1
+                            continue
+                    file_state['pending'] += 1
+                    yield job
+            finally:
+                if stream is not source:
+                    stream.close()
+            file_state['read'] = True
+            self._check_completed(file_state, checkpoint)
+
+    def _check_blank_nodes(self, source, stream):
+        """Refuse a source holding blank nodes, before any of its chunks is
+        uploaded. Stream is read, then rewound."""
+        if not stream.seekable():
+            raise InvalidFileError(
+                'Unseekable stream, can not be checked for blank nodes: '
+                'skolemize or keep them with "blank_nodes"')
+        position = stream.tell()
+        for chunk in iter_chunks(stream, self.chunk_size):
+            if has_blank_nodes(chunk.data):
+                raise InvalidFileError(
+                    'Blank nodes in {}: they can not span chunks, '
+                    'skolemize or keep them with "blank_nodes"'.format(
+                        source))
+        stream.seek(position)
+
+    @staticmethod
+    def _check_completed(file_state, checkpoint):
+        if (checkpoint is not None and file_state['read'] and
+                not file_state['pending'] and not file_state['failed']):
+            checkpoint.record_completed(file_state['key'])
+
+    def _upload(self, job):
+        data = job.chunk.data
+        if self.blank_nodes == 'skolemize':
+            data = skolemize(data, job.source_id)
+        return self._data_client.upload_files(
+            self.ds_name, [data], job.mime_type)
+
+    def _handle_done(self, futures, jobs, progress, failures, checkpoint):
+        for future in futures:
+            job = jobs.pop(future)
+            chunk = job.chunk
+            job.file_state['pending'] -= 1
+            exc = future.exception()
+            if exc is None:
+                progress.bytes += chunk.size
+                progress.statements += chunk.nb_statements
+                progress.chunks += 1
+                if checkpoint is not None:
+                    checkpoint.record_chunk(
+                        job.file_state['key'], chunk, job.digest,
+                        future.result())
+            else:
+                progress.failed_chunks += 1
+                job.file_state['failed'] = True
+                failures.append((job.source, chunk.index, chunk.offset, exc))
+            self._check_completed(job.file_state, checkpoint)
+            if self.progress_callback is not None:
+                self.progress_callback(progress)
+
+    def load(self, sources, mime_type=None):
+        """Upload a list of line-based RDF sources.
+
+        :param list sources:
+            File paths ('.nt', '.nq', optionally '.gz') or binary streams.
+        :param str mime_type:
+            MIME type of all sources, guessed from file extension if None.
+        :returns IngestProgress: Final progress of the ingestion.
+        :raises InvalidFileError:
+        :raises IngestError: When some chunks failed to upload.
+        """
+        checkpoint = None
+        if self.checkpoint_path is not None:
+            checkpoint = Checkpoint(
+                self.checkpoint_path, ds_name=self.ds_name,
+                chunk_size=self.chunk_size)
+        progress = IngestProgress()
+        failures = []
+        jobs = {}
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                try:
+                    for job in self._iter_jobs(
+                            sources, mime_type, checkpoint, progress):
+                        # bound the number of chunks held in memory
+                        if len(jobs) >= 2 * self.workers:
+                            done, _ = wait(jobs, return_when=FIRST_COMPLETED)
+                            self._handle_done(
+                                done, jobs, progress, failures, checkpoint)
+                        jobs[executor.submit(self._upload, job)] = job
+                finally:
+                    # on errors too, in-flight uploads end and are recorded
+                    done, _ = wait(jobs)
+                    self._handle_done(
+                        done, jobs, progress, failures, checkpoint)
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+        if failures:
+            raise IngestError(failures, progress)
+        return progress
@@ -0,0 +1,115 @@
+"""Pluggable JSON decoding of responses bodies.
+
+The faster `orjson` backend is used when installed, with the standard library
+`json` module as fallback. `ujson` is only used when explicitly selected: it
+may round floats differently from the standard library (e.g. values with many
+significant digits).
+
+Large bodies can be decoded by an executor, through clients deferred methods
+(e.g. `FusekiSPARQLClient.raw_query_async`) returning futures: the calling
+thread can go on while a huge result is decoded. Pure-Python threads still
+share the GIL while decoding, so use a `ProcessPoolExecutor` to keep other
+threads running too (decoded objects are then pickled back to the calling
+process).
+"""
+
+import json
+from concurrent.futures import Future
+
+
+def stdlib_loads(content):
+    """Decode JSON bytes with the standard library `json` module."""
+    if isinstance(content, bytes):
+        content = content.decode('utf-8')
+    return json.loads(content)
+
+
+def _import_backend(name):
+    """Get a JSON backend's loads function, None if not installed."""
+    if name == 'json':
+        return stdlib_loads
+    try:
+        module = __import__(name)
+    except ImportError:
+        return None
+    return module.loads
+
+
+# Available backends.
+BACKENDS = ('orjson', 'ujson', 'json',)
+# Backends tried, in order, by 'auto' decoder.
+AUTO_BACKENDS = ('orjson', 'json',)
+
+
+def get_loads(backend='auto'):
+    """Get a JSON loads function.
+
+    :param str backend: Backend name ('orjson', 'ujson' or 'json'), 'auto'
+        for 'orjson' if installed, else 'json'. (default 'auto')
+    :returns callable: Function decoding bytes to Python objects.
+    :raises ValueError: When backend is unknown or not installed.
+    """
+    names = AUTO_BACKENDS if backend == 'auto' else (backend,)
+    for name in names:
+        if name not in BACKENDS:
+            raise ValueError('Unknown JSON backend: {}'.format(name))
+        loads = _import_backend(name)
+        if loads is not None:
+            return loads
+    raise ValueError('JSON backend not installed: {}'.format(backend))
+
+
+class JSONDecoder():
+    """Decode JSON responses bodies, optionally in an executor."""
+
+    def __init__(self, loads='auto', *, executor=None,
+                 offload_size=8 * 1024 * 1024):
+        """
+        :param str|callable loads: Backend name (see `get_loads`) or function
+            decoding bytes. (default 'auto')
+        :param Executor executor: Executor decoding bodies of at least
+            'offload_size' bytes, None to always decode in calling thread.
+            A `ProcessPoolExecutor` requires a picklable 'loads' function.
+        :param int offload_size: Minimum size (bytes) of bodies decoded by
+            executor. (default 8 MiB)
+        """
+        self.loads = get_loads(loads) if isinstance(loads, str) else loads
+        self.executor = executor
+        self.offload_size = offload_size
+
+    def __repr__(self):
+        return (
+            '<{self.__class__.__name__}>('
+            'loads={loads}'
+            ', executor={self.executor}'
+            ', offload_size={self.offload_size}'
+            ')'.format(
+                self=self,
+                loads=getattr(self.loads, '__module__', self.loads)))
+
+    def decode_async(self, content):
+        """Decode a JSON body, in executor if large enough.
+
+        :param bytes content: JSON body.
+        :returns Future: Future of decoded Python object.
+        """
+        if self.executor is not None and len(content) >= self.offload_size:
+            return self.executor.submit(self.loads, content)
+        future = Future()
+        try:
+            future.set_result(self.loads(content))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+    def decode(self, content):
+        """Decode a JSON body, in executor if large enough, and wait for it.
+
+        The calling thread is blocked while decoding: use `decode_async` to
+        go on meanwhile.
+
+        :param bytes content: JSON body.
+        :returns: Decoded Python object.
+        :raises ValueError: When body is not valid JSON.
+        """
+        return self.decode_async(content).result()
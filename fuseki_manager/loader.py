@@ -0,0 +1,218 @@
+"""Automatic batching of `value` and `triples` lookups.
+
+Lookups issued within a short time window are grouped by shape (which of
+subject, predicate and object are given) and sent as a single SELECT query
+per shape, with a multi-row 'VALUES' block. Each row carries the index of
+its lookup, so results are fanned back to each caller's future.
+
+A loader also memoizes lookups: the same lookup is only fetched once. It is
+meant to be short-lived (e.g. one loader per processed request), so that
+memoized results do not get stale.
+"""
+
+import threading
+from concurrent.futures import Future
+
+from .utils import is_url, parse_url
+from .exceptions import EmptyDBError, UniquenessDBError, ArgumentError
+
+
+_VARS = ('s', 'p', 'o',)
+
+
+def _format_term(value):
+    """Format a term for a 'VALUES' block: URLs are enclosed in '<>',
+    other values (prefixed names, literals) are left as is."""
+    return parse_url(value) if is_url(value) else value
+
+
+class _Lookup():
+
+    def __init__(self, terms, is_value, raise_if_empty, raise_if_many):
+        self.key = (terms, is_value, raise_if_empty, raise_if_many)
+        self.terms = terms
+        self.is_value = is_value
+        self.raise_if_empty = raise_if_empty
+        self.raise_if_many = raise_if_many
+        self.future = Future()
+
+    @property
+    def shape(self):
+        return tuple(term is not None for term in self.terms)
+
+    def resolve(self, triples):
+        """Set lookup's result from its matching triples."""
+        if not self.is_value:
+            self.future.set_result(triples)
+            return
+        if not triples:
+            if self.raise_if_empty:
+                self.future.set_exception(EmptyDBError())
+            else:
+                self.future.set_result(None)
+            return
+        if len(triples) > 1 and self.raise_if_many:
+            self.future.set_exception(UniquenessDBError())
+            return
+        # the unknown term (subject when all terms are given, as `value`)
+        idx = self.terms.index(None) if None in self.terms else 0
+        self.future.set_result(triples[0][idx])
+
+
+class ValueLoader():
+    """Collect `value` and `triples` lookups and send them in batches.
+
+    Lookups return futures. Pending lookups are sent when 'max_batch_size'
+    lookups are pending, when 'window' seconds elapsed since the first one,
+    or explicitly by `dispatch`.
+    """
+
+    def __init__(self, sparql_client, *, window=0.005, max_batch_size=100):
+        """
+        :param FusekiSPARQLClient sparql_client: Client used for queries.
+        :param float window: Time (seconds) lookups are collected before
+            being sent, None to only send them on `dispatch` (or when batch
+            is full). (default 0.005)
+        :param int max_batch_size: Maximum number of lookups per query.
+            (default 100)
+        """
+        if max_batch_size < 1:
+            raise ValueError(
+                'Invalid max_batch_size value: {}'.format(max_batch_size))
+        self._client = sparql_client
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._memo = {}
+        self._pending = []
+        self._timer = None
+        self._lock = threading.Lock()
+        self.nb_queries = 0
+
+    def __repr__(self):
+        return (
+            '<{self.__class__.__name__}>('
+            'window={self.window}'
+            ', max_batch_size={self.max_batch_size}'
+            ')'.format(self=self))
+
+    def _load(self, terms, is_value, raise_if_empty, raise_if_many):
+        key = (terms, is_value, raise_if_empty, raise_if_many)
+        with self._lock:
+            lookup = self._memo.get(key)
+            if lookup is not None:
+                return lookup.future
+            lookup = _Lookup(terms, is_value, raise_if_empty, raise_if_many)
+            self._memo[lookup.key] = lookup
+            self._pending.append(lookup)
+            is_full = len(self._pending) >= self.max_batch_size
+            if (not is_full and self.window is not None and
+                    self._timer is None):
+                self._timer = threading.Timer(self.window, self.dispatch)
+                self._timer.daemon = True
+                self._timer.start()
+        if is_full:
+            self.dispatch()
+        return lookup.future
+
+    def load_value(self, sbj=None, pred=None, obj=None, *,
+                   raise_if_empty=True, raise_if_many=True):
+        """Get a value for a pair of two criteria, like
+        `FusekiSPARQLClient.value`.
+
+        :returns Future: Future of the value (None when no value is found
+            and 'raise_if_empty' is False). Its result raises EmptyDBError or
+            UniquenessDBError.
+        :raises ArgumentError: When less than two criteria are given.
+        """
+        terms = (sbj, pred, obj,)
+        if sum(term is not None for term in terms) < 2:
+            msg = "Invalid arguments ({}, {}, {})"
+            raise ArgumentError(msg.format(sbj, pred, obj))
+        return self._load(terms, True, raise_if_empty, raise_if_many)
+
+    def load_triples(self, sbj=None, pred=None, obj=None):
+        """Get triples that match the given pattern, like
+        `FusekiSPARQLClient.triples`.
+
+        :returns Future: Future of the list of (subject, predicate, object)
+            values.
+        """
+        return self._load((sbj, pred, obj,), False, False, False)
+
+    def _wait(self, future):
+        """Wait for a lookup's result, sending pending lookups first when
+        no timer would send them."""
+        if not future.done():
+            with self._lock:
+                must_dispatch = self._timer is None
+            if must_dispatch:
+                self.dispatch()
+        return future.result()
+
+    def value(self, *args, **kwargs):
+        """Get a value, waiting for its batch. See `load_value`."""
+        return self._wait(self.load_value(*args, **kwargs))
+
+    def triples(self, *args, **kwargs):
+        """Get triples, waiting for their batch. See `load_triples`."""
+        return self._wait(self.load_triples(*args, **kwargs))
+
+    def clear(self):
+        """Forget memoized lookups."""
+        with self._lock:
+            self._memo = {
+                key: lookup for key, lookup in self._memo.items()
+                if not lookup.future.done()}
+
+    def _build_query(self, lookups):
+        bound_vars = [
+            var for var, bound in zip(_VARS, lookups[0].shape) if bound]
+        rows = ' '.join(
+            '({})'.format(' '.join(
+                [str(idx)] + [
+                    _format_term(term) for term in lookup.terms
+                    if term is not None]))
+            for idx, lookup in enumerate(lookups))
+        return (
+            'SELECT ?k ?s ?p ?o WHERE {{ '
+            'VALUES (?k {vars}) {{ {rows} }} ?s ?p ?o }}'.format(
+                vars=' '.join('?' + var for var in bound_vars),
+                rows=rows))
+
+    def _send(self, lookups):
+        try:
+            jsonres = self._client._exec_query(
+                self._client._prepare_query(self._build_query(lookups)),
+                method='POST')
+            self.nb_queries += 1
+            results = [[] for _ in lookups]
+            for binding in jsonres['results']['bindings']:
+                results[int(binding['k']['value'])].append(
+                    tuple(binding[var]['value'] for var in _VARS))
+            for lookup, triples in zip(lookups, results):
+                lookup.resolve(triples)
+        except Exception as exc:
+            # unresolved lookups fail, and are not memoized, so that they
+            # can be retried
+            failed = [
+                lookup for lookup in lookups if not lookup.future.done()]
+            with self._lock:
+                for lookup in failed:
+                    if self._memo.get(lookup.key) is lookup:
+                        del self._memo[lookup.key]
+            for lookup in failed:
+                lookup.future.set_exception(exc)
+
+    def dispatch(self):
+        """Send pending lookups now, one query per shape and batch."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        by_shape = {}
+        for lookup in pending:
+            by_shape.setdefault(lookup.shape, []).append(lookup)
+        for lookups in by_shape.values():
+            for idx in range(0, len(lookups), self.max_batch_size):
+                self._send(lookups[idx:idx + self.max_batch_size])
@@ -0,0 +1,205 @@
+"""Streaming 'multipart/form-data' request body encoder.
+
+The body is generated chunk by chunk while it is sent, so the memory used by
+an upload does not depend on the size of the files uploaded.
+"""
+
+import gzip
+import io
+import mmap
+import os
+import uuid
+from pathlib import Path
+
+from .utils import DEFAULT_CHUNK_SIZE
+from .exceptions import InvalidFileError
+
+
+_BYTES_LIKE = (bytes, bytearray, memoryview, mmap.mmap,)
+
+
+class _Part():
+    """A file part of a multipart body."""
+
+    def __init__(self, name, source, mime_type):
+        self.name = name
+        self.mime_type = mime_type
+        self.filename = 'unknown'
+        self.size = None
+        self._owned_file = None
+
+        if isinstance(source, (str, Path)):
+            source = Path(source)
+            if not source.is_file():
+                raise InvalidFileError(str(source))
+            self.filename = source.name
+            self.size = source.stat().st_size
+        elif isinstance(source, _BYTES_LIKE):
+            with memoryview(source) as view:
+                self.size = view.nbytes
+        elif isinstance(source, gzip.GzipFile):
+            # decompressed on the fly: size is unknown, and content is no
+            # longer gzip (server must not decompress it)
+            filename = _file_name(source)
+            if filename.endswith('.gz'):
+                filename = filename[:-len('.gz')]
+            self.filename = filename
+        elif hasattr(source, 'read'):
+            self.filename = _file_name(source)
+            self.size = _remaining_size(source)
+        elif hasattr(source, '__iter__'):
+            # generator or any iterable of bytes chunks: size is unknown
+            pass
+        else:
+            raise InvalidFileError(str(source))
+        self.source = source
+
+    @property
+    def header(self):
+        return (
+            'Content-Disposition: form-data; name="{}"; filename="{}"\r\n'
+            'Content-Type: {}\r\n\r\n'.format(
+                self.name, self.filename.replace('"', '%22'), self.mime_type)
+        ).encode('utf-8')
+
+    def iter_data(self, chunk_size):
+        """Generator over part's data chunks."""
+        source = self.source
+        if isinstance(source, Path):
+            self._owned_file = open(str(source), 'rb')
+            try:
+                yield from _iter_file(self._owned_file, chunk_size)
+            finally:
+                self.close()
+        elif isinstance(source, _BYTES_LIKE):
+            # slices of a memoryview share the source's buffer (no copy)
+            view = memoryview(source).cast('B')
+            for start in range(0, view.nbytes, chunk_size):
+                yield view[start:start + chunk_size]
+        elif hasattr(source, 'read'):
+            yield from _iter_file(source, chunk_size)
+        else:
+            for chunk in source:
+                if chunk:
+                    yield chunk
+
+    def close(self):
+        """Close the file opened by the part, if any."""
+        if self._owned_file is not None:
+            self._owned_file.close()
+            self._owned_file = None
+
+
+def _file_name(fobj):
+    name = getattr(fobj, 'name', None)
+    if isinstance(name, str):
+        return Path(name).name
+    return 'unknown'
+
+
+def _remaining_size(fobj):
+    """Get the number of bytes left to read in a file-like object."""
+    try:
+        position = fobj.tell()
+        try:
+            return os.fstat(fobj.fileno()).st_size - position
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            pass
+        if fobj.seekable():
+            size = fobj.seek(0, io.SEEK_END) - position
+            fobj.seek(position)
+            return size
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        pass
+    return None
+
+
+def _iter_file(fobj, chunk_size):
+    while True:
+        chunk = fobj.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+class MultipartEncoder():
+    """Iterable 'multipart/form-data' request body, for `requests`' 'data'.
+
+    Sources can be file paths (opened when their turn comes and closed as
+    soon as they are sent), binary file-like objects, bytes-like objects
+    (bytes, bytearray, memoryview, mmap: sent without copy) or iterables of
+    bytes chunks (e.g. generators).
+
+    When every source size is known, `len` gives the body size and the
+    request is sent with a 'Content-Length' header, otherwise chunked
+    transfer encoding is used.
+    """
+
+    def __init__(self, fields, *, boundary=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        :param list[tuple] fields:
+            List of (field name, source, MIME type) tuples.
+        :param str boundary: Parts boundary. (default: random)
+        :param int chunk_size: Size of chunks read from sources (bytes).
+        :raises InvalidFileError: When a source is not supported.
+        """
+        self.boundary = boundary or uuid.uuid4().hex
+        self.chunk_size = chunk_size
+        self._parts = [
+            _Part(name, source, mime_type)
+            for name, source, mime_type in fields]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def content_type(self):
+        """'Content-Type' header value of the request."""
+        return 'multipart/form-data; boundary={}'.format(self.boundary)
+
+    @property
+    def headers(self):
+        """Request headers for this body."""
+        return {'Content-Type': self.content_type}
+
+    @property
+    def _delimiter(self):
+        return '--{}\r\n'.format(self.boundary).encode('utf-8')
+
+    @property
+    def _closing(self):
+        return '--{}--\r\n'.format(self.boundary).encode('utf-8')
+
+    @property
+    def len(self):
+        """Total body size (bytes), None if a source size is unknown.
+
+        (`requests` reads this attribute to set 'Content-Length'.)
+        """
+        size = len(self._closing)
+        for part in self._parts:
+            if part.size is None:
+                return None
+            size += (
+                len(self._delimiter) + len(part.header) + part.size +
+                len(b'\r\n'))
+        return size
+
+    def __iter__(self):
+        try:
+            for part in self._parts:
+                yield self._delimiter + part.header
+                yield from part.iter_data(self.chunk_size)
+                yield b'\r\n'
+            yield self._closing
+        finally:
+            self.close()
+
+    def close(self):
+        """Close every file opened by the encoder."""
+        for part in self._parts:
+            part.close()
@@ -0,0 +1,231 @@
+"""Persistent query results cache, shared by processes on the same host.
+
+Results are stored zlib-compressed in a SQLite database, keyed by dataset,
+prepared query and dataset's data version. The data version is derived from
+the server start time and the dataset's write endpoints requests counters
+(see `data_version`): any update, upload or graph store write changes it,
+so cached results of a modified dataset are never returned again (and
+eventually evicted). Results are only cached when no write is in progress
+and the data version did not change while the query ran.
+
+Size is bounded: least recently used entries are evicted once total
+compressed size exceeds 'max_size'.
+
+..Note:
+    Writes not going through the server (offline TDB loading...) are not
+    seen. Requests to read-write graph store endpoints are all counted as
+    writes, which may invalidate entries more often than needed.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+import weakref
+import zlib
+from pathlib import Path
+
+
+# Operations of endpoints that can modify a dataset.
+WRITE_OPERATIONS = ('Update', 'Upload', 'GSP_RW', 'Quads_RW',)
+
+
+def _write_endpoints(ds_stats):
+    return [
+        endpoint for endpoint in ds_stats.get('endpoints', {}).values()
+        if endpoint.get('operation') in WRITE_OPERATIONS]
+
+
+def count_write_requests(ds_stats):
+    """Count requests to a dataset's write endpoints.
+
+    :param dict ds_stats: Dataset's statistics, JSON format.
+    :returns int: Number of write requests since server start.
+    """
+    return sum(
+        endpoint.get('Requests', 0) for endpoint in _write_endpoints(ds_stats))
+
+
+def count_pending_write_requests(ds_stats):
+    """Count requests to a dataset's write endpoints still in progress.
+
+    Fuseki counts a request when it starts, and counts it as good or bad
+    when it ends.
+
+    :param dict ds_stats: Dataset's statistics, JSON format.
+    :returns int: Number of write requests started but not finished.
+    """
+    return sum(
+        endpoint.get('Requests', 0) - endpoint.get('RequestsGood', 0) -
+        endpoint.get('RequestsBad', 0)
+        for endpoint in _write_endpoints(ds_stats))
+
+
+# Last write requests counters seen, by admin client and dataset name.
+_last_writes = weakref.WeakKeyDictionary()
+_last_writes_lock = threading.Lock()
+
+
+def data_version(admin_client, ds_name):
+    """Compute a dataset's data version token.
+
+    Only statistics are requested: server start time is requested once for
+    admin client's lifetime (see `FusekiAdminClient.server_start_time`), and
+    again when write requests counters go down (counters are reset on server
+    restart).
+
+    :param FusekiAdminClient admin_client: Client used to get statistics.
+    :param str ds_name: Dataset's name.
+    :returns str: Token, changed by any write request (or server restart),
+        None while a write request is in progress: its changes may not be
+        committed yet, so data can not be versioned.
+    """
+    stats = admin_client.get_stats(ds_name)
+    stats = stats.get('datasets', stats).get('/{}'.format(ds_name), {})
+    writes = count_write_requests(stats)
+    with _last_writes_lock:
+        seen = _last_writes.setdefault(admin_client, {})
+        restarted = writes < seen.get(ds_name, 0)
+        seen[ds_name] = writes
+    start = admin_client.server_start_time(refresh=restarted)
+    if count_pending_write_requests(stats):
+        return None
+    return '{}#{}'.format(start, writes)
+
+
+class QueryCache():
+    """SQLite-backed, size-bounded, compressed query results cache."""
+
+    def __init__(self, path, *, max_size=256 * 1024 * 1024,
+                 compress_level=6, timeout=10.):
+        """
+        :param str|Path path: SQLite database file path, created if needed.
+        :param int max_size:
+            Maximum total size of compressed entries (bytes). (default 256 MiB)
+        :param int compress_level: zlib compression level. (default 6)
+        :param float timeout:
+            Time (seconds) to wait for a lock held by another process.
+            (default 10)
+        """
+        self.path = Path(path)
+        self.max_size = max_size
+        self.compress_level = compress_level
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, ds_name TEXT, version TEXT, '
+                'data BLOB, size INTEGER, accessed REAL)')
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS entries_accessed '
+                'ON entries (accessed)')
+
+    def __repr__(self):
+        return (
+            '<{self.__class__.__name__}>('
+            'path="{self.path}"'
+            ', max_size={self.max_size}'
+            ')'.format(self=self))
+
+    def _connect(self):
+        """Get calling thread's connection (SQLite connections can not be
+        shared between threads)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=self.timeout)
+            # concurrent readers while a process writes
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _key(ds_name, query, version):
+        return hashlib.sha256(
+            '\0'.join((ds_name, query, version)).encode('utf-8')).hexdigest()
+
+    def get(self, ds_name, query, version):
+        """Get cached results.
+
+        :param str ds_name: Dataset's name.
+        :param str query: Prepared query.
+        :param str version: Dataset's data version token.
+        :returns bytes|None: Results body, None if not cached.
+        """
+        key = self._key(ds_name, query, version)
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT data FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                'UPDATE entries SET accessed = ? WHERE key = ?',
+                (time.time(), key,))
+        return zlib.decompress(row[0])
+
+    def set(self, ds_name, query, version, content):
+        """Store results, and evict least recently used entries if needed.
+
+        Entries of older data versions of the dataset are removed.
+
+        :param str ds_name: Dataset's name.
+        :param str query: Prepared query.
+        :param str version: Dataset's data version token.
+        :param bytes content: Results body.
+        """
+        data = zlib.compress(content, self.compress_level)
+        if len(data) > self.max_size:
+            return
+        key = self._key(ds_name, query, version)
+        with self._connect() as conn:
+            conn.execute(
+                'DELETE FROM entries WHERE ds_name = ? AND version != ?',
+                (ds_name, version,))
+            conn.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                (key, ds_name, version, data, len(data), time.time(),))
+            self._evict(conn)
+
+    def _evict(self, conn):
+        total, = conn.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()
+        if total <= self.max_size:
+            return
+        excess = total - self.max_size
+        keys = []
+        for key, size in conn.execute(
+                'SELECT key, size FROM entries ORDER BY accessed'):
+            keys.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany('DELETE FROM entries WHERE key = ?', keys)
+
+    def invalidate(self, ds_name=None):
+        """Remove cached results of a dataset, or of all datasets.
+
+        :param str ds_name: Dataset's name, None for all datasets.
+        """
+        with self._connect() as conn:
+            if ds_name is None:
+                conn.execute('DELETE FROM entries')
+            else:
+                conn.execute(
+                    'DELETE FROM entries WHERE ds_name = ?', (ds_name,))
+
+    @property
+    def stats(self):
+        """Number of entries ('entries') and total compressed size ('size',
+        bytes)."""
+        with self._connect() as conn:
+            entries, size = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) '
+                'FROM entries').fetchone()
+        return {'entries': entries, 'size': size}
+
+    def close(self):
+        """Close calling thread's connection."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
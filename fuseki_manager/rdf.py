@@ -0,0 +1,100 @@
+"""Line-based RDF (N-Triples / N-Quads) helpers.
+
+Terms are kept in their N-Triples lexical form (IRIs enclosed in '<>',
+literals quoted with their optional language tag or datatype, blank nodes
+prefixed by '_:') so that parsed statements can be written back without
+loss.
+"""
+
+import re
+
+
+_IRI = r'<[^>]*>'
+_BNODE = r'_:\S+'
+_LITERAL = (
+    r'"(?:[^"\\]|\\.)*"'
+    r'(?:@[a-zA-Z]+(?:-[a-zA-Z0-9]+)*|\^\^<[^>]*>)?')
+_TERM = r'({iri}|{bnode}|{literal})'.format(
+    iri=_IRI, bnode=_BNODE, literal=_LITERAL)
+
+_STATEMENT_REGEX = re.compile(
+    r'^\s*' + r'\s*'.join([_TERM, _TERM, _TERM]) +
+    r'(?:\s*({iri}|{bnode}))?'.format(iri=_IRI, bnode=_BNODE) +
+    r'\s*\.\s*(?:#.*)?$')
+
+
+def parse_statement(line):
+    """Parse a N-Triples or N-Quads statement.
+
+    :param str|bytes line: A single statement line.
+    :returns tuple|None:
+        Tuple of terms (subject, predicate, object) for a triple,
+        (subject, predicate, object, graph) for a quad,
+        None for blank and comment lines.
+    :raises ValueError: When line is not a valid statement.
+    """
+    if isinstance(line, bytes):
+        line = line.decode('utf-8')
+    stripped = line.strip()
+    if not stripped or stripped.startswith('#'):
+        return None
+    match = _STATEMENT_REGEX.match(stripped)
+    if match is None:
+        raise ValueError('Invalid N-Triples statement: {}'.format(stripped))
+    sbj, pred, obj, graph = match.groups()
+    if graph is None:
+        return (sbj, pred, obj,)
+    return (sbj, pred, obj, graph,)
+
+
+_LITERAL_ESCAPES = {
+    '\\': '\\\\',
+    '"': '\\"',
+    '\n': '\\n',
+    '\r': '\\r',
+    '\t': '\\t',
+}
+_LITERAL_ESCAPE_REGEX = re.compile(r'[\\"\n\r\t]')
+
+
+def quote_literal(value, *, language=None, datatype=None):
+    """Format a literal in N-Triples lexical form.
+
+    Backslashes, double quotes and line breaks are escaped: literals always
+    hold on a single line.
+
+    :param str value: Literal's lexical value.
+    :param str language: Language tag.
+    :param str datatype: Datatype IRI.
+    :returns str: Quoted literal, with its language tag or datatype.
+    """
+    quoted = '"{}"'.format(_LITERAL_ESCAPE_REGEX.sub(
+        lambda match: _LITERAL_ESCAPES[match.group()], value))
+    if language:
+        return '{}@{}'.format(quoted, language)
+    if datatype:
+        return '{}^^<{}>'.format(quoted, datatype)
+    return quoted
+
+
+def serialize_statement(terms):
+    """Serialize a tuple of terms as a N-Triples or N-Quads line.
+
+    :param tuple terms: Statement's terms, in N-Triples lexical form.
+    :returns str: Statement line, including trailing new line.
+    """
+    return '{} .\n'.format(' '.join(terms))
+
+
+def iter_statements(lines):
+    """Generator over statements parsed from an iterable of lines.
+
+    Blank and comment lines are skipped.
+
+    :param iterable lines: Lines (str or bytes) to parse.
+    :returns generator: Tuples of terms.
+    """
+    for line in lines:
+        terms = parse_statement(line)
+        if terms is not None:
+            yield terms
@@ -0,0 +1,320 @@
+"""Queries recording and replay, for load testing.
+
+`QueryRecorder` appends the queries and updates sent by SPARQL clients to a
+log file (one JSON object per line). `Replayer` sends logged requests again
+to a target server, at a target rate or concurrency, and reports latency
+percentiles, error rates and throughput per query fingerprint.
+"""
+
+import hashlib
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from pathlib import Path
+
+from .utils import DEFAULT_CHUNK_SIZE
+
+
+QUERY = 'query'
+UPDATE = 'update'
+
+_FINGERPRINT_REGEXES = (
+    # literals
+    (re.compile(r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\''), '?lit'),
+    # IRIs
+    (re.compile(r'<[^<>\s]*>'), '?iri'),
+    # prefixed names (not variables)
+    (re.compile(r'(?<![\w?$:])(?:[A-Za-z][\w-]*)?:[\w-]*(?:\.[\w-]+)*'),
+     '?pname'),
+    # numbers
+    (re.compile(r'(?<![\w?$:])[+-]?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b'), '?num'),
+    # VALUES blocks rows, whatever their number
+    (re.compile(r'(VALUES\s*(?:[?$]\w+|\([^)]*\))\s*)\{[^}]*\}',
+                re.IGNORECASE), r'\1{ ?rows }'),
+    # layout
+    (re.compile(r'\s+'), ' '),
+    (re.compile(r' ?([{}().,;]) ?'), r'\1'),
+)
+
+
+def fingerprint(query):
+    """Compute a query fingerprint: queries differing only by their
+    constants (IRIs, prefixed names, literals, numbers, VALUES rows) share
+    the same fingerprint.
+
+    Predicates and classes are constants too: patterns differing only by
+    their predicates (e.g. 'ex:name' and 'ex:age') share a fingerprint.
+
+    :param str query: Query.
+    :returns str: Fingerprint (short hash).
+    """
+    for regex, replacement in _FINGERPRINT_REGEXES:
+        query = regex.sub(replacement, query)
+    return hashlib.sha1(query.strip().encode('utf-8')).hexdigest()[:12]
+
+
+class QueryRecorder():
+    """Append queries and updates to a log file, one JSON object per line.
+
+    Pass it to SPARQL clients ('recorder' parameter) to record the requests
+    they send.
+    """
+
+    def __init__(self, path):
+        """
+        :param str|Path path: Log file path (appended to).
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._fobj = open(str(self.path), 'a', encoding='utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return (
+            '<{self.__class__.__name__}>('
+            'path="{self.path}"'
+            ')'.format(self=self))
+
+    def record(self, kind, ds_name, query, *, method='GET', accept=None):
+        """Record a request.
+
+        :param str kind: 'query' or 'update'.
+        :param str ds_name: Dataset's name.
+        :param str query: Prepared query.
+        :param str method: HTTP method. (default 'GET')
+        :param str accept: Requested results MIME type, None for server's
+            default (JSON for SELECT and ASK queries).
+        """
+        line = json.dumps({
+            'time': time.time(), 'kind': kind, 'ds_name': ds_name,
+            'query': query, 'method': method, 'accept': accept})
+        with self._lock:
+            self._fobj.write(line + '\n')
+            self._fobj.flush()
+
+    def close(self):
+        """Close log file."""
+        with self._lock:
+            self._fobj.close()
+
+
+def read_log(path):
+    """Read a queries log.
+
+    :param str|Path path: Log file path.
+    :returns list[dict]: Entries, with 'time', 'kind', 'ds_name', 'query',
+        'method' and 'accept'.
+    """
+    entries = []
+    with open(str(path), encoding='utf-8') as fobj:
+        for line in fobj:
+            if line.strip():
+                entries.append(json.loads(line))
+    return entries
+
+
+def percentile(values, rank):
+    """Get a percentile (nearest-rank method) of sorted values.
+
+    :param list values: Sorted values.
+    :param float rank: Percentile rank, in [0, 100].
+    :returns: Value, None if 'values' is empty.
+    """
+    if not values:
+        return None
+    idx = max(int(-(-rank * len(values) // 100)) - 1, 0)
+    return values[min(idx, len(values) - 1)]
+
+
+class Replayer():
+    """Replay logged queries and updates against a server.
+
+    Requests are sent by 'concurrency' worker threads, optionally paced to a
+    target rate ('qps'). Logged requests are replayed once in order, or, with
+    a 'duration', cycled until it elapses. A 'write_ratio' draws each request
+    among reads or writes to get the given mix.
+    """
+
+    def __init__(self, client_factory, entries, *, concurrency=4, qps=None,
+                 duration=None, write_ratio=None, seed=None):
+        """
+        :param callable client_factory: Function returning a
+            `FusekiSPARQLClient` for a dataset's name.
+        :param list[dict] entries: Logged requests, see `read_log`.
+        :param int concurrency: Number of concurrent workers. (default 4)
+        :param float qps: Target number of requests per second, None for as
+            fast as possible.
+        :param float duration: Replay duration (seconds), None to replay
+            each logged request once.
+        :param float write_ratio: Ratio of updates among requests, in
+            [0, 1], None to keep log's order and mix.
+        :param int seed: Random seed of reads/writes draws.
+        """
+        if concurrency < 1:
+            raise ValueError(
+                'Invalid concurrency value: {}'.format(concurrency))
+        if write_ratio is not None and not 0 <= write_ratio <= 1:
+            raise ValueError(
+                'Invalid write_ratio value: {}'.format(write_ratio))
+        self._client_factory = client_factory
+        self._clients = {}
+        self.entries = list(entries)
+        self.concurrency = concurrency
+        self.qps = qps
+        self.duration = duration
+        self.write_ratio = write_ratio
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._results = []
+
+    def _client(self, ds_name):
+        with self._lock:
+            if ds_name not in self._clients:
+                self._clients[ds_name] = self._client_factory(ds_name)
+            return self._clients[ds_name]
+
+    def _iter_entries(self):
+        """Generator over requests to send."""
+        if self.write_ratio is None:
+            if self.duration is None:
+                return iter(self.entries)
+            return itertools.cycle(self.entries)
+        reads = [e for e in self.entries if e['kind'] == QUERY]
+        writes = [e for e in self.entries if e['kind'] == UPDATE]
+        if not reads or not writes:
+            raise ValueError('A read/write mix requires reads and writes')
+        if self.duration is None:
+            nb_entries = len(self.entries)
+        else:
+            nb_entries = None
+        return self._iter_mix(
+            itertools.cycle(reads), itertools.cycle(writes), nb_entries)
+
+    def _iter_mix(self, reads, writes, nb_entries):
+        for _ in (range(nb_entries) if nb_entries is not None
+                  else itertools.count()):
+            if self._random.random() < self.write_ratio:
+                yield next(writes)
+            else:
+                yield next(reads)
+
+    def _send(self, entry):
+        """Send a request as it was recorded (HTTP method and requested
+        MIME type), and read whole response. Responses are not decoded."""
+        client = self._client(entry['ds_name'])
+        if entry['kind'] == UPDATE:
+            uri = client._build_uri(client._update_service)
+            params = {'update': entry['query']}
+            method = 'POST'
+        else:
+            uri = client._build_uri(client._query_service)
+            params = {'query': entry['query']}
+            method = entry.get('method') or 'GET'
+        headers = {}
+        if entry.get('accept'):
+            headers['Accept'] = entry['accept']
+        if method == 'POST':
+            response = client._post(uri, data=params, headers=headers)
+        else:
+            response = client._get(
+                uri, params=params, headers=headers, stream=True)
+        try:
+            for _ in response.iter_content(DEFAULT_CHUNK_SIZE):
+                pass
+        finally:
+            response.close()
+
+    def _work(self, entries, started, deadline, counter):
+        while True:
+            with self._lock:
+                entry = next(entries, None)
+                idx = next(counter)
+            if entry is None:
+                return
+            if self.qps:
+                delay = started + idx / self.qps - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            sent = time.monotonic()
+            error = None
+            try:
+                self._send(entry)
+            except Exception as exc:
+                error = exc
+            latency = time.monotonic() - sent
+            with self._lock:
+                self._results.append((entry, latency, error))
+
+    def run(self):
+        """Replay requests.
+
+        :returns dict: Report, see `report`.
+        """
+        self._results = []
+        entries = self._iter_entries()
+        counter = itertools.count()
+        started = time.monotonic()
+        deadline = (
+            started + self.duration if self.duration is not None else None)
+        workers = [
+            threading.Thread(
+                target=self._work,
+                args=(entries, started, deadline, counter),
+                name='fuseki-replay-{}'.format(idx), daemon=True)
+            for idx in range(self.concurrency)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return self.report(time.monotonic() - started)
+
+    def report(self, elapsed):
+        """Build a report of replayed requests.
+
+        :param float elapsed: Replay duration (seconds).
+        :returns dict: 'total' and per query fingerprint ('fingerprints')
+            statistics: 'kind', 'count', 'errors', 'error_rate', 'throughput'
+            (requests per second), latencies ('p50', 'p90', 'p99', 'max',
+            'mean', seconds) and an 'example' query.
+        """
+        groups = {}
+        for entry, latency, error in self._results:
+            key = fingerprint(entry['query'])
+            groups.setdefault(key, []).append((entry, latency, error))
+
+        def stats(results):
+            latencies = sorted(latency for _, latency, _ in results)
+            errors = sum(1 for _, _, error in results if error is not None)
+            return {
+                'count': len(results),
+                'errors': errors,
+                'error_rate': errors / len(results) if results else 0.,
+                'throughput': len(results) / elapsed if elapsed else 0.,
+                'p50': percentile(latencies, 50),
+                'p90': percentile(latencies, 90),
+                'p99': percentile(latencies, 99),
+                'max': latencies[-1] if latencies else None,
+                'mean': (
+                    sum(latencies) / len(latencies) if latencies else None),
+            }
+
+        fingerprints = {}
+        for key, results in groups.items():
+            fingerprints[key] = stats(results)
+            fingerprints[key]['kind'] = results[0][0]['kind']
+            fingerprints[key]['example'] = results[0][0]['query']
+        return {
+            'elapsed': elapsed,
+            'total': stats(self._results),
+            'fingerprints': fingerprints,
+        }
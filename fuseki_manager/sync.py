@@ -0,0 +1,267 @@
+"""Delta synchronization between a local line-based RDF source and a remote
+graph (or dataset).
+
+Both sides are canonicalized statement by statement, sorted with a bounded
+memory external sort and merged to find the statements to delete and to
+insert. Only these differences are then sent, as batched 'DELETE DATA' and
+'INSERT DATA' updates, so readers never see an empty graph.
+
+..Note:
+    Statements are compared in their N-Triples lexical form: literals
+    written with different (but equivalent) escapes are considered
+    different. Blank nodes labels are not stable between exports, so blank
+    nodes can not be synchronized.
+"""
+
+import heapq
+import shutil
+import tempfile
+from itertools import groupby, islice
+from pathlib import Path
+
+from .ingest import open_line_based
+from .rdf import parse_statement, serialize_statement
+from .exceptions import ArgumentError, GraphNotFoundError
+
+
+# Default number of statements sorted in memory at once.
+DEFAULT_RUN_SIZE = 100000
+
+
+def iter_canonical(stream, *, quads=False):
+    """Generator over canonical N-Triples (or N-Quads) lines of a stream.
+
+    :param file-like stream: Binary stream of N-Triples or N-Quads.
+    :param bool quads: Accept quads. (default False)
+    :returns generator: Statement lines (str).
+    :raises ArgumentError: When a quad is read and 'quads' is False.
+    """
+    for line in stream:
+        terms = parse_statement(line)
+        if terms is None:
+            continue
+        if len(terms) == 4 and not quads:
+            raise ArgumentError(
+                'Quad found while synchronizing a graph: {}'.format(
+                    line.strip()))
+        yield serialize_statement(terms)
+
+
+def external_sort(lines, tmp_dir, *, run_size=DEFAULT_RUN_SIZE):
+    """Sort lines and remove duplicates, keeping at most 'run_size' lines in
+    memory.
+
+    Sorted runs are written to temporary files in 'tmp_dir', then merged.
+
+    :param iterable lines: Lines (str, ending with a new line) to sort.
+    :param str|Path tmp_dir: Directory for temporary run files.
+    :param int run_size: Maximum number of lines sorted in memory.
+    :returns generator: Sorted unique lines.
+    """
+    run_paths = []
+    lines = iter(lines)
+    while True:
+        run = sorted(islice(lines, run_size))
+        if not run:
+            break
+        fd, run_path = tempfile.mkstemp(dir=str(tmp_dir), suffix='.run')
+        with open(fd, 'w', encoding='utf-8') as fobj:
+            fobj.writelines(run)
+        run_paths.append(run_path)
+
+    run_files = [open(path, encoding='utf-8') for path in run_paths]
+    try:
+        for line, _ in groupby(heapq.merge(*run_files)):
+            yield line
+    finally:
+        for fobj in run_files:
+            fobj.close()
+
+
+def diff_sorted(local_lines, remote_lines):
+    """Compare two sorted unique lines iterables.
+
+    :param iterable local_lines: Sorted local lines.
+    :param iterable remote_lines: Sorted remote lines.
+    :returns generator: ('+', line) for lines to insert,
+        ('-', line) for lines to delete.
+    """
+    sentinel = None
+    local_iter, remote_iter = iter(local_lines), iter(remote_lines)
+    local, remote = next(local_iter, sentinel), next(remote_iter, sentinel)
+    while local is not sentinel or remote is not sentinel:
+        if remote is sentinel or (local is not sentinel and local < remote):
+            yield '+', local
+            local = next(local_iter, sentinel)
+        elif local is sentinel or remote < local:
+            yield '-', remote
+            remote = next(remote_iter, sentinel)
+        else:
+            local = next(local_iter, sentinel)
+            remote = next(remote_iter, sentinel)
+
+
+def _has_blank_node(line):
+    terms = parse_statement(line)
+    return any(term.startswith('_:') for term in terms)
+
+
+def _data_block(lines, graph, quads):
+    """Build the content of a 'DELETE DATA' or 'INSERT DATA' block."""
+    if not quads:
+        if graph is None:
+            return ''.join(lines)
+        return 'GRAPH <{}> {{ {}}}'.format(graph, ''.join(lines))
+    blocks = []
+    for terms in (parse_statement(line) for line in lines):
+        if len(terms) == 4:
+            blocks.append('GRAPH {} {{ {}}}'.format(
+                terms[3], serialize_statement(terms[:3])))
+        else:
+            blocks.append(serialize_statement(terms))
+    return ''.join(blocks)
+
+
+class GraphDiff():
+    """Differences between a local source and a remote graph.
+
+    Statements to delete and to insert are stored in temporary files, removed
+    by `close` (or on context manager exit).
+    """
+
+    def __init__(self, sparql_client, *, graph=None, quads=False):
+        """
+        :param FusekiSPARQLClient sparql_client: Client used for updates.
+        :param str graph: Named graph's IRI, None for the default graph.
+        :param bool quads:
+            Compare all dataset's graphs using N-Quads. (default False)
+        """
+        self._client = sparql_client
+        self.graph = graph
+        self.quads = quads
+        self.tmp_dir = Path(tempfile.mkdtemp(prefix='fuseki-sync-'))
+        self.deletes_path = self.tmp_dir / 'deletes'
+        self.inserts_path = self.tmp_dir / 'inserts'
+        self.nb_local = 0
+        self.nb_remote = 0
+        self.nb_deletes = 0
+        self.nb_inserts = 0
+        self.deletes_blank_nodes = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return (
+            '<{self.__class__.__name__}>('
+            'nb_local={self.nb_local}'
+            ', nb_remote={self.nb_remote}'
+            ', nb_deletes={self.nb_deletes}'
+            ', nb_inserts={self.nb_inserts}'
+            ')'.format(self=self))
+
+    @property
+    def size(self):
+        """Number of statements to delete or insert."""
+        return self.nb_deletes + self.nb_inserts
+
+    @property
+    def ratio(self):
+        """Size of the difference relative to the local source size."""
+        return self.size / max(self.nb_local, 1)
+
+    def close(self):
+        """Remove temporary files."""
+        shutil.rmtree(str(self.tmp_dir), ignore_errors=True)
+
+    def _count(self, lines, counter):
+        for line in lines:
+            setattr(self, counter, getattr(self, counter) + 1)
+            yield line
+
+    def compute(self, source, *, run_size=DEFAULT_RUN_SIZE):
+        """Compute the differences.
+
+        :param str|Path|file-like source: Local N-Triples (or N-Quads) file
+            path (optionally '.gz') or binary stream.
+        :param int run_size: Maximum number of statements sorted in memory.
+        :returns GraphDiff: self
+        """
+        remote_path = self.tmp_dir / 'remote'
+        graph_store = self._client._service_graph_store
+        ds_name = self._client._ds_name
+        try:
+            if self.quads:
+                graph_store.get_dataset(ds_name, str(remote_path))
+            else:
+                graph_store.get_graph(
+                    ds_name, str(remote_path), graph=self.graph)
+        except GraphNotFoundError:
+            remote_path.write_bytes(b'')
+
+        local_stream = open_line_based(source)
+        try:
+            with open(str(remote_path), 'rb') as remote_stream:
+                local_lines = external_sort(
+                    self._count(
+                        iter_canonical(local_stream, quads=self.quads),
+                        'nb_local'),
+                    self.tmp_dir, run_size=run_size)
+                remote_lines = external_sort(
+                    self._count(
+                        iter_canonical(remote_stream, quads=self.quads),
+                        'nb_remote'),
+                    self.tmp_dir, run_size=run_size)
+                with open(str(self.deletes_path), 'w',
+                          encoding='utf-8') as deletes, \
+                        open(str(self.inserts_path), 'w',
+                             encoding='utf-8') as inserts:
+                    for operation, line in diff_sorted(
+                            local_lines, remote_lines):
+                        if operation == '+':
+                            inserts.write(line)
+                            self.nb_inserts += 1
+                        else:
+                            deletes.write(line)
+                            self.nb_deletes += 1
+                            if _has_blank_node(line):
+                                self.deletes_blank_nodes = True
+        finally:
+            if local_stream is not source:
+                local_stream.close()
+        remote_path.unlink()
+        return self
+
+    def _iter_batches(self, path, batch_size):
+        with open(str(path), encoding='utf-8') as fobj:
+            while True:
+                batch = list(islice(fobj, batch_size))
+                if not batch:
+                    break
+                yield batch
+
+    def apply(self, *, batch_size=1000):
+        """Send the differences as batched updates: 'DELETE DATA' updates
+        first, then 'INSERT DATA' updates.
+
+        :param int batch_size: Maximum number of statements per update.
+        :returns int: Number of update requests sent.
+        :raises ArgumentError:
+            When statements to delete contain blank nodes.
+        """
+        if self.deletes_blank_nodes:
+            raise ArgumentError(
+                'Statements with blank nodes can not be deleted')
+        nb_requests = 0
+        for operation, path in (
+                ('DELETE', self.deletes_path),
+                ('INSERT', self.inserts_path),):
+            for batch in self._iter_batches(path, batch_size):
+                block = _data_block(batch, self.graph, self.quads)
+                self._client.update_query(
+                    '{} DATA {{ {}}}'.format(operation, block))
+                nb_requests += 1
+        return nb_requests
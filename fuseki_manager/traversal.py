@@ -0,0 +1,113 @@
+"""Batched breadth-first graph traversal.
+
+Each hop expands a whole frontier of nodes with a few SELECT queries: nodes
+are bound by batches with a multi-row 'VALUES' block, and results are paged.
+Exploring a N-hop neighborhood then takes about N requests (per batch and
+page) instead of one request per node and hop.
+"""
+
+from collections import OrderedDict
+
+from .utils import parse_url
+
+
+DIRECTIONS = ('out', 'in', 'both',)
+
+
+def _values_block(var, terms):
+    return 'VALUES ?{} {{ {} }}'.format(var, ' '.join(terms))
+
+
+def build_frontier_query(nodes, *, direction='out', predicates=None,
+                         graph=None):
+    """Build a SELECT query fetching the triples around a set of nodes.
+
+    :param list[str] nodes: Nodes IRIs.
+    :param str direction: 'out' for triples having nodes as subject, 'in'
+        for triples having nodes as object. (default 'out')
+    :param list[str] predicates: Predicates (formatted for SPARQL) to
+        follow, None for all.
+    :param str graph: Named graph's IRI, None for the default graph.
+    :returns str: Query, selecting '?s', '?p' and '?o'.
+    """
+    node_var = 's' if direction == 'out' else 'o'
+    blocks = [_values_block(node_var, (parse_url(n) for n in nodes))]
+    if predicates:
+        blocks.append(_values_block('p', predicates))
+    pattern = '?s ?p ?o .'
+    if graph is not None:
+        pattern = 'GRAPH {} {{ {} }}'.format(parse_url(graph), pattern)
+    blocks.append(pattern)
+    return 'SELECT ?s ?p ?o WHERE {{ {} }} ORDER BY ?s ?p ?o'.format(
+        ' '.join(blocks))
+
+
+def traverse(select, start, *, max_depth=1, direction='out',
+             predicates=None, graph=None, batch_size=500, page_size=10000):
+    """Explore the neighborhood of nodes, breadth first.
+
+    Only IRIs are followed: literals and blank nodes end paths.
+
+    :param callable select: Function executing a SELECT query, returning
+        results bindings.
+    :param str|list[str] start: Start node IRI(s).
+    :param int max_depth: Maximum number of hops. (default 1)
+    :param str direction: Follow triples from subject to object ('out'),
+        from object to subject ('in') or both. (default 'out')
+    :param list[str] predicates: Predicates (formatted for SPARQL) to
+        follow, None for all.
+    :param str graph: Named graph's IRI, None for the default graph.
+    :param int batch_size: Maximum number of nodes per query. (default 500)
+    :param int page_size: Maximum number of triples per query.
+        (default 10000)
+    :returns dict: 'triples': list of (subject, predicate, object) values,
+        'depths': depth of each visited node by IRI, 'requests': number of
+        queries sent.
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError('Invalid direction: {}'.format(direction))
+    if batch_size < 1 or page_size < 1:
+        raise ValueError('Invalid batch_size or page_size value')
+    if isinstance(start, str):
+        start = [start]
+    directions = ('out', 'in',) if direction == 'both' else (direction,)
+
+    depths = OrderedDict((node, 0) for node in start)
+    triples = OrderedDict()
+    frontier = list(depths)
+    nb_requests = 0
+    for depth in range(1, max_depth + 1):
+        if not frontier:
+            break
+        next_frontier = []
+        for idx in range(0, len(frontier), batch_size):
+            batch = frontier[idx:idx + batch_size]
+            for hop_direction in directions:
+                query = build_frontier_query(
+                    batch, direction=hop_direction, predicates=predicates,
+                    graph=graph)
+                offset = 0
+                while True:
+                    bindings = select('{} LIMIT {} OFFSET {}'.format(
+                        query, page_size, offset))
+                    nb_requests += 1
+                    for binding in bindings:
+                        triple = tuple(
+                            binding[var]['value'] for var in ('s', 'p', 'o'))
+                        triples[triple] = None
+                        neighbor = binding[
+                            'o' if hop_direction == 'out' else 's']
+                        if (neighbor['type'] == 'uri' and
+                                neighbor['value'] not in depths):
+                            depths[neighbor['value']] = depth
+                            next_frontier.append(neighbor['value'])
+                    if len(bindings) < page_size:
+                        break
+                    offset += page_size
+        frontier = next_frontier
+
+    return {
+        'triples': list(triples),
+        'depths': dict(depths),
+        'requests': nb_requests,
+    }
@@ -1,39 +1,99 @@
 """Jena/Fuseki API client utils."""
 
 import re
-from io import BufferedIOBase, BytesIO
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
 from .exceptions import InvalidFileError
 
 
-def build_http_file_obj(source, mime_type):
-    """Build parameters representing a fiel stream for a POST request.
+# Size of the chunks read from or written to streams (bytes).
+DEFAULT_CHUNK_SIZE = 64 * 1024
 
-    :param file-like source: file-like object to send.
-    :param str mime_type: MIME type of the file.
-    :returns tuple: File object information.
-    :raises InvalidFileError: When 'file_path' is not a file.
 
-    Note : source could be :
-    - a string representing path to file
-    - a pathlib.Path representing path to file
-    - a subclass of io.BufferedIOBase
+@contextmanager
+def open_source(source):
+    """Get a request body from a data source.
+
+    :param str|Path|file-like|bytes|iterable source:
+        Source path (opened, then closed on exit), binary file-like object,
+        bytes or iterable of bytes chunks (left as is).
+    :returns file-like|bytes|iterable: Request body, streamed by requests.
+    :raises InvalidFileError: When 'source' path is not a file.
     """
     if isinstance(source, (str, Path)):
-        # ensure 'source' is instance of 'Path'
         source = Path(source)
         if not source.is_file():
             raise InvalidFileError(str(source))
-        return (source.name, open(str(source), 'rb'), mime_type)
+        with open(str(source), 'rb') as fobj:
+            yield fobj
+    else:
+        yield source
 
-    if issubclass(source.__class__, BufferedIOBase):
-        return ('unknown', source, mime_type)
 
-    if isinstance(source, bytes):
-        return ('unknown', BytesIO(source), mime_type)
+@contextmanager
+def open_sink(dest):
+    """Get a binary writable stream from a destination.
 
-    raise InvalidFileError(str(source))
+    :param str|Path|file-like dest:
+        Destination path (opened, then closed on exit) or binary file-like
+        object (left open on exit).
+    :returns file-like: Writable binary stream.
+    """
+    if isinstance(dest, (str, Path)):
+        with open(str(dest), 'wb') as fobj:
+            yield fobj
+    else:
+        yield dest
+
+
+class TTLCache():
+    """Thread-safe key/value store whose entries expire after a delay."""
+
+    def __init__(self, ttl):
+        """
+        :param float ttl:
+            Entries time-to-live (seconds), 0 or None disables caching.
+        """
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.ttl is not None and self.ttl > 0
+
+    def get(self, key, default=None):
+        """Get a value, default if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return default
+            return value
+
+    def set(self, key, value):
+        """Store a value (no-op if caching is disabled)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def pop(self, *keys):
+        """Remove values."""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all values."""
+        with self._lock:
+            self._entries.clear()
 
 
 def is_url(value):
@@ -0,0 +1,223 @@
+"""Write-behind buffer grouping triple inserts and deletes in single updates.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+from .rdf import quote_literal
+from .utils import is_url, is_literal, parse_url
+from .exceptions import FusekiClientError
+
+
+def _format_term(value, *, is_object=False):
+    """Format a term for a SPARQL data block: URLs are enclosed in '<>',
+    unquoted literal objects are quoted, other values (prefixed names,
+    quoted literals, blank nodes) are left as is."""
+    if is_url(value):
+        return parse_url(value)
+    if is_object and is_literal(value) and value[:1] not in '"\'':
+        return quote_literal(value)
+    return value
+
+
+class WriteBuffer():
+    """Collect triple inserts and deletes, and send them as grouped updates.
+
+    Operations on the same triple are coalesced: only the last one is kept,
+    so an insert followed by a delete of the same triple (or the reverse)
+    is sent as a single operation, with the same final result.
+
+    Buffer is flushed (one 'DELETE DATA ; INSERT DATA' update) when it holds
+    'max_size' triples, when its oldest operation is 'max_age' seconds old
+    (by a background thread), or explicitly by `flush`, which also acts as a
+    barrier: once it returns, every operation buffered before the call has
+    been sent (read-your-writes).
+
+    A failed flush puts its operations back in the buffer (newer operations
+    on the same triples win). Errors of background flushes, whatever their
+    type, are kept in `last_error` and retried after 'max_age'.
+    """
+
+    def __init__(self, sparql_client, *, max_size=1000, max_age=1.,
+                 graph=None):
+        """
+        :param FusekiSPARQLClient sparql_client: Client used for updates.
+        :param int max_size: Number of buffered triples triggering a flush.
+            (default 1000)
+        :param float max_age: Age (seconds) of oldest buffered operation
+            triggering a flush, None to disable. (default 1)
+        :param str graph: Named graph's IRI, None for the default graph.
+        """
+        if max_size < 1:
+            raise ValueError('Invalid max_size value: {}'.format(max_size))
+        self._client = sparql_client
+        self.max_size = max_size
+        self.max_age = max_age
+        self.graph = graph
+        self.last_error = None
+        self._ops = OrderedDict()
+        self._oldest = None
+        self._closed = False
+        self._thread = None
+        self._lock = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._metrics = {
+            'flushes': 0,
+            'failed_flushes': 0,
+            'flushed_triples': 0,
+            'coalesced': 0,
+            'last_flush_latency': None,
+            'max_flush_latency': None,
+            'total_flush_latency': 0.,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def depth(self):
+        """Number of buffered triple operations."""
+        with self._lock:
+            return len(self._ops)
+
+    @property
+    def metrics(self):
+        """Buffer metrics: 'depth', 'age' of oldest buffered operation
+        (seconds), 'flushes', 'failed_flushes', 'flushed_triples',
+        'coalesced' operations and flush latencies (seconds)."""
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['depth'] = len(self._ops)
+            metrics['age'] = (
+                time.monotonic() - self._oldest
+                if self._oldest is not None else 0.)
+        return metrics
+
+    def insert(self, sbj, pred, obj):
+        """Buffer a triple insert.
+
+        :param str sbj: Subject (URL or prefixed name).
+        :param str pred: Predicate (URL or prefixed name).
+        :param str obj: Object (URL, prefixed name or literal). Literals
+            may be given quoted (e.g. '"Foo"@en', '"1"^^xsd:integer') or as
+            plain strings without ':', which are quoted.
+        """
+        self._add((sbj, pred, obj), True)
+
+    def delete(self, sbj, pred, obj):
+        """Buffer a triple delete. See `insert` for parameters."""
+        self._add((sbj, pred, obj), False)
+
+    def _add(self, triple, is_insert):
+        sbj, pred, obj = triple
+        triple = (
+            _format_term(sbj), _format_term(pred),
+            _format_term(obj, is_object=True),)
+        with self._lock:
+            if self._closed:
+                raise FusekiClientError('Write buffer is closed')
+            if triple in self._ops:
+                self._metrics['coalesced'] += 1
+                del self._ops[triple]
+            self._ops[triple] = is_insert
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if self.max_age is not None and self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='fuseki-write-buffer',
+                    daemon=True)
+                self._thread.start()
+            self._lock.notify()
+            is_full = len(self._ops) >= self.max_size
+        if is_full:
+            self.flush()
+
+    def _build_update(self, ops):
+        blocks = {True: [], False: []}
+        for triple, is_insert in ops.items():
+            blocks[is_insert].append('{} {} {} .'.format(*triple))
+        updates = []
+        for operation, is_insert in (('DELETE', False), ('INSERT', True),):
+            if not blocks[is_insert]:
+                continue
+            data = ' '.join(blocks[is_insert])
+            if self.graph is not None:
+                data = 'GRAPH {} {{ {} }}'.format(
+                    parse_url(self.graph), data)
+            updates.append('{} DATA {{ {} }}'.format(operation, data))
+        return ' ; '.join(updates)
+
+    def flush(self):
+        """Send buffered operations as one update, and wait for it.
+
+        :returns int: Number of triple operations sent.
+        :raises FusekiClientError:
+        """
+        with self._flush_lock:
+            with self._lock:
+                ops, oldest = self._ops, self._oldest
+                self._ops, self._oldest = OrderedDict(), None
+            if not ops:
+                return 0
+            started = time.monotonic()
+            try:
+                self._client.update_query(self._build_update(ops))
+            except Exception:
+                with self._lock:
+                    # newer operations on the same triples win
+                    ops.update(self._ops)
+                    self._ops, self._oldest = ops, oldest
+                    self._metrics['failed_flushes'] += 1
+                raise
+            latency = time.monotonic() - started
+            with self._lock:
+                self._metrics['flushes'] += 1
+                self._metrics['flushed_triples'] += len(ops)
+                self._metrics['last_flush_latency'] = latency
+                self._metrics['max_flush_latency'] = max(
+                    latency, self._metrics['max_flush_latency'] or 0.)
+                self._metrics['total_flush_latency'] += latency
+            return len(ops)
+
+    def _run(self):
+        """Flush buffer when its oldest operation reaches 'max_age'."""
+        try:
+            self._run_flushes()
+        finally:
+            # let next operation start a new thread, whatever stopped this one
+            with self._lock:
+                self._thread = None
+
+    def _run_flushes(self):
+        while True:
+            with self._lock:
+                while not self._closed and self._oldest is None:
+                    self._lock.wait()
+                if self._closed:
+                    return
+                delay = self._oldest + self.max_age - time.monotonic()
+                if delay > 0:
+                    self._lock.wait(delay)
+                    continue
+            try:
+                self.flush()
+            except Exception as exc:
+                self.last_error = exc
+                with self._lock:
+                    self._lock.wait(self.max_age)
+
+    def close(self):
+        """Flush buffer and stop background flushes."""
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._closed = True
+                self._lock.notify_all()
+                thread = self._thread
+            if thread is not None:
+                thread.join()
@@ -67,6 +67,19 @@ setup(
     # for example:
     # $ pip install -e .[dev,test]
     extras_require={
+        'arrow': [
+            'pyarrow>=0.15',
+        ],
+        'json': [
+            'orjson',
+        ],
+        'transcode': [
+            'rdflib>=4.2',
+        ],
+        'pandas': [
+            'pyarrow>=0.15',
+            'pandas>=0.20',
+        ],
         'test': [
             'pytest==2.8',
             'pytest-cov==2.4.0',
@@ -74,4 +87,10 @@ setup(
             'tox>=2.0',
         ],
     },
+
+    entry_points={
+        'console_scripts': [
+            'fuseki-replay=fuseki_manager.cli:replay_main',
+        ],
+    },
 )
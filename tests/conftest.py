@@ -4,7 +4,8 @@ import os
 import pytest
 
 from fuseki_manager import (
-    FusekiAdminClient, FusekiDataClient, FusekiSPARQLClient
+    FusekiAdminClient, FusekiDataClient, FusekiSPARQLClient,
+    FusekiGraphStoreClient
 )
 
 
@@ -20,6 +21,12 @@ def data_client():
     return FusekiDataClient(host='fuseki.local', port=None)
 
 
+@pytest.fixture()
+def graph_store_client():
+    """Return a client instance of graph store API."""
+    return FusekiGraphStoreClient(host='fuseki.local', port=None)
+
+
 @pytest.fixture()
 def sparql_client():
     """Return a client instance of data API."""
@@ -34,10 +41,10 @@ def ds_name():
 
 
 @pytest.fixture()
-def ds_data():
+def ds_data(ds_name):
     """Return a sample of dataset details."""
     return {
-        'ds.name': '/{}'.format(ds_name()),
+        'ds.name': '/{}'.format(ds_name),
         'ds.state': True,
         'ds.services': [
             {
@@ -75,10 +82,10 @@ def ds_data():
 
 
 @pytest.fixture()
-def stat_data():
+def stat_data(ds_name):
     """Return a sample of statistics details."""
     return {
-        '/{}'.format(ds_name()): {
+        '/{}'.format(ds_name): {
             'Requests': 13256,
             'RequestsGood': 13229,
             'RequestsBad': 27,
@@ -200,3 +207,48 @@ def value_data():
             ]
         }
     }
+
+
+@pytest.fixture()
+def ntriples_data():
+    """Return a sample of N-Triples data."""
+    return (
+        b'<http://url.org/dummy#foo> <http://www.rdf.org/#type> '
+        b'<http://url.org/dummy#Class> .\n'
+        b'<http://url.org/dummy#foo> <http://url.org/dummy#label> '
+        b'"Foo"@en .\n'
+        b'_:b0 <http://url.org/dummy#size> '
+        b'"42"^^<http://www.w3.org/2001/XMLSchema#integer> .\n'
+    )
+
+
+@pytest.fixture()
+def typed_data():
+    """Return a sample of typed SELECT results."""
+    xsd = 'http://www.w3.org/2001/XMLSchema#'
+    return {
+        "head": {
+            "vars": ["s", "count", "price", "date", "label"]
+        },
+        "results": {
+            "bindings": [
+                {
+                    "s": {"type": "uri", "value": "http://url.org/dummy#foo"},
+                    "count": {"type": "literal", "value": "12",
+                              "datatype": xsd + "integer"},
+                    "price": {"type": "literal", "value": "1.50",
+                              "datatype": xsd + "decimal"},
+                    "date": {"type": "literal",
+                             "value": "2018-02-01T17:07:23.027+00:00",
+                             "datatype": xsd + "dateTime"},
+                    "label": {"type": "literal", "value": "Foo",
+                              "xml:lang": "en"},
+                },
+                {
+                    "s": {"type": "uri", "value": "http://url.org/dummy#bar"},
+                    "count": {"type": "literal", "value": "3",
+                              "datatype": xsd + "integer"},
+                },
+            ]
+        }
+    }
@@ -1,22 +1,26 @@
 """Tests on Fuseki clients."""
 
 import datetime as dt
+import gzip
 import os
 import io
 from pathlib import Path
+from urllib.parse import unquote_plus
 import pytest
 import responses
 
-from fuseki_manager import FusekiAdminClient, FusekiDataClient
+from fuseki_manager import (
+    FusekiAdminClient, FusekiDataClient, FusekiGraphStoreClient)
 from fuseki_manager.api_client import FusekiBaseClient
 from fuseki_manager import FusekiSPARQLClient
 from fuseki_manager.api_client.sparql import _parse_uri
+from fuseki_manager.api_client.tasks import TaskWaiter
 
 from fuseki_manager.exceptions import (
     # FusekiClientError,
     FusekiClientResponseError,
-    DatasetAlreadyExistsError, DatasetNotFoundError,
-    InvalidFileError, ArgumentError)
+    DatasetAlreadyExistsError, DatasetNotFoundError, GraphNotFoundError,
+    TaskNotFoundError, TaskFailedError, InvalidFileError, ArgumentError)
 
 
 class TestFusekiBaseClient():
@@ -164,6 +168,70 @@ class TestFusekiAdminClient():
         assert 'ds.services' in result
         assert len(result['ds.services']) > 0
 
+    @responses.activate
+    def test_admin_api_client_metadata_cache(self, ds_name, ds_data):
+
+        admin_client = FusekiAdminClient(
+            host='fuseki.local', port=None, cache_ttl=60)
+        responses.add(
+            method=responses.GET,
+            url=admin_client._build_uri('datasets'),
+            status=200,
+            json={'datasets': []},
+        )
+        responses.add(
+            method=responses.POST,
+            url=admin_client._build_uri('datasets'),
+            status=200,
+        )
+        responses.add(
+            method=responses.GET,
+            url=admin_client._build_uri('datasets/{}'.format(ds_name)),
+            status=200,
+            json=ds_data,
+        )
+        responses.add(
+            method=responses.POST,
+            url=admin_client._build_uri('datasets/{}'.format(ds_name)),
+            status=200,
+        )
+        responses.add(
+            method=responses.DELETE,
+            url=admin_client._build_uri('datasets/{}'.format(ds_name)),
+            status=200,
+        )
+
+        assert not admin_client.dataset_exists(ds_name)
+        assert admin_client.get_all_datasets() == {'datasets': []}
+        assert len(responses.calls) == 1
+
+        # created dataset is cached, in datasets list too
+        assert admin_client.create_dataset(ds_name) == ds_data
+        assert len(responses.calls) == 3
+        assert admin_client.get_dataset(ds_name) == ds_data
+        assert admin_client.dataset_exists(ds_name)
+        assert len(responses.calls) == 3
+
+        # state change updates cached details
+        admin_client.set_dataset_state(ds_name, state='offline')
+        assert not admin_client.get_dataset(ds_name)['ds.state']
+        assert not admin_client.get_all_datasets()['datasets'][0]['ds.state']
+        assert len(responses.calls) == 4
+
+        # deletion removes dataset from cache
+        admin_client.delete_dataset(ds_name)
+        assert not admin_client.dataset_exists(ds_name)
+        assert len(responses.calls) == 5
+
+        # confirmation fetch can be skipped
+        assert admin_client.create_dataset(ds_name, confirm=False) is None
+        assert len(responses.calls) == 6
+
+        admin_client.clear_cache()
+        admin_client.get_all_datasets()
+        admin_client.get_all_datasets(use_cache=False)
+        assert len(responses.calls) == 8
+
     @responses.activate
     def test_admin_api_client_create_dataset_from_config_file(
             self, admin_client, config_path):
@@ -269,6 +337,79 @@ class TestFusekiAdminClient():
             result = admin_client.delete_dataset(ds_name, force_drop_data=True)
             assert result
 
+    def test_admin_api_client_provision_datasets(
+            self, admin_client, config_path):
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                method=responses.POST,
+                url='{}?dbType=tdb&dbName=ds_1'.format(
+                    admin_client._build_uri('datasets')),
+                status=200,
+            )
+            rsps.add(
+                method=responses.POST,
+                url='{}?dbType=mem&dbName=ds_2'.format(
+                    admin_client._build_uri('datasets')),
+                status=409,
+            )
+            rsps.add(
+                method=responses.POST,
+                url='{}?state=offline'.format(
+                    admin_client._build_uri('datasets/ds_2')),
+                status=200,
+            )
+            rsps.add(
+                method=responses.POST,
+                url=admin_client._build_uri('datasets'),
+                status=500,
+            )
+            reports = admin_client.provision_datasets([
+                {'ds_name': 'ds_1', 'ds_type': 'tdb'},
+                {'ds_name': 'ds_2', 'state': 'offline'},
+                {'ds_name': 'ds_3', 'config_path': config_path},
+            ], workers=2)
+
+        assert [r['ds_name'] for r in reports] == ['ds_1', 'ds_2', 'ds_3']
+        assert [r['status'] for r in reports] == [
+            'created', 'exists', 'failed']
+        assert reports[0]['error'] is None
+        assert isinstance(reports[2]['error'], FusekiClientResponseError)
+        assert all(r['duration'] >= 0 for r in reports)
+
+        with pytest.raises(ValueError):
+            admin_client.provision_datasets([], workers=0)
+
+    def test_admin_api_client_teardown_datasets(
+            self, admin_client, data_client):
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                method=responses.POST,
+                url='{}/update'.format(data_client._build_uri('ds_1')),
+                status=200,
+            )
+            rsps.add(
+                method=responses.DELETE,
+                url=admin_client._build_uri('datasets/ds_1'),
+                status=200,
+            )
+            rsps.add(
+                method=responses.POST,
+                url='{}/update'.format(data_client._build_uri('ds_2')),
+                status=404,
+            )
+            reports = admin_client.teardown_datasets(
+                ['ds_1', 'ds_2'], force_drop_data=True)
+            # data is dropped before dataset is deleted
+            urls = [call.request.url for call in rsps.calls]
+            drop_uri = data_client._build_uri('ds_1', service_name='update')
+            delete_uri = admin_client._build_uri('datasets/ds_1')
+            assert urls.index(drop_uri) < urls.index(delete_uri)
+
+        assert [r['ds_name'] for r in reports] == ['ds_1', 'ds_2']
+        assert [r['status'] for r in reports] == ['deleted', 'missing']
+
     def test_admin_api_client_set_dataset_state(self, admin_client, ds_name):
 
         with responses.RequestsMock() as rsps:
@@ -399,6 +540,49 @@ class TestFusekiAdminClient():
         assert 'taskId' in result
         assert result['taskId'] == '1'
 
+    @responses.activate
+    def test_admin_api_client_wait_for_task(self, admin_client, task_data):
+
+        running = {'task': 'backup', 'taskId': '1',
+                   'started': task_data['started']}
+        failed = dict(task_data, taskId='3', success=False)
+        responses.add(
+            method=responses.GET,
+            url=admin_client._build_uri('tasks'),
+            status=200,
+            json=[running, failed],
+        )
+        responses.add(
+            method=responses.GET,
+            url=admin_client._build_uri('tasks'),
+            status=200,
+            json=[task_data],
+        )
+        responses.add(
+            method=responses.GET,
+            url=admin_client._build_uri('tasks/2'),
+            status=404,
+        )
+
+        admin_client._task_waiter = TaskWaiter(
+            admin_client, min_interval=0.01, max_interval=0.05)
+        done = []
+        future = admin_client.wait_for_task(1, callback=done.append)
+        lost_future = admin_client.wait_for_task('2')
+        failed_future = admin_client.wait_for_task('3')
+
+        assert future.result(timeout=5) == task_data
+        assert done == [future]
+        with pytest.raises(TaskNotFoundError):
+            lost_future.result(timeout=5)
+        with pytest.raises(TaskFailedError):
+            failed_future.result(timeout=5)
+        # listed tasks are polled all together, not one by one
+        assert not [
+            call for call in responses.calls
+            if call.request.url.endswith(('/tasks/1', '/tasks/3'))]
+        assert not admin_client.task_waiter.pending
+
     @responses.activate
     def test_admin_api_client_restore_data(
             self, admin_client, data_client, ds_name):
@@ -436,6 +620,36 @@ class TestFusekiDataClient():
         result = data_client.drop_all(ds_name)
         assert result
 
+    @responses.activate
+    def test_data_api_client_drop_all_chunked(self, data_client, ds_name):
+
+        query_uri = data_client._build_uri(ds_name, service_name='sparql')
+        update_uri = data_client._build_uri(ds_name, service_name='update')
+        graph = 'http://url.org/dummy#graph'
+        responses.add(
+            method=responses.GET, url=query_uri, status=200,
+            json={'head': {'vars': ['g']}, 'results': {'bindings': [
+                {'g': {'type': 'uri', 'value': graph}}]}})
+        # named graph, then default graph: one chunk each
+        for _ in range(2):
+            responses.add(
+                method=responses.GET, url=query_uri, status=200,
+                json={'head': {'vars': ['s', 'p', 'o']}, 'results': {
+                    'bindings': [{
+                        var: {'type': 'uri', 'value': graph}
+                        for var in ('s', 'p', 'o')}]}})
+        responses.add(method=responses.POST, url=update_uri, status=204)
+
+        result = data_client.drop_all(ds_name, chunk_size=100, pause=.01)
+        assert result
+        updates = [
+            call.request.body for call in responses.calls
+            if call.request.url == update_uri]
+        assert len(updates) == 2
+        assert 'GRAPH' in unquote_plus(updates[0])
+        assert 'LIMIT 100' in unquote_plus(updates[1])
+        assert 'GRAPH' not in unquote_plus(updates[1])
+
     @responses.activate
     def test_data_api_client_upload_files(self, data_client, ds_name):
 
@@ -466,6 +680,96 @@ class TestFusekiDataClient():
             data_client.upload_files(ds_name, [file_path.parent])
 
 
+class TestFusekiGraphStoreClient():
+
+    def test_graph_store_api_client_build_uri(self):
+
+        client = FusekiGraphStoreClient()
+        uri = client._build_uri('ds_test')
+        assert uri == 'http://localhost:3030/ds_test/data'
+
+    @responses.activate
+    def test_graph_store_api_client_get_graph(
+            self, graph_store_client, ds_name, ntriples_data):
+
+        graph = 'http://url.org/dummy#graph'
+        responses.add(
+            method=responses.GET,
+            url=graph_store_client._build_uri(ds_name),
+            status=200,
+            body=ntriples_data,
+        )
+
+        buffer = io.BytesIO()
+        size = graph_store_client.get_graph(
+            ds_name, buffer, graph=graph, chunk_size=16)
+        assert size == len(ntriples_data)
+        assert buffer.getvalue() == ntriples_data
+        assert 'graph=' in responses.calls[0].request.url
+
+        buffer = io.BytesIO()
+        size = graph_store_client.get_graph(ds_name, buffer, compress=True)
+        assert size == len(buffer.getvalue())
+        assert gzip.decompress(buffer.getvalue()) == ntriples_data
+        assert 'default=' in responses.calls[1].request.url
+
+    def test_graph_store_api_client_get_graph_errors(
+            self, graph_store_client, ds_name):
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                method=responses.GET,
+                url=graph_store_client._build_uri(ds_name),
+                status=404,
+            )
+            with pytest.raises(GraphNotFoundError):
+                graph_store_client.get_graph(
+                    ds_name, io.BytesIO(), graph='http://url.org/nope')
+
+    @responses.activate
+    def test_graph_store_api_client_put_post_graph(
+            self, graph_store_client, ds_name, ntriples_data):
+
+        response_data = {'count': 3, 'tripleCount': 3, 'quadCount': 0}
+        for method in (responses.PUT, responses.POST):
+            responses.add(
+                method=method,
+                url=graph_store_client._build_uri(ds_name),
+                status=200,
+                json=response_data,
+            )
+
+        result = graph_store_client.put_graph(
+            ds_name, io.BytesIO(ntriples_data))
+        assert result == response_data
+        request = responses.calls[0].request
+        assert request.method == 'PUT'
+        assert request.headers['Content-Type'] == 'application/n-triples'
+
+        chunks = iter([ntriples_data[:10], ntriples_data[10:]])
+        result = graph_store_client.post_graph(
+            ds_name, chunks, graph='http://url.org/dummy#graph')
+        assert result == response_data
+        assert responses.calls[1].request.method == 'POST'
+
+        with pytest.raises(InvalidFileError):
+            graph_store_client.put_graph(ds_name, Path('not_a_file'))
+
+    @responses.activate
+    def test_graph_store_api_client_delete_graph(
+            self, graph_store_client, ds_name):
+
+        responses.add(
+            method=responses.DELETE,
+            url=graph_store_client._build_uri(ds_name),
+            status=204,
+        )
+
+        result = graph_store_client.delete_graph(
+            ds_name, graph='http://url.org/dummy#graph')
+        assert result
+
+
 class TestFusekiSPARQLClient():
 
     def test_sparql_api_client(self):
@@ -545,3 +849,77 @@ class TestFusekiSPARQLClient():
         subj, pred = 'http://url.org/dummy#foo', 'rdf:type'
         result = sparql_client.value(sbj=subj, pred=pred)
         assert result == value_data['results']['bindings'][0]['o']['value']
+
+    @responses.activate
+    def test_sparql_api_client_delete_matching(self, sparql_client):
+        for nb_rows in (5, 2,):
+            responses.add(
+                method=responses.GET,
+                url=sparql_client._build_uri('sparql'),
+                status=200,
+                json={'head': {'vars': ['s']}, 'results': {'bindings': [
+                    {'s': {'type': 'uri', 'value': 'http://url.org/{}'.format(
+                        nb_rows * 10 + idx)}}
+                    for idx in range(nb_rows)]}},
+            )
+        responses.add(
+            method=responses.POST,
+            url=sparql_client._build_uri('update'),
+            status=200,
+        )
+
+        result = sparql_client.delete_matching(
+            pred='rdf:type', obj='http://url.org/dummy#Class', chunk_size=5)
+        assert result == 2
+        update = unquote_plus(responses.calls[1].request.body)
+        assert 'PREFIX rdf: <http://www.rdf.org/#>' in update
+        assert (
+            'DELETE { ?s rdf:type <http://url.org/dummy#Class> }') in update
+        assert 'LIMIT 5' in update
+
+    @responses.activate
+    def test_sparql_api_client_construct(self, sparql_client, ntriples_data):
+        responses.add(
+            method=responses.GET,
+            url=sparql_client._build_uri('sparql'),
+            status=200,
+            body=ntriples_data,
+            content_type='application/n-triples',
+        )
+
+        query = "CONSTRUCT { ?s ?p ?o } WHERE { ?s ?p ?o }"
+        result = sparql_client.construct(query)
+        assert not isinstance(result, list)
+        result = list(result)
+        assert len(result) == 3
+        assert result[0] == (
+            '<http://url.org/dummy#foo>',
+            '<http://www.rdf.org/#type>',
+            '<http://url.org/dummy#Class>')
+        assert result[1][2] == '"Foo"@en'
+        assert responses.calls[0].request.headers['Accept'] == \
+            'application/n-triples'
+
+        result = list(sparql_client.describe(
+            "DESCRIBE <http://url.org/dummy#foo>"))
+        assert len(result) == 3
+
+    @responses.activate
+    def test_sparql_api_client_export_query(
+            self, sparql_client, ntriples_data, tmpdir):
+        responses.add(
+            method=responses.GET,
+            url=sparql_client._build_uri('sparql'),
+            status=200,
+            body=ntriples_data,
+        )
+
+        query = "CONSTRUCT { ?s ?p ?o } WHERE { ?s ?p ?o }"
+        buffer = io.BytesIO()
+        size = sparql_client.export_query(query, buffer, chunk_size=16)
+        assert size == len(ntriples_data)
+        assert buffer.getvalue() == ntriples_data
+
+        file_path = Path(str(tmpdir)) / 'export.nt'
+        sparql_client.export_query(query, file_path)
+        assert file_path.read_bytes() == ntriples_data
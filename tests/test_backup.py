@@ -0,0 +1,139 @@
+"""Tests on Fuseki backups orchestration."""
+
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import pytest
+import responses
+
+from fuseki_manager.api_client.backup import (
+    BackupOrchestrator, backup_file_regex, summarize_backups)
+from fuseki_manager.api_client.tasks import TaskWaiter
+
+
+class TestFusekiBackupOrchestrator():
+
+    def test_backup_file_regex(self):
+
+        regex = backup_file_regex('ds')
+        assert regex.match('ds_2018-02-01_17-07-23.nq.gz')
+        assert not regex.match('ds_test_2018-02-01_17-07-23.nq.gz')
+
+    @responses.activate
+    def test_backup_orchestrator(self, admin_client, ds_data, task_data,
+                                 tmpdir):
+
+        backup_file = 'ds_test_2018-02-01_17-07-23.nq.gz'
+        tmpdir.join(backup_file).write_binary(b'backup')
+        responses.add(
+            method=responses.GET,
+            url=admin_client._build_uri('datasets'),
+            status=200,
+            json={'datasets': [
+                ds_data, dict(ds_data, **{'ds.name': '/ds_other'})]},
+        )
+        responses.add(
+            method=responses.GET,
+            url=admin_client._build_uri('backups-list'),
+            status=200,
+            json={'backups': []},
+        )
+        responses.add(
+            method=responses.GET,
+            url=admin_client._build_uri('backups-list'),
+            status=200,
+            json={'backups': [backup_file]},
+        )
+        responses.add(
+            method=responses.POST,
+            url=admin_client._build_uri('backup/ds_test'),
+            status=200,
+            json={'requestId': 1, 'taskId': '1'},
+        )
+        responses.add(
+            method=responses.POST,
+            url=admin_client._build_uri('backup/ds_other'),
+            status=500,
+        )
+        for state in ('offline', 'active'):
+            responses.add(
+                method=responses.POST,
+                url='{}?state={}'.format(
+                    admin_client._build_uri('datasets/ds_test'), state),
+                status=200,
+            )
+            responses.add(
+                method=responses.POST,
+                url='{}?state={}'.format(
+                    admin_client._build_uri('datasets/ds_other'), state),
+                status=200,
+            )
+        responses.add(
+            method=responses.GET,
+            url=admin_client._build_uri('tasks'),
+            status=200,
+            json=[task_data],
+        )
+        admin_client._task_waiter = TaskWaiter(
+            admin_client, min_interval=0.01)
+
+        reports = admin_client.backup_datasets(
+            priorities={'ds_other': 1}, max_concurrent=1, offline=True,
+            backup_dir=str(tmpdir), timeout=5)
+        assert [r['ds_name'] for r in reports] == ['ds_other', 'ds_test']
+        assert reports[0]['status'] == 'failed'
+        assert reports[0]['error'] is not None
+        assert reports[1]['status'] == 'done'
+        assert reports[1]['task_id'] == '1'
+        assert reports[1]['backup_file'] == backup_file
+        assert reports[1]['verified']
+        assert reports[1]['size'] == len(b'backup')
+        # datasets are set active again, even if backup failed
+        state_calls = [
+            call.request.url for call in responses.calls
+            if 'state=' in call.request.url]
+        assert len(state_calls) == 4
+
+        summary = summarize_backups(reports)
+        assert summary['done'] == summary['failed'] == 1
+        assert summary['verified'] == 1
+        assert summary['size'] == len(b'backup')
+
+    @responses.activate
+    def test_backup_orchestrator_timeout(self, admin_client, task_data):
+
+        responses.add(
+            method=responses.GET,
+            url=admin_client._build_uri('backups-list'),
+            status=200,
+            json={'backups': []},
+        )
+        responses.add(
+            method=responses.POST,
+            url=admin_client._build_uri('backup/ds_test'),
+            status=200,
+            json={'requestId': 1, 'taskId': '1'},
+        )
+        # task never finishes
+        del task_data['finished']
+        responses.add(
+            method=responses.GET,
+            url=admin_client._build_uri('tasks'),
+            status=200,
+            json=[task_data],
+        )
+        waiter = TaskWaiter(admin_client, min_interval=0.01, max_interval=0.01)
+        admin_client._task_waiter = waiter
+
+        reports = admin_client.backup_datasets(['ds_test'], timeout=0.05)
+        assert reports[0]['status'] == 'failed'
+        assert isinstance(reports[0]['error'], FutureTimeoutError)
+        # timed out task is no longer polled
+        deadline = time.monotonic() + 5
+        while waiter.pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not waiter.pending
+
+    def test_backup_orchestrator_errors(self, admin_client):
+
+        with pytest.raises(ValueError):
+            BackupOrchestrator(admin_client, max_concurrent=0)
@@ -0,0 +1,63 @@
+"""Tests on Fuseki manager chunked deletion."""
+
+import pytest
+
+from fuseki_manager.chunked_delete import build_pattern, delete_in_chunks
+
+
+class TestFusekiManagerChunkedDelete():
+
+    def test_chunked_delete_build_pattern(self):
+
+        assert build_pattern() == '?s ?p ?o'
+        assert build_pattern(pred='<http://url.org/p>') == (
+            '?s <http://url.org/p> ?o')
+
+    def test_chunked_delete(self):
+
+        triples = ['http://url.org/{}'.format(idx) for idx in range(25)]
+        selects = []
+        updates = []
+
+        def select(query):
+            selects.append(query)
+            return [
+                {'s': {'type': 'uri', 'value': sbj}}
+                for sbj in triples[:10]]
+
+        def update(query):
+            updates.append(query)
+            del triples[:10]
+
+        nb_updates = delete_in_chunks(
+            select, update, build_pattern(), graph='http://url.org/g',
+            chunk_size=10)
+        # last batch is not full: no more select
+        assert nb_updates == 3
+        assert len(selects) == 3
+        assert selects[0] == (
+            'SELECT * WHERE { GRAPH <http://url.org/g> { ?s ?p ?o } } '
+            'LIMIT 10')
+        assert updates[0] == (
+            'DELETE { GRAPH <http://url.org/g> { ?s ?p ?o } } WHERE { '
+            'SELECT * WHERE { GRAPH <http://url.org/g> { ?s ?p ?o } } '
+            'LIMIT 10 }')
+
+        assert delete_in_chunks(
+            select, update, build_pattern(), graph='http://url.org/g') == 0
+
+        with pytest.raises(ValueError):
+            delete_in_chunks(select, update, build_pattern(), chunk_size=0)
+
+    def test_chunked_delete_no_progress(self):
+
+        # query service sees triples the update does not delete
+        bindings = [
+            {'s': {'type': 'uri', 'value': 'http://url.org/{}'.format(idx)}}
+            for idx in range(10)]
+        updates = []
+        nb_updates = delete_in_chunks(
+            lambda query: bindings, updates.append, build_pattern(),
+            chunk_size=10)
+        assert nb_updates == 1
+        assert len(updates) == 1
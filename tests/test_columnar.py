@@ -0,0 +1,111 @@
+"""Tests on Fuseki manager columnar decoding of results."""
+
+import array
+import pytest
+import responses
+
+from fuseki_manager.columnar import (
+    parse_tsv_term, read_tsv_columns, decode_column, XSD)
+
+
+TSV_DATA = '\n'.join([
+    '?s\t?count\t?price\t?date\t?label',
+    '<http://url.org/dummy#foo>\t12\t1.5\t'
+    '"2018-02-01T17:07:23.027+00:00"^^<{xsd}dateTime>\t"Foo\\tbar"@en',
+    '<http://url.org/dummy#bar>\t"3"^^<{xsd}int>\t\t'
+    '"2018-02-01T00:00:00Z"^^<{xsd}dateTime>\t"Bar"',
+    '<http://url.org/dummy#foo>\t-1\t2e0\t\t',
+]).format(xsd=XSD)
+
+
+class TestFusekiManagerColumnar():
+
+    def test_columnar_parse_tsv_term(self):
+
+        assert parse_tsv_term('') is None
+        assert parse_tsv_term('<http://url.org/dummy#foo>') == (
+            'uri', 'http://url.org/dummy#foo')
+        assert parse_tsv_term('_:b0') == ('bnode', '_:b0')
+        assert parse_tsv_term('"a\\"b\\u00e9"') == (
+            'literal', 'a"bé', XSD + 'string')
+        assert parse_tsv_term('"12"^^<{}integer>'.format(XSD)) == (
+            'literal', '12', XSD + 'integer')
+        assert parse_tsv_term('-12') == ('literal', '-12', XSD + 'integer')
+        assert parse_tsv_term('1.5') == ('literal', '1.5', XSD + 'decimal')
+        assert parse_tsv_term('1.5E3') == ('literal', '1.5E3', XSD + 'double')
+        assert parse_tsv_term('true') == ('literal', 'true', XSD + 'boolean')
+        with pytest.raises(ValueError):
+            parse_tsv_term('"unterminated')
+        with pytest.raises(ValueError):
+            parse_tsv_term('foo:bar')
+
+    def test_columnar_decode_columns(self):
+
+        variables, columns = read_tsv_columns(
+            line.encode('utf-8') for line in TSV_DATA.split('\n'))
+        assert variables == ['s', 'count', 'price', 'date', 'label']
+        assert all(len(column) == 3 for column in columns)
+
+        kind, (indices, dictionary), validity = decode_column(columns[0])
+        assert kind == 'dictionary'
+        assert indices == array.array('i', [0, 1, 0])
+        assert dictionary == [
+            'http://url.org/dummy#foo', 'http://url.org/dummy#bar']
+
+        kind, values, validity = decode_column(columns[1])
+        assert kind == 'int64'
+        assert values == array.array('q', [12, 3, -1])
+        assert all(validity)
+
+        kind, values, validity = decode_column(columns[2])
+        assert kind == 'float64'
+        assert values == array.array('d', [1.5, 0., 2.])
+        assert validity == [True, False, True]
+
+        kind, values, validity = decode_column(columns[3])
+        assert kind == 'timestamp'
+        assert values[0] == 1517504843027000
+        assert values[1] == 1517443200000000
+        assert validity == [True, True, False]
+
+        kind, values, validity = decode_column(columns[4])
+        assert kind == 'string'
+        assert values == ['Foo\tbar', 'Bar', None]
+
+        # malformed or out of range values fall back to strings
+        for tokens in (
+                ['"12"^^<{}integer>'.format(XSD), '"x"^^<{}int>'.format(XSD)],
+                ['"2018-13-45"^^<{}date>'.format(XSD)],
+                ['"yesterday"^^<{}dateTime>'.format(XSD)],
+                [str(2 ** 64)]):
+            kind, values, validity = decode_column(tokens)
+            assert kind == 'string'
+            assert all(validity)
+
+        with pytest.raises(ValueError):
+            read_tsv_columns(['?a\t?b', '<http://url.org/dummy#foo>'])
+
+    @responses.activate
+    def test_columnar_query_to_arrow(self, sparql_client):
+
+        pytest.importorskip('pyarrow')
+
+        responses.add(
+            method=responses.GET,
+            url=sparql_client._build_uri('sparql'),
+            status=200,
+            body=TSV_DATA,
+            content_type='text/tab-separated-values',
+        )
+
+        table = sparql_client.query_to_arrow("SELECT * WHERE { ?s ?p ?o }")
+        assert responses.calls[0].request.headers['Accept'] == (
+            'text/tab-separated-values')
+        assert table.column_names == [
+            's', 'count', 'price', 'date', 'label']
+        assert table.num_rows == 3
+        assert table.column('count').to_pylist() == [12, 3, -1]
+        assert table.column('price').to_pylist() == [1.5, None, 2.]
+        assert table.column('s').to_pylist() == [
+            'http://url.org/dummy#foo', 'http://url.org/dummy#bar',
+            'http://url.org/dummy#foo']
@@ -0,0 +1,150 @@
+"""Tests on Fuseki manager adaptive concurrency limiting."""
+
+import threading
+import time
+import pytest
+import requests
+import responses
+
+from fuseki_manager import FusekiAdminClient, FusekiSPARQLClient
+from fuseki_manager.concurrency import ConcurrencyLimiter
+from fuseki_manager.exceptions import (
+    FusekiClientError, FusekiClientResponseError, ServerOverloadedError)
+
+
+class TestFusekiManagerConcurrencyLimiter():
+
+    def test_limiter_aimd(self):
+
+        limiter = ConcurrencyLimiter(initial_limit=4, max_limit=5)
+        assert limiter.limit == 4
+
+        # successes grow the limit only while it is used
+        started = limiter.acquire()
+        limiter.release(started)
+        assert limiter._limit == 4.
+        for _ in range(4):
+            tokens = [limiter.acquire() for _ in range(limiter.limit)]
+            for token in tokens:
+                limiter.release(token)
+        assert limiter.limit == 5
+        for _ in range(5):
+            tokens = [limiter.acquire() for _ in range(limiter.limit)]
+            for token in tokens:
+                limiter.release(token)
+        assert limiter.limit == 5
+
+        # a burst of failures cuts the limit once
+        tokens = [limiter.acquire() for _ in range(5)]
+        for token in tokens:
+            limiter.release(token, overloaded=True)
+        assert limiter.limit == 2
+        started = limiter.acquire()
+        limiter.release(started, overloaded=True)
+        assert limiter.limit == 1
+        started = limiter.acquire()
+        limiter.release(started, overloaded=True)
+        assert limiter.limit == 1
+        assert limiter.stats == {
+            'limit': 1, 'in_flight': 0, 'waiting': 0, 'shed': 0}
+
+        limiter = ConcurrencyLimiter(latency_threshold=0.)
+        limiter.release(limiter.acquire())
+        assert limiter.limit == 4
+
+        with pytest.raises(ValueError):
+            ConcurrencyLimiter(initial_limit=0)
+        with pytest.raises(ValueError):
+            ConcurrencyLimiter(backoff=1.)
+
+    def test_limiter_queue(self):
+
+        limiter = ConcurrencyLimiter(
+            initial_limit=1, max_queue=1, queue_timeout=0.01)
+        started = limiter.acquire()
+        # queue timeout elapsed
+        with pytest.raises(ServerOverloadedError):
+            limiter.acquire()
+
+        # queue is full
+        waiter = threading.Thread(target=limiter.acquire)
+        limiter.queue_timeout = None
+        waiter.start()
+        while limiter.stats['waiting'] < 1:
+            time.sleep(0.001)
+        with pytest.raises(ServerOverloadedError):
+            limiter.acquire()
+        assert limiter.stats['shed'] == 2
+
+        # waiting request gets freed slot
+        limiter.release(started)
+        waiter.join(1.)
+        assert not waiter.is_alive()
+        assert limiter.stats['in_flight'] == 1
+
+    @responses.activate
+    def test_limiter_transport(self):
+
+        limiter = ConcurrencyLimiter(initial_limit=4)
+        client = FusekiSPARQLClient(
+            'ds_test', concurrency_limiter=limiter)
+        # limiter is shared by internal clients
+        assert client._service_admin.concurrency_limiter is limiter
+        assert client._service_admin._service_data.concurrency_limiter is (
+            limiter)
+
+        uri = client._build_uri('sparql')
+        responses.add(responses.GET, uri, status=503)
+        with pytest.raises(FusekiClientResponseError):
+            client.raw_query('ASK { ?s ?p ?o }')
+        assert limiter.limit == 2
+        assert limiter.stats['in_flight'] == 0
+
+        responses.reset()
+        responses.add(
+            responses.GET, uri,
+            body=requests.exceptions.ConnectTimeout('timeout'))
+        with pytest.raises(FusekiClientError):
+            client.raw_query('ASK { ?s ?p ?o }')
+        assert limiter.limit == 1
+
+        responses.reset()
+        responses.add(responses.GET, uri, json={'boolean': True})
+        assert client.raw_query('ASK { ?s ?p ?o }') == {'boolean': True}
+        assert limiter.limit == 2
+        assert limiter.stats['in_flight'] == 0
+
+    @responses.activate
+    def test_limiter_streamed(self):
+
+        limiter = ConcurrencyLimiter(initial_limit=4)
+        client = FusekiSPARQLClient(
+            'ds_test', concurrency_limiter=limiter)
+        responses.add(
+            responses.GET, client._build_uri('sparql'),
+            body='<http://a> <http://b> <http://c> .\n' * 10,
+            content_type='application/n-triples')
+
+        # slot is kept while response body is read
+        query = 'CONSTRUCT WHERE { ?s ?p ?o }'
+        response = client._exec_graph_query(query, 'application/n-triples')
+        assert limiter.stats['in_flight'] == 1
+        response.close()
+        assert limiter.stats['in_flight'] == 0
+        response.close()
+        assert limiter.stats['in_flight'] == 0
+
+        # or once response body is consumed
+        response = client._exec_graph_query(query, 'application/n-triples')
+        assert len(response.content.splitlines()) == 10
+        assert limiter.stats['in_flight'] == 0
+        response.close()
+        assert limiter.stats['in_flight'] == 0
+        assert len(list(client.construct(query))) == 10
+        assert limiter.stats['in_flight'] == 0
+
+    def test_admin_client_limiter(self):
+        limiter = ConcurrencyLimiter()
+        client = FusekiAdminClient(concurrency_limiter=limiter)
+        assert client.concurrency_limiter is limiter
+        assert client._service_data.concurrency_limiter is limiter
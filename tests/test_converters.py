@@ -0,0 +1,97 @@
+"""Tests on Fuseki manager typed results decoding."""
+
+import array
+import datetime as dt
+import math
+from decimal import Decimal
+import pytest
+import responses
+
+from fuseki_manager import FusekiSPARQLClient
+from fuseki_manager.converters import (
+    ConverterRegistry, TypedResults, LangString, XSD)
+
+
+class TestFusekiManagerConverters():
+
+    def test_converters_registry(self):
+
+        registry = ConverterRegistry()
+        assert registry.convert(
+            {'type': 'literal', 'value': 'true',
+             'datatype': XSD + 'boolean'}) is True
+        assert registry.convert(
+            {'type': 'literal', 'value': '2018-02-01',
+             'datatype': XSD + 'date'}) == dt.date(2018, 2, 1)
+        assert registry.convert(
+            {'type': 'literal', 'value': 'x',
+             'datatype': 'http://url.org/dummy#type'}) == 'x'
+        assert registry.convert(None) is None
+
+        registry.register('http://url.org/dummy#type', str.upper)
+        assert registry.convert(
+            {'type': 'literal', 'value': 'x',
+             'datatype': 'http://url.org/dummy#type'}) == 'X'
+        # registries do not share converters
+        assert ConverterRegistry().get('http://url.org/dummy#type') is None
+
+        # malformed lexical values are left as strings
+        assert registry.convert_column([
+            {'type': 'literal', 'value': 'abc', 'datatype': XSD + 'integer'},
+            {'type': 'literal', 'value': '1.x', 'datatype': XSD + 'decimal'},
+            {'type': 'literal', 'value': 'now', 'datatype': XSD + 'dateTime'},
+            {'type': 'literal', 'value': '12', 'datatype': XSD + 'integer'},
+        ]) == ['abc', '1.x', 'now', 12]
+
+    def test_converters_registry_per_client(self):
+
+        client_1 = FusekiSPARQLClient('ds_1')
+        client_2 = FusekiSPARQLClient('ds_2')
+        client_1.converters.register('http://url.org/dummy#type', str.upper)
+        assert client_2.converters.get('http://url.org/dummy#type') is None
+        registry = ConverterRegistry()
+        assert FusekiSPARQLClient(
+            'ds_3', converters=registry).converters is registry
+
+    def test_converters_typed_results(self, typed_data):
+
+        results = TypedResults(typed_data)
+        assert len(results) == 2
+        assert not results._columns
+        assert results.column('count') == [12, 3]
+        # columns are converted only when accessed
+        assert list(results._columns) == ['count']
+
+        row = results[0]
+        assert row['price'] == Decimal('1.50')
+        assert row['date'] == dt.datetime(
+            2018, 2, 1, 17, 7, 23, 27000, tzinfo=dt.timezone.utc)
+        assert isinstance(row['label'], LangString)
+        assert row['label'] == 'Foo'
+        assert row['label'].lang == 'en'
+        assert list(results)[1] == {
+            's': 'http://url.org/dummy#bar', 'count': 3}
+
+        counts = results.column_array('count', 'q')
+        assert counts == array.array('q', [12, 3])
+        prices = results.column_array('price')
+        assert prices[0] == 1.5
+        assert math.isnan(prices[1])
+
+        with pytest.raises(ValueError):
+            results.column_array('price', 'q')
+        with pytest.raises(KeyError):
+            results.column('missing')
+
+    @responses.activate
+    def test_converters_typed_query(self, sparql_client, typed_data):
+
+        responses.add(
+            method=responses.GET,
+            url=sparql_client._build_uri('sparql'),
+            status=200,
+            json=typed_data,
+        )
+
+        results = sparql_client.typed_query("SELECT * WHERE { ?s ?p ?o }")
+        assert results.column('count') == [12, 3]
@@ -0,0 +1,76 @@
+"""Tests on Fuseki manager fleet management."""
+
+import time
+import threading
+import pytest
+import responses
+
+from fuseki_manager import FusekiAdminClient, FusekiFleet
+from fuseki_manager.exceptions import FusekiClientError
+
+
+class TestFusekiManagerFleet():
+
+    def test_fleet_init(self):
+
+        fleet = FusekiFleet(
+            [{'host': 'host1'}, {'host': 'host2', 'name': 'second'},
+             FusekiAdminClient(host='host3', port=3131)],
+            timeout=2., user='admin', pwd='pwd')
+        assert list(fleet.clients) == ['host1:3030', 'second', 'host3:3131']
+        assert fleet.clients['host1:3030'].timeout == 2.
+        assert fleet.clients['second'].auth_user == 'admin'
+        assert fleet.workers == 3
+
+        with pytest.raises(ValueError):
+            FusekiFleet([{'host': 'host1'}, {'host': 'host1'}])
+
+    @responses.activate
+    def test_fleet_health_and_stats(self, stat_data):
+
+        fleet = FusekiFleet([{'host': 'host1'}, {'host': 'host2'}])
+        responses.add(
+            method=responses.GET,
+            url=fleet.clients['host1:3030']._build_uri('ping'),
+            status=200,
+            body='2018-01-11T09:56:19.145+00:00',
+        )
+        responses.add(
+            method=responses.GET,
+            url=fleet.clients['host1:3030']._build_uri('stats'),
+            status=200,
+            json={'datasets': stat_data},
+        )
+        # host2 is not reachable
+
+        health = fleet.health()
+        assert health['up'] == ['host1:3030']
+        assert health['down'] == ['host2:3030']
+        assert health['latency']['host1:3030'] >= 0
+
+        totals = fleet.aggregate_stats()
+        assert totals['servers'] == 1
+        assert totals['datasets'] == 1
+        assert totals['Requests'] == 13256
+        assert isinstance(totals['errors']['host2:3030'], FusekiClientError)
+
+    def test_fleet_run_timeout(self):
+
+        release = threading.Event()
+
+        def operation(client, delay):
+            if client.host == 'slow':
+                release.wait(delay)
+            return client.host
+
+        fleet = FusekiFleet(
+            [{'host': 'fast'}, {'host': 'slow'}], timeout=.1)
+        started = time.monotonic()
+        reports = fleet.run(operation, 5.)
+        release.set()
+        assert time.monotonic() - started < 2.
+        assert reports['fast:3030']['status'] == 'done'
+        assert reports['fast:3030']['result'] == 'fast'
+        assert reports['slow:3030']['status'] == 'timeout'
+        assert FusekiFleet.results(reports) == {'fast:3030': 'fast'}
+        assert list(FusekiFleet.errors(reports)) == ['slow:3030']
@@ -0,0 +1,147 @@
+"""Tests on Fuseki manager RDF formats detection and transcoding."""
+
+import gzip
+import io
+import pytest
+import responses
+
+from fuseki_manager.rdf import parse_statement
+from fuseki_manager.formats import (
+    mime_type_from_path, sniff_mime_type, detect_mime_type, transcode,
+    decompress_source, RDF_XML, TURTLE, N_TRIPLES, N_QUADS, TRIG, JSON_LD)
+
+
+TURTLE_DATA = b"""@prefix ex: <http://url.org/dummy#> .
+ex:foo a ex:Class ;
+    ex:label "Foo"@en .
+"""
+
+TRIG_DATA = b"""@prefix ex: <http://url.org/dummy#> .
+ex:graph {
+    ex:foo a ex:Class .
+}
+"""
+
+
+class TestFusekiManagerFormats():
+
+    def test_formats_mime_type_from_path(self):
+
+        assert mime_type_from_path('dump.ttl') == TURTLE
+        assert mime_type_from_path('dump.nq.gz') == N_QUADS
+        assert mime_type_from_path('dump.TRIG') == TRIG
+        assert mime_type_from_path('dump.owl') == RDF_XML
+        assert mime_type_from_path('dump.gz') is None
+        assert mime_type_from_path('dump') is None
+
+    def test_formats_sniff_mime_type(self, ntriples_data):
+
+        assert sniff_mime_type(ntriples_data) == N_TRIPLES
+        assert sniff_mime_type(gzip.compress(ntriples_data)) == N_TRIPLES
+        assert sniff_mime_type(
+            b'<http://url.org/a> <http://url.org/b> "c" '
+            b'<http://url.org/g> .\n') == N_QUADS
+        assert sniff_mime_type(TURTLE_DATA) == TURTLE
+        assert sniff_mime_type(TRIG_DATA) == TRIG
+        assert sniff_mime_type(
+            b'<?xml version="1.0"?>\n<rdf:RDF/>') == RDF_XML
+        assert sniff_mime_type(b'  {"@context": {}}') == JSON_LD
+        assert sniff_mime_type(b'\n') is None
+        # statements followed by Turtle abbreviations
+        assert sniff_mime_type(
+            b'<http://url.org/a> <http://url.org/b> "c" .\n'
+            b'<http://url.org/a> <http://url.org/b> "d" ;\n') == TURTLE
+
+    def test_formats_detect_mime_type(self, tmpdir, ntriples_data):
+
+        path = tmpdir.join('dump.data')
+        path.write_binary(ntriples_data)
+        assert detect_mime_type(str(path)) == N_TRIPLES
+        assert detect_mime_type(str(tmpdir.join('dump.ttl'))) == TURTLE
+        # directories and non-sniffable sources get default type
+        assert detect_mime_type(str(tmpdir)) == RDF_XML
+        assert detect_mime_type(iter([TURTLE_DATA])) == RDF_XML
+
+        stream = io.BytesIO(b'junk' + TURTLE_DATA)
+        stream.seek(4)
+        assert detect_mime_type(stream) == TURTLE
+        assert stream.tell() == 4
+        assert detect_mime_type(TRIG_DATA) == TRIG
+
+    def test_formats_transcode(self, tmpdir):
+
+        pytest.importorskip('rdflib')
+
+        path, mime_type = transcode(TRIG_DATA, TRIG, dest_dir=str(tmpdir))
+        assert mime_type == N_QUADS
+        assert path.read_text(encoding='utf-8') == (
+            '<http://url.org/dummy#foo> '
+            '<http://www.w3.org/1999/02/22-rdf-syntax-ns#type> '
+            '<http://url.org/dummy#Class> <http://url.org/dummy#graph> .\n')
+
+        with pytest.raises(ValueError):
+            transcode(TRIG_DATA, 'text/plain')
+
+    def test_formats_transcode_multiline_literal(self, tmpdir):
+
+        pytest.importorskip('rdflib')
+
+        data = (
+            b'@prefix ex: <http://url.org/dummy#> .\n'
+            b'ex:foo ex:label """line 1\n"line" 2""" ;\n'
+            b'    ex:note "tab\\there"@en .\n')
+        path, mime_type = transcode(
+            gzip.compress(data), TURTLE, dest_dir=str(tmpdir))
+        assert mime_type == N_TRIPLES
+        lines = path.read_text(encoding='utf-8').splitlines()
+        # one valid statement per line
+        assert sorted(parse_statement(line)[2] for line in lines) == [
+            '"line 1\\n\\"line\\" 2"', '"tab\\there"@en']
+
+    def test_formats_decompress_source(self, tmpdir, ntriples_data):
+
+        compressed = gzip.compress(ntriples_data)
+        assert decompress_source(compressed).read() == ntriples_data
+        stream = io.BytesIO(compressed)
+        assert decompress_source(stream).read() == ntriples_data
+        assert decompress_source(ntriples_data) is ntriples_data
+        path = str(tmpdir.join('dump.nt.gz'))
+        assert decompress_source(path) == path
+
+    @responses.activate
+    def test_formats_upload_detection(
+            self, data_client, ds_name, tmpdir, ntriples_data):
+
+        responses.add(
+            method=responses.POST,
+            url=data_client._build_uri(ds_name, service_name='data'),
+            status=200,
+            json={'count': 3, 'tripleCount': 3, 'quadCount': 0},
+        )
+        path = tmpdir.join('dump.nt')
+        path.write_binary(ntriples_data)
+
+        data_client.upload_files(
+            ds_name, [str(path), io.BytesIO(TURTLE_DATA)])
+        body = b''.join(responses.calls[0].request.body)
+        assert b'Content-Type: application/n-triples' in body
+        assert b'Content-Type: text/turtle' in body
+
+        # gzip content without file name is sent decompressed
+        data_client.upload_files(ds_name, [gzip.compress(TURTLE_DATA)])
+        body = b''.join(responses.calls[1].request.body)
+        assert b'Content-Type: text/turtle' in body
+        assert TURTLE_DATA in body
+
+        # opened gzip file is sent decompressed, under no '.gz' name
+        gz_path = tmpdir.join('dump.nt.gz')
+        gz_path.write_binary(gzip.compress(ntriples_data * 100))
+        with open(str(gz_path), 'rb') as fobj:
+            data_client.upload_files(ds_name, [fobj])
+            request = responses.calls[2].request
+            body = b''.join(request.body)
+        assert ntriples_data * 100 in body
+        # decompressed size is unknown: no wrong 'Content-Length'
+        assert int(request.headers.get('Content-Length', len(body))) == len(
+            body)
+        assert b'filename="dump.nt"' in body
@@ -0,0 +1,202 @@
+"""Tests on Fuseki manager chunked ingestion."""
+
+import gzip
+import io
+import pytest
+import responses
+
+from fuseki_manager.ingest import (
+    line_based_mime_type, iter_chunks, BulkLoader, Checkpoint,
+    has_blank_nodes, skolemize, SKOLEM_PREFIX)
+from fuseki_manager.exceptions import IngestError, InvalidFileError
+
+
+class TestFusekiManagerIngest():
+
+    def test_ingest_line_based_mime_type(self):
+
+        assert line_based_mime_type('a.nt') == 'application/n-triples'
+        assert line_based_mime_type('a.NQ.gz') == 'application/n-quads'
+        assert line_based_mime_type('a.ttl') is None
+        assert line_based_mime_type('') is None
+
+    def test_ingest_iter_chunks(self, ntriples_data):
+
+        data = b'# comment\n' + ntriples_data
+        chunks = list(iter_chunks(io.BytesIO(data), 100))
+        assert len(chunks) > 1
+        assert b''.join(c.data for c in chunks) == data
+        assert sum(c.nb_statements for c in chunks) == 3
+        assert [c.index for c in chunks] == list(range(len(chunks)))
+        for chunk in chunks:
+            assert data[chunk.offset:chunk.offset + chunk.size] == chunk.data
+            # chunks end on statement boundaries
+            assert chunk.data.endswith(b'\n')
+
+    @responses.activate
+    def test_ingest_bulk_loader(self, data_client, ds_name, ntriples_data,
+                                tmpdir):
+
+        responses.add(
+            method=responses.POST,
+            url=data_client._build_uri(ds_name, service_name='data'),
+            status=200,
+            json={'count': 1, 'tripleCount': 1, 'quadCount': 0},
+        )
+
+        file_path = str(tmpdir.join('data.nt.gz'))
+        with gzip.open(file_path, 'wb') as fobj:
+            fobj.write(ntriples_data * 10)
+
+        reports = []
+        loader = BulkLoader(
+            data_client, ds_name, chunk_size=200, workers=3,
+            progress_callback=lambda p: reports.append(p.chunks),
+            blank_nodes='skolemize')
+        progress = loader.load([file_path])
+        assert progress.bytes == len(ntriples_data) * 10
+        assert progress.statements == 30
+        assert progress.chunks == len(responses.calls) > 1
+        assert reports == list(range(1, progress.chunks + 1))
+        assert b'Content-Type: application/n-triples' in b''.join(
+            responses.calls[0].request.body)
+        # a blank node label gets the same IRI in all chunks of a source
+        bodies = [b''.join(call.request.body) for call in responses.calls]
+        assert b'_:b0' not in b''.join(bodies)
+        skolem_iris = {
+            line.split(b' ')[0] for body in bodies
+            for line in body.splitlines() if SKOLEM_PREFIX.encode() in line}
+        assert len(skolem_iris) == 1
+
+    def test_ingest_skolemize(self):
+
+        data = (
+            b'_:b0 <http://a/_:x> "_:lit \\" _:y" .\n'
+            b'<http://s> <http://p> _:node.1.\n')
+        assert has_blank_nodes(data)
+        assert not has_blank_nodes(b'<http://s> <http://p> "_:lit" .\n')
+        assert skolemize(data, 'src') == (
+            b'<urn:fuseki-manager:bnode:src:b0> <http://a/_:x> '
+            b'"_:lit \\" _:y" .\n'
+            b'<http://s> <http://p> <urn:fuseki-manager:bnode:src:node.1>.\n')
+
+    def test_ingest_bulk_loader_errors(self, data_client, ds_name,
+                                       ntriples_data):
+
+        with pytest.raises(ValueError):
+            BulkLoader(data_client, ds_name, workers=0)
+        with pytest.raises(ValueError):
+            BulkLoader(data_client, ds_name, blank_nodes='drop')
+
+        loader = BulkLoader(data_client, ds_name)
+        with pytest.raises(InvalidFileError):
+            loader.load([io.BytesIO(ntriples_data)])
+        # blank nodes are refused by default
+        with responses.RequestsMock(assert_all_requests_are_fired=False):
+            with pytest.raises(InvalidFileError):
+                loader.load(
+                    [io.BytesIO(ntriples_data)], 'application/n-triples')
+
+        loader = BulkLoader(data_client, ds_name, blank_nodes='keep')
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                method=responses.POST,
+                url=data_client._build_uri(ds_name, service_name='data'),
+                status=500,
+            )
+            with pytest.raises(IngestError) as excinfo:
+                loader.load(
+                    [io.BytesIO(ntriples_data)], 'application/n-triples')
+        assert len(excinfo.value.failures) == 1
+        assert excinfo.value.progress.failed_chunks == 1
+
+    def test_ingest_bulk_loader_blank_nodes(self, data_client, ds_name,
+                                            ntriples_data, tmpdir):
+
+        uri = data_client._build_uri(ds_name, service_name='data')
+        response_data = {'count': 1, 'tripleCount': 1, 'quadCount': 0}
+        plain_data = b''.join(
+            line for line in ntriples_data.splitlines(True)
+            if b'_:' not in line)
+
+        # refused before any chunk is uploaded
+        loader = BulkLoader(data_client, ds_name, chunk_size=100)
+        with responses.RequestsMock(assert_all_requests_are_fired=False):
+            with pytest.raises(InvalidFileError):
+                loader.load(
+                    [io.BytesIO(plain_data * 10 + ntriples_data)],
+                    'application/n-triples')
+
+        # in flight uploads are checkpointed before error is raised
+        file_path = str(tmpdir.join('plain.nt'))
+        with open(file_path, 'wb') as fobj:
+            fobj.write(plain_data * 10)
+        bnodes_path = str(tmpdir.join('bnodes.nt'))
+        with open(bnodes_path, 'wb') as fobj:
+            fobj.write(ntriples_data)
+        checkpoint_path = str(tmpdir.join('load.ckpt'))
+        loader = BulkLoader(
+            data_client, ds_name, chunk_size=100, workers=2,
+            checkpoint_path=checkpoint_path)
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.POST, uri, status=200, json=response_data)
+            with pytest.raises(InvalidFileError):
+                loader.load([file_path, bnodes_path])
+            nb_chunks = len(rsps.calls)
+        assert nb_chunks > 1
+        checkpoint = Checkpoint(
+            checkpoint_path, ds_name=ds_name, chunk_size=100)
+        with checkpoint:
+            key = checkpoint.start_file(file_path)
+            assert checkpoint.is_completed(key)
+            assert checkpoint.results(key) == [response_data] * nb_chunks
+
+    def test_ingest_bulk_loader_checkpoint(self, data_client, ds_name,
+                                           ntriples_data, tmpdir):
+
+        file_path = str(tmpdir.join('data.nt'))
+        with open(file_path, 'wb') as fobj:
+            fobj.write(ntriples_data * 4)
+        checkpoint_path = str(tmpdir.join('load.ckpt'))
+        uri = data_client._build_uri(ds_name, service_name='data')
+        response_data = {'count': 1, 'tripleCount': 1, 'quadCount': 0}
+
+        # server fails after the second chunk
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.POST, uri, status=200, json=response_data)
+            rsps.add(responses.POST, uri, status=200, json=response_data)
+            rsps.add(responses.POST, uri, status=503)
+            loader = BulkLoader(
+                data_client, ds_name, chunk_size=200, workers=1,
+                checkpoint_path=checkpoint_path, blank_nodes='skolemize')
+            with pytest.raises(IngestError) as excinfo:
+                loader.load([file_path])
+            nb_chunks = len(rsps.calls)
+        assert excinfo.value.progress.chunks == 2
+
+        # simulate a record interrupted while being written
+        with open(checkpoint_path, 'a') as fobj:
+            fobj.write('{"file": "trunc')
+
+        # rerun only uploads remaining chunks
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.POST, uri, status=200, json=response_data)
+            progress = loader.load([file_path])
+            assert len(rsps.calls) == nb_chunks - 2
+        assert progress.chunks == nb_chunks - 2
+
+        checkpoint = Checkpoint(
+            checkpoint_path, ds_name=ds_name, chunk_size=200)
+        with checkpoint:
+            key = checkpoint.start_file(file_path)
+            assert checkpoint.is_completed(key)
+            assert checkpoint.results(key) == [response_data] * nb_chunks
+
+        # completed files are skipped
+        with responses.RequestsMock(assert_all_requests_are_fired=False):
+            progress = loader.load([file_path])
+        assert progress.chunks == 0
+
+        with pytest.raises(ValueError):
+            Checkpoint(checkpoint_path, ds_name=ds_name, chunk_size=100)
@@ -0,0 +1,98 @@
+"""Tests on Fuseki manager JSON decoding."""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import responses
+
+from fuseki_manager import FusekiSPARQLClient
+from fuseki_manager.json_decoder import (
+    JSONDecoder, get_loads, stdlib_loads, AUTO_BACKENDS)
+from fuseki_manager.exceptions import FusekiClientResponseError
+
+
+class TestFusekiManagerJSONDecoder():
+
+    def test_json_decoder_get_loads(self):
+
+        assert get_loads('json') is stdlib_loads
+        assert get_loads()(b'{"a": [1, 2]}') == {'a': [1, 2]}
+        with pytest.raises(ValueError):
+            get_loads('unknown')
+        # ujson floats may differ from stdlib's: never picked by 'auto'
+        assert 'ujson' not in AUTO_BACKENDS
+        assert get_loads('auto').__module__ in (
+            'orjson', stdlib_loads.__module__)
+
+    def test_json_decoder_offload(self):
+
+        calls = []
+
+        def loads(content):
+            calls.append(content)
+            return json.loads(content.decode('utf-8'))
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            decoder = JSONDecoder(loads, executor=executor, offload_size=10)
+            # small body decoded in calling thread
+            future = decoder.decode_async(b'[1]')
+            assert future.done()
+            assert future.result() == [1]
+            # large body decoded by executor
+            assert decoder.decode(b'{"a": "0123456789"}') == {
+                'a': '0123456789'}
+            with pytest.raises(ValueError):
+                decoder.decode(b'{"invalid": 0123456789')
+        assert len(calls) == 3
+
+    @responses.activate
+    def test_json_decoder_client(self, value_data):
+
+        loaded = []
+
+        def loads(content):
+            loaded.append(len(content))
+            return stdlib_loads(content)
+
+        sparql_client = FusekiSPARQLClient('ds_test', json_decoder=loads)
+        uri = sparql_client._build_uri('sparql')
+        responses.add(
+            method=responses.GET, url=uri, status=200, json=value_data)
+        assert sparql_client.raw_query('SELECT ?o WHERE {}') == value_data
+        assert loaded
+
+        responses.reset()
+        responses.add(
+            method=responses.GET, url=uri, status=200, body='{"head": ')
+        with pytest.raises(FusekiClientResponseError):
+            sparql_client.raw_query('SELECT ?o WHERE {}')
+
+    @responses.activate
+    def test_json_decoder_client_async(self, value_data):
+
+        decoded = threading.Event()
+
+        def loads(content):
+            # decoding waits for the calling thread to go on
+            assert decoded.wait(5)
+            return stdlib_loads(content)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            decoder = JSONDecoder(loads, executor=executor, offload_size=0)
+            sparql_client = FusekiSPARQLClient(
+                'ds_test', json_decoder=decoder)
+            uri = sparql_client._build_uri('sparql')
+            responses.add(
+                method=responses.GET, url=uri, status=200, json=value_data)
+            future = sparql_client.raw_query_async('SELECT ?o WHERE {}')
+            assert not future.done()
+            decoded.set()
+            assert future.result(5) == value_data
+
+            responses.reset()
+            responses.add(
+                method=responses.GET, url=uri, status=200, body='{"head": ')
+            future = sparql_client.raw_query_async('SELECT ?o WHERE {}')
+            with pytest.raises(FusekiClientResponseError):
+                future.result(5)
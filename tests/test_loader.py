@@ -0,0 +1,146 @@
+"""Tests on Fuseki manager batched lookups."""
+
+import json
+import re
+from urllib.parse import parse_qs
+import pytest
+import responses
+
+from fuseki_manager.exceptions import (
+    EmptyDBError, UniquenessDBError, ArgumentError,
+    FusekiClientResponseError)
+
+
+EX = 'http://url.org/dummy#'
+RDF_TYPE = 'http://www.rdf.org/#type'
+GRAPH = [
+    (EX + 'a', RDF_TYPE, EX + 'Class'),
+    (EX + 'b', RDF_TYPE, EX + 'Class'),
+    (EX + 'b', RDF_TYPE, EX + 'Other'),
+    (EX + 'a', EX + 'label', 'A'),
+]
+
+
+def _query_callback(request):
+    """Evaluate lookups batch queries on GRAPH."""
+    query = parse_qs(request.body)['query'][0]
+    variables, rows = re.search(
+        r'VALUES \(\?k ([^)]*)\) \{ (.*) \} \?s', query).groups()
+    variables = [var.lstrip('?') for var in variables.split()]
+    bindings = []
+    for row in re.findall(r'\(([^)]*)\)', rows):
+        idx, *terms = row.split()
+        terms = [
+            RDF_TYPE if term == 'rdf:type' else term.strip('<>')
+            for term in terms]
+        criteria = dict(zip(variables, terms))
+        for triple in GRAPH:
+            values = dict(zip('spo', triple))
+            if all(values[var] == val for var, val in criteria.items()):
+                binding = {'k': {'type': 'literal', 'value': idx}}
+                binding.update({
+                    var: {'type': 'uri', 'value': val}
+                    for var, val in values.items()})
+                bindings.append(binding)
+    body = {
+        'head': {'vars': ['k', 's', 'p', 'o']},
+        'results': {'bindings': bindings}}
+    return 200, {}, json.dumps(body)
+
+
+class TestFusekiManagerValueLoader():
+
+    @responses.activate
+    def test_value_loader(self, sparql_client):
+
+        responses.add_callback(
+            responses.POST, sparql_client._build_uri('sparql'),
+            callback=_query_callback, content_type='application/json')
+
+        loader = sparql_client.value_loader(window=None)
+        type_a = loader.load_value(sbj=EX + 'a', pred='rdf:type')
+        type_b = loader.load_value(sbj=EX + 'b', pred='rdf:type')
+        first_b = loader.load_value(
+            sbj=EX + 'b', pred='rdf:type', raise_if_many=False)
+        missing = loader.load_value(sbj=EX + 'c', pred='rdf:type')
+        missing_ok = loader.load_value(
+            sbj=EX + 'c', pred='rdf:type', raise_if_empty=False)
+        subjects = loader.load_value(pred='rdf:type', obj=EX + 'Other')
+        triples = loader.load_triples(sbj=EX + 'a')
+        # memoized
+        assert loader.load_value(sbj=EX + 'a', pred='rdf:type') is type_a
+        assert not type_a.done()
+
+        loader.dispatch()
+        # one query per lookup shape
+        assert loader.nb_queries == 3
+        assert len(responses.calls) == 3
+        assert type_a.result() == EX + 'Class'
+        with pytest.raises(UniquenessDBError):
+            type_b.result()
+        assert first_b.result() in (EX + 'Class', EX + 'Other')
+        with pytest.raises(EmptyDBError):
+            missing.result()
+        assert missing_ok.result() is None
+        assert subjects.result() == EX + 'b'
+        assert sorted(triples.result()) == sorted(GRAPH[0:1] + GRAPH[3:])
+
+        with pytest.raises(ArgumentError):
+            loader.load_value(sbj=EX + 'a')
+
+    @responses.activate
+    def test_value_loader_window(self, sparql_client):
+
+        responses.add_callback(
+            responses.POST, sparql_client._build_uri('sparql'),
+            callback=_query_callback, content_type='application/json')
+
+        loader = sparql_client.value_loader(window=0.01, max_batch_size=2)
+        # full batch is sent at once
+        futures = [
+            loader.load_value(sbj=EX + name, pred='rdf:type')
+            for name in ('a', 'c')]
+        assert all(future.done() for future in futures)
+        # other lookups are sent once window elapsed
+        assert loader.value(sbj=EX + 'a', pred=EX + 'label') == 'A'
+        assert loader.nb_queries == 2
+
+    @responses.activate
+    def test_value_loader_no_window(self, sparql_client):
+
+        responses.add_callback(
+            responses.POST, sparql_client._build_uri('sparql'),
+            callback=_query_callback, content_type='application/json')
+
+        # waiting sends pending lookups
+        loader = sparql_client.value_loader(window=None)
+        pending = loader.load_value(sbj=EX + 'b', pred=EX + 'label',
+                                    raise_if_empty=False)
+        assert loader.value(sbj=EX + 'a', pred=EX + 'label') == 'A'
+        assert pending.done()
+        assert loader.nb_queries == 1
+
+    @responses.activate
+    def test_value_loader_failure(self, sparql_client):
+
+        uri = sparql_client._build_uri('sparql')
+        responses.add(responses.POST, uri, status=500)
+
+        loader = sparql_client.value_loader(window=None)
+        with pytest.raises(FusekiClientResponseError):
+            loader.value(sbj=EX + 'a', pred=EX + 'label')
+
+        # failed lookup is retried
+        responses.reset()
+        responses.add_callback(
+            responses.POST, uri,
+            callback=_query_callback, content_type='application/json')
+        assert loader.value(sbj=EX + 'a', pred=EX + 'label') == 'A'
+
+        # errors while distributing results fail unresolved lookups
+        responses.reset()
+        responses.add(responses.POST, uri, json={'head': {'vars': []}})
+        future = loader.load_value(sbj=EX + 'b', pred=EX + 'label')
+        loader.dispatch()
+        with pytest.raises(KeyError):
+            future.result(5)
@@ -0,0 +1,114 @@
+"""Tests on Fuseki TDB2 datasets maintenance."""
+
+import copy
+import pytest
+import responses
+
+from fuseki_manager.api_client.maintenance import CompactionScheduler
+from fuseki_manager.api_client.tasks import TaskWaiter
+
+
+class TestFusekiCompactionScheduler():
+
+    def test_compaction_scheduler_init(self, admin_client):
+
+        with pytest.raises(ValueError):
+            CompactionScheduler(admin_client, max_size=1024)
+
+    @responses.activate
+    def test_compaction_scheduler(self, admin_client, ds_name, stat_data,
+                                  task_data, tmpdir):
+
+        ds_dir = tmpdir.mkdir(ds_name).mkdir('Data-0001')
+        ds_dir.join('nodes.dat').write_binary(b'0' * 2048)
+        other_stats = copy.deepcopy(stat_data['/{}'.format(ds_name)])
+        for endpoint in other_stats['endpoints'].values():
+            endpoint['Requests'] = 0
+        all_stats = dict(stat_data, **{'/ds_other': other_stats})
+
+        responses.add(
+            method=responses.GET,
+            url=admin_client._build_uri('stats'),
+            status=200,
+            json={'datasets': all_stats},
+        )
+        responses.add(
+            method=responses.GET,
+            url=admin_client._build_uri('stats/{}'.format(ds_name)),
+            status=200,
+            json={'datasets': stat_data},
+        )
+        responses.add(
+            method=responses.POST,
+            url='{}?deleteOld=true'.format(
+                admin_client._build_uri('compact/{}'.format(ds_name))),
+            status=202,
+            json={'requestId': 1, 'taskId': '1'},
+        )
+        responses.add(
+            method=responses.GET,
+            url=admin_client._build_uri('tasks'),
+            status=200,
+            json=[dict(task_data, task='compact')],
+        )
+        admin_client._task_waiter = TaskWaiter(
+            admin_client, min_interval=0.01)
+
+        scheduler = admin_client.compaction_scheduler(
+            max_size=1024, max_updates=1000, databases_dir=str(tmpdir),
+            timeout=5)
+        candidates = scheduler.check()
+        assert candidates == [{
+            'ds_name': ds_name, 'size': 2048, 'updates': 4020,
+            'reasons': ['size', 'updates']}]
+
+        reports = scheduler.run()
+        assert len(reports) == 1
+        assert reports[0]['status'] == 'done'
+        assert reports[0]['task_id'] == '1'
+        assert reports[0]['size_before'] == 2048
+
+        # updates are counted from last compaction
+        scheduler.max_size = None
+        assert scheduler.check() == []
+
+    @responses.activate
+    def test_compaction_scheduler_tdb2_only(self, admin_client, ds_name,
+                                            stat_data, tmpdir):
+
+        ds_stats = stat_data['/{}'.format(ds_name)]
+        all_stats = {
+            '/{}'.format(name): ds_stats
+            for name in ('ds_tdb2', 'ds_tdb1', 'ds_mem',)}
+        responses.add(
+            method=responses.GET,
+            url=admin_client._build_uri('stats'),
+            status=200,
+            json={'datasets': all_stats},
+        )
+        tmpdir.mkdir('ds_tdb2').mkdir('Data-0001')
+        tmpdir.mkdir('ds_tdb1').join('nodes.dat').write_binary(b'0')
+
+        # types told from storage layout
+        scheduler = CompactionScheduler(
+            admin_client, max_updates=1000, databases_dir=str(tmpdir))
+        assert scheduler.is_tdb2('ds_tdb2') is True
+        assert scheduler.is_tdb2('ds_tdb1') is False
+        assert scheduler.is_tdb2('ds_mem') is False
+        assert [c['ds_name'] for c in scheduler.check()] == ['ds_tdb2']
+
+        # datasets whose compaction is rejected are no longer candidates
+        responses.add(
+            method=responses.POST,
+            url='{}?deleteOld=true'.format(
+                admin_client._build_uri('compact/ds_mem')),
+            status=400,
+        )
+        scheduler = CompactionScheduler(admin_client, max_updates=1000)
+        assert scheduler.is_tdb2('ds_mem') is None
+        reports = scheduler.run(['ds_mem'])
+        assert reports[0]['status'] == 'failed'
+        assert reports[0]['error'].status_code == 400
+        assert scheduler.is_tdb2('ds_mem') is False
+        assert [c['ds_name'] for c in scheduler.check()] == [
+            'ds_tdb2', 'ds_tdb1']
@@ -0,0 +1,73 @@
+"""Tests on Fuseki manager streaming multipart encoder."""
+
+import os
+import io
+import mmap
+import pytest
+
+from fuseki_manager.multipart import MultipartEncoder
+from fuseki_manager.exceptions import InvalidFileError
+
+
+class TestFusekiManagerMultipart():
+
+    def test_multipart_encoder(self):
+
+        file_path = os.path.realpath(__file__)
+        with open(file_path, 'rb') as fobj:
+            file_data = fobj.read()
+        fields = [
+            ('file', file_path, 'text/plain'),
+            ('file', b'demo', 'text/plain'),
+            ('file', memoryview(b'test'), 'text/plain'),
+            ('file', io.BytesIO(b'buffer'), 'text/plain'),
+        ]
+        encoder = MultipartEncoder(fields, boundary='bound', chunk_size=16)
+        assert encoder.content_type == 'multipart/form-data; boundary=bound'
+
+        body = b''.join(encoder)
+        assert encoder.len == len(body)
+        assert body.startswith(
+            b'--bound\r\n'
+            b'Content-Disposition: form-data; name="file"; '
+            b'filename="test_multipart.py"\r\n'
+            b'Content-Type: text/plain\r\n\r\n')
+        assert file_data in body
+        assert b'\r\n\r\ndemo\r\n--bound\r\n' in body
+        assert b'\r\n\r\ntest\r\n--bound\r\n' in body
+        assert body.endswith(b'\r\n\r\nbuffer\r\n--bound--\r\n')
+
+        # file opened by encoder is closed once sent
+        assert all(part._owned_file is None for part in encoder._parts)
+
+        # sources are read in fixed-size chunks
+        chunks = list(encoder._parts[0].iter_data(16))
+        assert max(len(chunk) for chunk in chunks) == 16
+
+    def test_multipart_encoder_mmap_and_generator(self, tmpdir):
+
+        file_path = str(tmpdir.join('data.nt'))
+        with open(file_path, 'wb') as fobj:
+            fobj.write(b'mapped data')
+
+        with open(file_path, 'rb') as fobj:
+            mapped = mmap.mmap(fobj.fileno(), 0, access=mmap.ACCESS_READ)
+            encoder = MultipartEncoder(
+                [('file', mapped, 'application/n-triples')])
+            body = b''.join(encoder)
+            assert encoder.len == len(body)
+            assert b'\r\n\r\nmapped data\r\n' in body
+            mapped.close()
+
+        chunks = (chunk for chunk in [b'gen', b'', b'erator'])
+        encoder = MultipartEncoder([('file', chunks, 'text/plain')])
+        assert encoder.len is None
+        assert b'\r\n\r\ngenerator\r\n' in b''.join(encoder)
+
+    def test_multipart_encoder_errors(self):
+
+        with pytest.raises(InvalidFileError):
+            MultipartEncoder([('file', 'not_a_file', 'text/plain')])
+
+        with pytest.raises(InvalidFileError):
+            MultipartEncoder([('file', 42, 'text/plain')])
@@ -0,0 +1,220 @@
+"""Tests on Fuseki manager persistent query cache."""
+
+import copy
+import json
+import os
+import responses
+
+from fuseki_manager import FusekiSPARQLClient
+from fuseki_manager.query_cache import QueryCache, data_version
+
+
+class TestFusekiManagerQueryCache():
+
+    def test_query_cache_get_set(self, tmp_path):
+
+        cache = QueryCache(tmp_path / 'cache.db')
+        assert cache.get('ds', 'SELECT 1', 'v1') is None
+        cache.set('ds', 'SELECT 1', 'v1', b'{"a": 1}')
+        assert cache.get('ds', 'SELECT 1', 'v1') == b'{"a": 1}'
+        assert cache.get('ds', 'SELECT 1', 'v2') is None
+        assert cache.get('other', 'SELECT 1', 'v1') is None
+
+        # entries of other versions are removed
+        cache.set('ds', 'SELECT 2', 'v2', b'{"a": 2}')
+        assert cache.get('ds', 'SELECT 1', 'v1') is None
+        assert cache.stats['entries'] == 1
+
+        # cache is shared through its file
+        other_cache = QueryCache(tmp_path / 'cache.db')
+        assert other_cache.get('ds', 'SELECT 2', 'v2') == b'{"a": 2}'
+
+        cache.invalidate('ds')
+        assert cache.stats == {'entries': 0, 'size': 0}
+        cache.close()
+        other_cache.close()
+
+    def test_query_cache_eviction(self, tmp_path):
+
+        # not compressible
+        content = os.urandom(1000)
+        cache = QueryCache(tmp_path / 'cache.db', max_size=2500)
+        for idx in range(3):
+            cache.set('ds', 'SELECT {}'.format(idx), 'v1', content)
+        # least recently used entry is evicted
+        assert cache.get('ds', 'SELECT 0', 'v1') is None
+        assert cache.get('ds', 'SELECT 2', 'v1') == content
+        assert cache.stats['size'] <= 2500
+        cache.close()
+
+    @responses.activate
+    def test_query_cache_data_version(self, admin_client, ds_name, stat_data):
+
+        responses.add(
+            method=responses.GET,
+            url=admin_client._build_uri('server'),
+            status=200,
+            json={'startDateTime': '2018-01-11T09:56:19.145+00:00'},
+        )
+        responses.add(
+            method=responses.GET,
+            url=admin_client._build_uri('stats/{}'.format(ds_name)),
+            status=200,
+            json={'datasets': stat_data},
+        )
+        # update + upload + data + ''
+        assert data_version(admin_client, ds_name) == (
+            '2018-01-11T09:56:19.145+00:00#4020')
+
+        # a write is in progress
+        stat_data['/{}'.format(ds_name)]['endpoints']['update'][
+            'Requests'] += 1
+        responses.replace(
+            responses.GET, admin_client._build_uri('stats/{}'.format(ds_name)),
+            status=200, json={'datasets': stat_data})
+        assert data_version(admin_client, ds_name) is None
+
+        # server start time is requested once, then again after a restart
+        server_uri = admin_client._build_uri('server')
+        assert len([
+            call for call in responses.calls
+            if call.request.url == server_uri]) == 1
+        for endpoint in stat_data['/{}'.format(ds_name)][
+                'endpoints'].values():
+            endpoint['Requests'] = endpoint['RequestsGood'] = 0
+            endpoint['RequestsBad'] = 0
+        responses.replace(
+            responses.GET, admin_client._build_uri('stats/{}'.format(ds_name)),
+            status=200, json={'datasets': stat_data})
+        responses.replace(
+            responses.GET, server_uri,
+            status=200, json={'startDateTime': '2018-01-12T00:00:00+00:00'})
+        assert data_version(admin_client, ds_name) == (
+            '2018-01-12T00:00:00+00:00#0')
+
+    @responses.activate
+    def test_query_cache_sparql_client(
+            self, tmp_path, stat_data, value_data):
+
+        cache = QueryCache(tmp_path / 'cache.db')
+        sparql_client = FusekiSPARQLClient(
+            'ds_test', query_cache=cache, cache_ttl=60)
+        admin_client = sparql_client._service_admin
+        stats_uri = admin_client._build_uri('stats/ds_test')
+        query_uri = sparql_client._build_uri('sparql')
+        stat_data = {'/ds_test': stat_data['/ds_test']}
+
+        responses.add(
+            method=responses.GET, url=admin_client._build_uri('server'),
+            status=200, json={'startDateTime': '2018-01-11T09:56:19'})
+        responses.add(
+            method=responses.GET, url=stats_uri,
+            status=200, json={'datasets': stat_data})
+        responses.add(
+            method=responses.GET, url=query_uri,
+            status=200, json=value_data)
+
+        query = 'SELECT ?o WHERE { ?s ?p ?o }'
+        assert sparql_client.raw_query(query) == value_data
+        assert sparql_client.raw_query(query) == value_data
+        query_calls = [
+            call for call in responses.calls
+            if call.request.url.startswith(query_uri)]
+        assert len(query_calls) == 1
+
+        # server info is cached by admin client
+        server_calls = [
+            call for call in responses.calls
+            if call.request.url == admin_client._build_uri('server')]
+        assert len(server_calls) == 1
+
+        # a write in progress disables cache
+        stat_data = copy.deepcopy(stat_data)
+        update_stats = stat_data['/ds_test']['endpoints']['update']
+        update_stats['Requests'] += 1
+        responses.replace(
+            responses.GET, url=stats_uri,
+            status=200, json={'datasets': stat_data})
+        assert sparql_client.raw_query(query) == value_data
+        assert cache.stats['entries'] == 1
+
+        # a finished write changes data version
+        update_stats['RequestsGood'] += 1
+        responses.replace(
+            responses.GET, url=stats_uri,
+            status=200, json={'datasets': stat_data})
+        assert sparql_client.raw_query(query) == value_data
+        sparql_client.raw_query(query, use_cache=False)
+        query_calls = [
+            call for call in responses.calls
+            if call.request.url.startswith(query_uri)]
+        assert len(query_calls) == 4
+        cache.close()
+
+    @responses.activate
+    def test_query_cache_write_during_query(
+            self, tmp_path, stat_data, value_data):
+
+        cache = QueryCache(tmp_path / 'cache.db')
+        sparql_client = FusekiSPARQLClient('ds_test', query_cache=cache)
+        admin_client = sparql_client._service_admin
+        stats_uri = admin_client._build_uri('stats/ds_test')
+        stat_data = {'/ds_test': stat_data['/ds_test']}
+        update_stats = stat_data['/ds_test']['endpoints']['update']
+
+        def query_callback(request):
+            # a write starts and ends while query runs
+            update_stats['Requests'] += 1
+            update_stats['RequestsGood'] += 1
+            return 200, {}, json.dumps(value_data)
+
+        responses.add(
+            method=responses.GET, url=admin_client._build_uri('server'),
+            status=200, json={'startDateTime': '2018-01-11T09:56:19'})
+        responses.add_callback(
+            responses.GET, stats_uri,
+            callback=lambda request: (
+                200, {}, json.dumps({'datasets': stat_data})))
+        responses.add_callback(
+            responses.GET, sparql_client._build_uri('sparql'),
+            callback=query_callback, content_type='application/json')
+
+        query = 'SELECT ?o WHERE { ?s ?p ?o }'
+        assert sparql_client.raw_query(query) == value_data
+        assert cache.stats['entries'] == 0
+        cache.close()
+
+    @responses.activate
+    def test_query_cache_hit_requests(self, tmp_path, stat_data, value_data):
+
+        cache = QueryCache(tmp_path / 'cache.db')
+        sparql_client = FusekiSPARQLClient('ds_test', query_cache=cache)
+        admin_client = sparql_client._service_admin
+        stats_uri = admin_client._build_uri('stats/ds_test')
+
+        responses.add(
+            method=responses.GET, url=admin_client._build_uri('server'),
+            status=200, json={'startDateTime': '2018-01-11T09:56:19'})
+        responses.add(
+            method=responses.GET, url=stats_uri,
+            status=200, json={'datasets': stat_data})
+        responses.add(
+            method=responses.GET, url=sparql_client._build_uri('sparql'),
+            status=200, json=value_data)
+
+        query = 'SELECT ?o WHERE { ?s ?p ?o }'
+        sparql_client.raw_query(query)
+        nb_calls = len(responses.calls)
+        # with default 'cache_ttl', a hit only requests statistics
+        assert sparql_client.raw_query(query) == value_data
+        assert [
+            call.request.url for call in responses.calls[nb_calls:]] == [
+                stats_uri]
+        cache.close()
+
+    def test_query_cache_admin_client(self):
+
+        # admin client is only built when needed
+        sparql_client = FusekiSPARQLClient('ds_test', cache_ttl=30)
+        assert sparql_client._admin is None
+        assert sparql_client._service_admin._cache.ttl == 30
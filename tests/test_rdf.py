@@ -0,0 +1,43 @@
+"""Tests on Fuseki manager line-based RDF helpers."""
+
+import pytest
+
+from fuseki_manager.rdf import (
+    parse_statement, serialize_statement, iter_statements, quote_literal)
+
+
+class TestFusekiManagerRDF():
+
+    def test_rdf_parse_statement(self):
+
+        line = '<http://a.org/s> <http://a.org/p> "a \\"b\\" c"@en-GB .'
+        assert parse_statement(line) == (
+            '<http://a.org/s>', '<http://a.org/p>', '"a \\"b\\" c"@en-GB')
+
+        line = b'_:b1 <http://a.org/p> _:b2 <http://a.org/g> . # quad'
+        assert parse_statement(line) == (
+            '_:b1', '<http://a.org/p>', '_:b2', '<http://a.org/g>')
+
+        assert parse_statement('') is None
+        assert parse_statement('  # comment') is None
+
+    def test_rdf_parse_statement_errors(self):
+
+        with pytest.raises(ValueError):
+            parse_statement('<http://a.org/s> <http://a.org/p> .')
+
+    def test_rdf_serialize_statement(self, ntriples_data):
+
+        lines = ntriples_data.decode('utf-8').splitlines(keepends=True)
+        statements = list(iter_statements(lines))
+        assert len(statements) == 3
+        assert [serialize_statement(s) for s in statements] == lines
+
+    def test_rdf_quote_literal(self):
+
+        literal = quote_literal('line 1\n"line"\t2\\')
+        assert literal == '"line 1\\n\\"line\\"\\t2\\\\"'
+        assert parse_statement('<a> <b> {} .'.format(literal))[2] == literal
+        assert quote_literal('A', language='en') == '"A"@en'
+        assert quote_literal('1', datatype='http://x.org/int') == (
+            '"1"^^<http://x.org/int>')
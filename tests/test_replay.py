@@ -0,0 +1,182 @@
+"""Tests on Fuseki manager queries recording and replay."""
+
+import json
+import time
+import pytest
+import responses
+
+from fuseki_manager import FusekiSPARQLClient
+from fuseki_manager.cli import replay_main
+from fuseki_manager.replay import (
+    QueryRecorder, Replayer, read_log, fingerprint, percentile)
+
+
+QUERY_URI = 'http://localhost:3030/ds_test/sparql'
+UPDATE_URI = 'http://localhost:3030/ds_test/update'
+EMPTY_RESULTS = {'head': {'vars': []}, 'results': {'bindings': []}}
+
+
+def _client_factory(ds_name):
+    return FusekiSPARQLClient(ds_name)
+
+
+def _entries(nb_queries, nb_updates):
+    return [
+        {'time': 0., 'kind': 'query', 'ds_name': 'ds_test',
+         'query': 'SELECT * WHERE {{ ?s ?p {} }}'.format(idx)}
+        for idx in range(nb_queries)
+    ] + [
+        {'time': 0., 'kind': 'update', 'ds_name': 'ds_test',
+         'query': 'INSERT DATA {{ <a> <b> "{}" }}'.format(idx)}
+        for idx in range(nb_updates)
+    ]
+
+
+class TestFusekiManagerReplay():
+
+    def test_fingerprint(self):
+        assert (
+            fingerprint('SELECT * WHERE { <http://a> ?p "x" } LIMIT 10') ==
+            fingerprint('SELECT *  WHERE {\n<http://b> ?p "y"} LIMIT 25'))
+        assert (
+            fingerprint('SELECT ?v WHERE { VALUES ?s { <a> <b> } ?s ?p ?v }')
+            == fingerprint('SELECT ?v WHERE { VALUES ?s { <c> } ?s ?p ?v }'))
+        assert (
+            fingerprint('PREFIX ex: <http://a#> ASK { ex:a ex:p ex:b.}') ==
+            fingerprint('PREFIX ex: <http://b#> ASK { ex:c ex:q :d . }'))
+        assert (
+            fingerprint('SELECT * WHERE { ?s ?p ?o }') !=
+            fingerprint('SELECT * WHERE { ?s ?p ?o2 }'))
+        assert (
+            fingerprint('SELECT * WHERE { ?s ?p ?o }') !=
+            fingerprint('ASK { ?s ?p ?o }'))
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile(values, 100) == 100
+        assert percentile(values, 0) == 1
+        assert percentile([3], 90) == 3
+        assert percentile([], 50) is None
+
+    @responses.activate
+    def test_recorder(self, tmp_path, sparql_client):
+
+        responses.add(
+            responses.GET, sparql_client._build_uri('sparql'),
+            json=EMPTY_RESULTS)
+        responses.add(responses.POST, sparql_client._build_uri('update'))
+
+        log_path = tmp_path / 'queries.log'
+        with QueryRecorder(log_path) as recorder:
+            sparql_client.recorder = recorder
+            sparql_client.query('SELECT * WHERE { ?s rdf:type ?o }')
+            sparql_client.update_query('INSERT DATA { <a> <b> <c> }')
+            sparql_client._exec_graph_query(
+                'CONSTRUCT WHERE { ?s ?p ?o }', 'application/n-triples')
+        entries = read_log(log_path)
+        assert [entry['kind'] for entry in entries] == [
+            'query', 'update', 'query']
+        assert [entry['method'] for entry in entries] == [
+            'GET', 'POST', 'GET']
+        assert [entry['accept'] for entry in entries] == [
+            None, None, 'application/n-triples']
+        assert all(entry['ds_name'] == 'ds_test' for entry in entries)
+        # logged queries are prepared (with prefixes)
+        assert entries[0]['query'] == (
+            'PREFIX rdf: <http://www.rdf.org/#> '
+            'SELECT * WHERE { ?s rdf:type ?o }')
+
+    @responses.activate
+    def test_replay(self):
+
+        responses.add(responses.GET, QUERY_URI, json=EMPTY_RESULTS)
+        responses.add(responses.POST, UPDATE_URI, status=500)
+
+        replayer = Replayer(_client_factory, _entries(3, 1), concurrency=2)
+        report = replayer.run()
+        assert len(responses.calls) == 4
+        total = report['total']
+        assert total['count'] == 4
+        assert total['errors'] == 1
+        assert total['error_rate'] == 0.25
+        assert total['throughput'] > 0
+        assert total['p50'] <= total['p90'] <= total['p99'] <= total['max']
+        # queries differing by constants only share a fingerprint
+        assert len(report['fingerprints']) == 2
+        by_kind = {
+            stats['kind']: stats for stats in report['fingerprints'].values()}
+        assert by_kind['query']['count'] == 3
+        assert by_kind['query']['errors'] == 0
+        assert by_kind['update']['error_rate'] == 1.
+
+    @responses.activate
+    def test_replay_method_accept(self):
+
+        responses.add(
+            responses.GET, QUERY_URI, body='<a> <b> <c> .\n',
+            content_type='application/n-triples')
+        responses.add(responses.POST, QUERY_URI, json=EMPTY_RESULTS)
+
+        entries = [
+            {'time': 0., 'kind': 'query', 'ds_name': 'ds_test',
+             'query': 'CONSTRUCT WHERE { ?s ?p ?o }', 'method': 'GET',
+             'accept': 'application/n-triples'},
+            {'time': 0., 'kind': 'query', 'ds_name': 'ds_test',
+             'query': 'SELECT * WHERE { VALUES ?s { <a> } ?s ?p ?o }',
+             'method': 'POST', 'accept': None},
+        ]
+        report = Replayer(_client_factory, entries, concurrency=1).run()
+        # responses are not decoded: non-JSON results are no errors
+        assert report['total']['errors'] == 0
+        calls = responses.calls
+        assert calls[0].request.headers['Accept'] == 'application/n-triples'
+        assert calls[1].request.method == 'POST'
+        assert calls[1].request.body.startswith('query=')
+
+    @responses.activate
+    def test_replay_mix_duration_qps(self):
+
+        responses.add(responses.GET, QUERY_URI, json=EMPTY_RESULTS)
+        responses.add(responses.POST, UPDATE_URI)
+
+        replayer = Replayer(
+            _client_factory, _entries(2, 2), concurrency=2, qps=100.,
+            duration=0.2, write_ratio=0., seed=0)
+        started = time.monotonic()
+        report = replayer.run()
+        assert time.monotonic() - started < 1.
+        # paced, cycling through reads only
+        assert 5 <= report['total']['count'] <= 25
+        assert all(
+            stats['kind'] == 'query'
+            for stats in report['fingerprints'].values())
+
+        with pytest.raises(ValueError):
+            Replayer(_client_factory, _entries(2, 0), write_ratio=0.5).run()
+        with pytest.raises(ValueError):
+            Replayer(_client_factory, [], write_ratio=1.5)
+        with pytest.raises(ValueError):
+            Replayer(_client_factory, [], concurrency=0)
+
+    @responses.activate
+    def test_replay_cli(self, tmp_path, capsys):
+
+        responses.add(responses.GET, QUERY_URI, json=EMPTY_RESULTS)
+        responses.add(responses.POST, UPDATE_URI)
+
+        log_path = tmp_path / 'queries.log'
+        log_path.write_text(
+            ''.join(json.dumps(entry) + '\n' for entry in _entries(2, 1)))
+
+        assert replay_main([str(log_path), '--json']) == 0
+        report = json.loads(capsys.readouterr().out)
+        assert report['total']['count'] == 3
+
+        assert replay_main([str(log_path)]) == 0
+        out = capsys.readouterr().out
+        assert out.splitlines()[0].startswith('fingerprint')
+        assert out.splitlines()[-1].startswith('total')
+
+        assert replay_main([str(tmp_path / 'missing.log')]) == 1
@@ -0,0 +1,72 @@
+"""Tests on Fuseki manager server-bound clients factory."""
+
+import pytest
+import responses
+
+from fuseki_manager import (
+    FusekiServer, FusekiSPARQLClient, FusekiAdminClient)
+
+
+class TestFusekiManagerServer():
+
+    def test_server_dataset(self):
+
+        ns = {'rdf': 'http://www.rdf.org/#'}
+        with FusekiServer(
+                host='fuseki.local', port=None, user='user', pwd='pwd',
+                timeout=5., namespaces=ns) as server:
+            client_1 = server.dataset('ds_1')
+            client_2 = server.dataset('ds_2', namespaces={})
+            assert isinstance(client_1, FusekiSPARQLClient)
+            assert client_1._build_uri('sparql') == (
+                'http://fuseki.local/ds_1/sparql')
+            assert client_2._build_uri('sparql') == (
+                'http://fuseki.local/ds_2/sparql')
+            assert client_1._namespaces == ns
+            assert client_2._namespaces == {}
+            # transport, configuration and internal clients are shared
+            assert client_1.session is server.session
+            assert client_1._auth_data is client_2._auth_data
+            assert client_1.json_decoder is client_2.json_decoder
+            assert client_1.timeout == 5.
+            assert client_1._service_admin is server.admin
+            assert client_2._service_admin is server.admin
+            assert client_1._service_data is server.data
+            assert client_2._service_graph_store is server.graph_store
+            assert server.admin.session is server.session
+            assert server.admin._service_data.session is server.session
+
+            with pytest.raises(TypeError):
+                server.dataset('ds_1', host='other')
+
+    def test_server_admin_options(self):
+
+        with FusekiServer(admin_options={'cache_ttl': 60}) as server:
+            # only given to the shared admin client
+            assert server.admin._cache.ttl == 60
+            assert server.dataset('ds_1')._service_admin is server.admin
+            assert server.admin._service_data.session is server.session
+
+        with pytest.raises(TypeError):
+            FusekiServer(admin_options={'namespaces': {}})
+
+        # admin client is given to dataset clients, not injected
+        admin = FusekiAdminClient()
+        client = FusekiSPARQLClient('ds_1', admin_client=admin)
+        assert client._service_admin is admin
+
+    @responses.activate
+    def test_server_requests(self):
+
+        server = FusekiServer(host='fuseki.local', port=None, pool_size=2)
+        for ds_name in ('ds_1', 'ds_2'):
+            responses.add(
+                responses.GET,
+                'http://fuseki.local/{}/sparql'.format(ds_name),
+                json={'boolean': ds_name == 'ds_1'})
+        assert server.dataset('ds_1').raw_query('ASK {}') == {
+            'boolean': True}
+        assert server.dataset('ds_2').raw_query('ASK {}') == {
+            'boolean': False}
+        assert len(responses.calls) == 2
+        server.close()
@@ -0,0 +1,159 @@
+"""Tests on Fuseki server statistics sampling."""
+
+import copy
+import time
+import pytest
+import responses
+
+from fuseki_manager.api_client.stats import (
+    Sample, compute_deltas, compute_rates, parse_metrics, parse_metric_types,
+    is_counter)
+
+
+class TestFusekiStatsSampler():
+
+    def test_stats_compute_rates(self, stat_data):
+
+        ds_key = list(stat_data)[0]
+        previous = Sample(10., {'datasets': stat_data})
+        stats = copy.deepcopy(stat_data)
+        stats[ds_key]['Requests'] += 20
+        stats[ds_key]['RequestsBad'] += 5
+        stats[ds_key]['endpoints']['query']['Requests'] += 20
+        current = Sample(15., {'datasets': stats})
+
+        deltas = compute_deltas(previous, current)
+        assert deltas[ds_key]['Requests'] == 20
+        assert deltas[ds_key]['RequestsGood'] == 0
+        assert deltas[ds_key]['endpoints']['query']['Requests'] == 20
+
+        rates = compute_rates(previous, current)
+        assert rates[ds_key]['Requests'] == 4.
+        assert rates[ds_key]['RequestsBad'] == 1.
+        assert rates[ds_key]['ErrorRatio'] == .25
+        assert rates[ds_key]['endpoints']['query']['Requests'] == 4.
+        assert rates[ds_key]['endpoints']['update']['Requests'] == 0.
+
+        # counters reset by a server restart
+        restarted = Sample(20., {'datasets': {ds_key: {'Requests': 3}}})
+        assert compute_deltas(current, restarted)[ds_key]['Requests'] == 3
+
+        with pytest.raises(ValueError):
+            compute_rates(current, current)
+
+    def test_stats_parse_metrics(self):
+
+        text = (
+            '# HELP fuseki_requests_good Requests\n'
+            '# TYPE fuseki_requests_good counter\n'
+            'fuseki_requests_good{dataset="/ds",endpoint="query"} 12.0\n'
+            'jvm_threads 42\n'
+        )
+        assert parse_metrics(text) == {
+            'fuseki_requests_good{dataset="/ds",endpoint="query"}': 12.,
+            'jvm_threads': 42.,
+        }
+        types = parse_metric_types(text)
+        assert types == {'fuseki_requests_good': 'counter'}
+        assert is_counter(
+            'fuseki_requests_good{dataset="/ds",endpoint="query"}', types)
+        assert not is_counter('jvm_threads', types)
+        types['http_seconds'] = 'summary'
+        assert is_counter('http_seconds_count{method="GET"}', types)
+        assert not is_counter('http_seconds{quantile="0.5"}', types)
+
+    @responses.activate
+    def test_stats_metric_rates(self, admin_client, stat_data):
+
+        for requests_good, memory in ((10, 512), (30, 256),):
+            responses.add(
+                method=responses.GET,
+                url=admin_client._build_uri('stats'),
+                status=200,
+                json={'datasets': stat_data},
+            )
+            responses.add(
+                method=responses.GET,
+                url=admin_client._build_uri('metrics'),
+                status=200,
+                body=(
+                    '# TYPE fuseki_requests_good counter\n'
+                    'fuseki_requests_good {}\n'
+                    '# TYPE jvm_memory_used_bytes gauge\n'
+                    'jvm_memory_used_bytes {}\n'.format(
+                        requests_good, memory)),
+            )
+
+        sampler = admin_client.stats_sampler(capacity=2, use_metrics=True)
+        sampler.sample()
+        sampler.sample()
+        rates = sampler.metric_rates()
+        # gauges have no rates, and their drops are no counter resets
+        assert list(rates) == ['fuseki_requests_good']
+        assert rates['fuseki_requests_good'] > 0
+        assert sampler.metric_gauges() == {'jvm_memory_used_bytes': 256.}
+
+    @responses.activate
+    def test_stats_sampler(self, admin_client, stat_data):
+
+        ds_key = list(stat_data)[0]
+        stats = copy.deepcopy(stat_data)
+        stats[ds_key]['Requests'] += 10
+        for data in (stat_data, stats):
+            responses.add(
+                method=responses.GET,
+                url=admin_client._build_uri('stats'),
+                status=200,
+                json={'datasets': data},
+            )
+        responses.add(
+            method=responses.GET,
+            url=admin_client._build_uri('metrics'),
+            status=404,
+        )
+
+        sampler = admin_client.stats_sampler(capacity=2, use_metrics=True)
+        assert sampler.rates() == {}
+        sampler.sample()
+        assert not sampler.use_metrics
+        sampler.sample()
+        sampler.sample()
+        assert len(sampler.samples) == 2
+        # one request per sample for all datasets
+        assert len(responses.calls) == 4
+
+        assert sampler.deltas()[ds_key]['Requests'] == 0
+        assert sampler.rates(window=3600)[ds_key]['Requests'] == 0.
+        assert sampler.metric_rates() == {}
+        exported = sampler.export_prometheus()
+        assert 'fuseki_dataset_requests_per_second{{dataset="{}",' \
+            'kind="requests"}} 0.0'.format(ds_key) in exported
+        assert 'endpoint="query"' in exported
+        # each metric family is a contiguous block after its TYPE line
+        families = []
+        for line in exported.splitlines():
+            family = line.split()[2] if line.startswith('#') else (
+                line.split('{')[0])
+            if not families or families[-1] != family:
+                families.append(family)
+        assert families == [
+            'fuseki_dataset_requests_per_second',
+            'fuseki_dataset_error_ratio',
+            'fuseki_endpoint_requests_per_second']
+
+    @responses.activate
+    def test_stats_sampler_background(self, admin_client, stat_data):
+
+        responses.add(
+            method=responses.GET,
+            url=admin_client._build_uri('stats'),
+            status=200,
+            json={'datasets': stat_data},
+        )
+
+        with admin_client.stats_sampler(interval=0.01) as sampler:
+            deadline = time.monotonic() + 5.
+            while len(sampler.samples) < 2 and time.monotonic() < deadline:
+                time.sleep(0.005)
+        assert len(sampler.samples) >= 2
+        assert sampler._thread is None
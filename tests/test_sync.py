@@ -0,0 +1,83 @@
+"""Tests on Fuseki manager delta synchronization."""
+
+import io
+from urllib.parse import unquote_plus
+import pytest
+import responses
+
+from fuseki_manager.sync import external_sort, diff_sorted
+from fuseki_manager.exceptions import ArgumentError
+
+
+class TestFusekiManagerSync():
+
+    def test_sync_external_sort(self, tmpdir):
+
+        lines = ['{}\n'.format(i % 7) for i in range(30)]
+        result = list(external_sort(lines, str(tmpdir), run_size=4))
+        assert result == ['{}\n'.format(i) for i in range(7)]
+        assert len(tmpdir.listdir()) == 8
+
+    def test_sync_diff_sorted(self):
+
+        result = list(diff_sorted(['a', 'b', 'd'], ['b', 'c', 'e']))
+        assert result == [('+', 'a'), ('-', 'c'), ('+', 'd'), ('-', 'e')]
+        assert list(diff_sorted([], ['a'])) == [('-', 'a')]
+
+    @responses.activate
+    def test_sync_graph(self, sparql_client, ntriples_data):
+
+        graph_store = sparql_client._service_graph_store
+        remote = ntriples_data.splitlines(keepends=True)
+        local = remote[:2] + [
+            b'<http://url.org/dummy#bar>  <http://url.org/dummy#label> '
+            b'"Bar" .\n']
+        responses.add(
+            method=responses.GET,
+            url=graph_store._build_uri('ds_test'),
+            status=200,
+            body=b''.join(remote),
+        )
+        responses.add(
+            method=responses.POST,
+            url=sparql_client._build_uri('update'),
+            status=200,
+        )
+
+        graph = 'http://url.org/dummy#graph'
+        diff = sparql_client.diff_graph(
+            io.BytesIO(b''.join(local)), graph=graph, run_size=2)
+        assert (diff.nb_local, diff.nb_remote) == (3, 3)
+        assert (diff.nb_deletes, diff.nb_inserts) == (1, 1)
+        assert diff.size == 2
+        # blank nodes can not be deleted
+        assert diff.deletes_blank_nodes
+        with pytest.raises(ArgumentError):
+            diff.apply()
+        diff.close()
+        assert not diff.tmp_dir.exists()
+
+        responses.replace(
+            method_or_response=responses.GET,
+            url=graph_store._build_uri('ds_test'),
+            body=b''.join(remote[:2]),
+        )
+        local_data = io.BytesIO(remote[0])
+        diff = sparql_client.sync_graph(local_data, graph=graph, run_size=2)
+        assert (diff.nb_deletes, diff.nb_inserts) == (1, 0)
+        assert not diff.tmp_dir.exists()
+        update = unquote_plus(responses.calls[-1].request.body)
+        assert 'DELETE DATA { GRAPH <' + graph + '> { <' in update
+        assert '"Foo"@en' in update
+
+    def test_sync_graph_errors(self, sparql_client, ntriples_data):
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                method=responses.GET,
+                url=sparql_client._service_graph_store._build_uri('ds_test'),
+                status=404,
+            )
+            quad = b'<http://a.org/s> <http://a.org/p> "o" <http://a.org/g> .'
+            with pytest.raises(ArgumentError):
+                sparql_client.diff_graph(io.BytesIO(quad))
@@ -0,0 +1,104 @@
+"""Tests on Fuseki manager batched graph traversal."""
+
+import re
+from urllib.parse import parse_qs
+import pytest
+import responses
+
+from fuseki_manager.traversal import build_frontier_query, traverse
+
+
+EX = 'http://url.org/dummy#'
+GRAPH = [
+    (EX + 'a', EX + 'knows', EX + 'b'),
+    (EX + 'a', EX + 'label', '"A"'),
+    (EX + 'b', EX + 'knows', EX + 'c'),
+    (EX + 'b', EX + 'likes', EX + 'd'),
+    (EX + 'c', EX + 'knows', EX + 'a'),
+    (EX + 'c', EX + 'knows', EX + 'e'),
+]
+
+
+def _binding(value):
+    if value.startswith('"'):
+        return {'type': 'literal', 'value': value.strip('"')}
+    return {'type': 'uri', 'value': value}
+
+
+def select(query):
+    """Evaluate frontier queries on GRAPH."""
+    node_var, nodes = re.search(
+        r'VALUES \?([so]) \{ ([^}]*) \}', query).groups()
+    nodes = {node.strip('<>') for node in nodes.split()}
+    preds = re.search(r'VALUES \?p \{ ([^}]*) \}', query)
+    if preds is not None:
+        preds = {pred.strip('<>') for pred in preds.group(1).split()}
+    limit, offset = map(int, re.search(
+        r'LIMIT (\d+) OFFSET (\d+)', query).groups())
+    matches = sorted(
+        triple for triple in GRAPH
+        if triple[0 if node_var == 's' else 2] in nodes and
+        (preds is None or triple[1] in preds))
+    return [
+        {var: _binding(value) for var, value in zip('spo', triple)}
+        for triple in matches[offset:offset + limit]]
+
+
+class TestFusekiManagerTraversal():
+
+    def test_traversal_build_frontier_query(self):
+
+        query = build_frontier_query(
+            [EX + 'a', EX + 'b'], direction='in', predicates=['ex:knows'],
+            graph=EX + 'g')
+        assert query == (
+            'SELECT ?s ?p ?o WHERE {{ '
+            'VALUES ?o {{ <{ex}a> <{ex}b> }} VALUES ?p {{ ex:knows }} '
+            'GRAPH <{ex}g> {{ ?s ?p ?o . }} }} ORDER BY ?s ?p ?o'.format(
+                ex=EX))
+
+    def test_traversal(self):
+
+        result = traverse(select, EX + 'a', max_depth=2)
+        assert result['depths'] == {
+            EX + 'a': 0, EX + 'b': 1, EX + 'c': 2, EX + 'd': 2}
+        assert len(result['triples']) == 4
+        assert result['requests'] == 2
+
+        # one batch per node, one page per triple
+        result = traverse(
+            select, EX + 'a', max_depth=3, batch_size=1, page_size=1)
+        assert result['depths'][EX + 'e'] == 3
+        assert len(result['triples']) == 6
+        assert result['requests'] > 6
+
+        result = traverse(
+            select, [EX + 'a'], max_depth=5, predicates=[EX + 'knows'])
+        assert EX + 'd' not in result['depths']
+        assert len(result['triples']) == 4
+
+        result = traverse(select, EX + 'a', direction='both')
+        assert result['depths'] == {
+            EX + 'a': 0, EX + 'b': 1, EX + 'c': 1}
+
+        with pytest.raises(ValueError):
+            traverse(select, EX + 'a', direction='up')
+
+    @responses.activate
+    def test_traversal_sparql_client(self, sparql_client, triple_data):
+
+        responses.add(
+            method=responses.POST,
+            url=sparql_client._build_uri('sparql'),
+            status=200,
+            json=triple_data,
+        )
+
+        result = sparql_client.traverse(
+            'http://url.org/dummy#foo', predicates=['rdf:type'])
+        assert result['requests'] == 1
+        assert len(result['triples']) == len(
+            triple_data['results']['bindings'])
+        query = parse_qs(responses.calls[0].request.body)['query'][0]
+        assert query.startswith('PREFIX rdf: <http://www.rdf.org/#>')
+        assert 'VALUES ?p { rdf:type }' in query
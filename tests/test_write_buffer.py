@@ -0,0 +1,147 @@
+"""Tests on Fuseki manager write-behind buffer."""
+
+import time
+from urllib.parse import unquote_plus
+import pytest
+import responses
+
+from fuseki_manager.exceptions import (
+    FusekiClientError, FusekiClientResponseError)
+
+
+class TestFusekiWriteBuffer():
+
+    @responses.activate
+    def test_write_buffer_coalescing(self, sparql_client):
+
+        responses.add(
+            method=responses.POST,
+            url=sparql_client._build_uri('update'),
+            status=200,
+        )
+
+        foo = 'http://url.org/dummy#foo'
+        with sparql_client.write_buffer(max_age=None) as buffer:
+            buffer.insert(foo, 'rdf:type', 'http://url.org/dummy#Class')
+            buffer.insert(foo, 'rdf:label', '"Foo"')
+            buffer.delete(foo, 'rdf:label', '"Foo"')
+            buffer.delete(foo, 'rdf:label', '"Bar"')
+            assert buffer.depth == 3
+            assert buffer.metrics['coalesced'] == 1
+            assert not responses.calls
+            assert buffer.flush() == 3
+            assert buffer.flush() == 0
+
+        assert len(responses.calls) == 1
+        update = unquote_plus(responses.calls[0].request.body)
+        assert update == (
+            'update=PREFIX rdf: <http://www.rdf.org/#> '
+            'DELETE DATA { <http://url.org/dummy#foo> rdf:label "Foo" . '
+            '<http://url.org/dummy#foo> rdf:label "Bar" . } ; '
+            'INSERT DATA { <http://url.org/dummy#foo> rdf:type '
+            '<http://url.org/dummy#Class> . }')
+        assert buffer.metrics['flushes'] == 1
+        assert buffer.metrics['flushed_triples'] == 3
+
+        with pytest.raises(FusekiClientError):
+            buffer.insert(foo, 'rdf:label', '"Foo"')
+
+    @responses.activate
+    def test_write_buffer_triggers(self, sparql_client):
+
+        responses.add(
+            method=responses.POST,
+            url=sparql_client._build_uri('update'),
+            status=200,
+        )
+
+        buffer = sparql_client.write_buffer(
+            max_size=2, max_age=0.01, graph='http://url.org/dummy#graph')
+        # size trigger
+        buffer.insert('http://url.org/dummy#foo', 'rdf:label', '"1"')
+        buffer.insert('http://url.org/dummy#foo', 'rdf:label', '"2"')
+        assert buffer.depth == 0
+        assert len(responses.calls) == 1
+        assert 'GRAPH <http://url.org/dummy#graph>' in unquote_plus(
+            responses.calls[0].request.body)
+        # age trigger
+        buffer.insert('http://url.org/dummy#foo', 'rdf:label', '"3"')
+        deadline = time.monotonic() + 5
+        while buffer.depth and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert buffer.depth == 0
+        assert len(responses.calls) == 2
+        buffer.close()
+
+    def test_write_buffer_errors(self, sparql_client):
+
+        with pytest.raises(ValueError):
+            sparql_client.write_buffer(max_size=0)
+
+        buffer = sparql_client.write_buffer(max_age=None)
+        buffer.insert('http://url.org/dummy#foo', 'rdf:label', '"1"')
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                method=responses.POST,
+                url=sparql_client._build_uri('update'),
+                status=500,
+            )
+            with pytest.raises(FusekiClientResponseError):
+                buffer.flush()
+        # failed operations are kept
+        assert buffer.depth == 1
+        assert buffer.metrics['failed_flushes'] == 1
+
+    @responses.activate
+    def test_write_buffer_literals(self, sparql_client):
+
+        responses.add(
+            method=responses.POST,
+            url=sparql_client._build_uri('update'),
+            status=200,
+        )
+
+        foo = 'http://url.org/dummy#foo'
+        with sparql_client.write_buffer(max_age=None) as buffer:
+            buffer.insert(foo, 'rdf:label', 'Foo "bar"')
+            buffer.insert(foo, 'rdf:comment', '"Foo"@en')
+            buffer.insert(foo, 'rdf:value', '"1"^^xsd:integer')
+            buffer.insert(foo, 'rdf:type', 'rdf:Class')
+        update = unquote_plus(responses.calls[0].request.body)
+        assert update.endswith(
+            'INSERT DATA { <http://url.org/dummy#foo> rdf:label '
+            '"Foo \\"bar\\"" . '
+            '<http://url.org/dummy#foo> rdf:comment "Foo"@en . '
+            '<http://url.org/dummy#foo> rdf:value "1"^^xsd:integer . '
+            '<http://url.org/dummy#foo> rdf:type rdf:Class . }')
+
+    def test_write_buffer_background_errors(self, sparql_client):
+
+        buffer = sparql_client.write_buffer(max_age=0.01)
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                method=responses.POST,
+                url=sparql_client._build_uri('update'),
+                body=RuntimeError('unexpected'),
+            )
+            buffer.insert('http://url.org/dummy#foo', 'rdf:label', '"1"')
+            deadline = time.monotonic() + 5
+            while buffer.last_error is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert isinstance(buffer.last_error, RuntimeError)
+            assert buffer.depth == 1
+
+        # background flushes go on after unexpected errors
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                method=responses.POST,
+                url=sparql_client._build_uri('update'),
+                status=200,
+            )
+            deadline = time.monotonic() + 5
+            while (not buffer.metrics['flushes'] and
+                    time.monotonic() < deadline):
+                time.sleep(0.01)
+            assert buffer.metrics['flushes'] == 1
+            assert buffer.depth == 0
+        buffer.close()